@@ -96,6 +96,12 @@ echo  - 
 xcopy "%PROJECT_ROOT%plugins_test" "%FINAL_PACKAGE_DIR%\plugins_test\" /s /e /i /y %EXCLUDE_PARAM% > nul
 rem ===================================================================
 
+echo  - Ԥֽ (״ʱֱӸã)...
+%PYTHON_EXE% "%PROJECT_ROOT%bytecode_cache.py" build "%FINAL_PACKAGE_DIR%"
+if %errorlevel% neq 0 (
+    echo [WARNING] Ԥֽʧܣ״ʱڱ롣
+)
+
 echo  -  .ini ļ...
 xcopy "%PROJECT_ROOT%plugins\tools\*.ini" "%FINAL_PACKAGE_DIR%\" /y > nul
 
@@ -0,0 +1,189 @@
+import time
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from plugin_base import BasePlugin
+
+
+# 检查结果的有效期 (秒)：有效期内刷新插件列表或执行插件时直接复用，不再重复检查
+DEFAULT_TTL = 300.0
+# 单个插件 is_available() 的最长耗时 (秒)，超时按不可用处理
+DEFAULT_PROBE_TIMEOUT = 10.0
+
+# 回调: (插件, 是否可用)
+AvailabilityCallback = Callable[[BasePlugin, bool], None]
+
+
+class _Probe:
+    """一次正在进行的检查：等待结果的线程与回调都挂在这里"""
+
+    __slots__ = ('plugin', 'done', 'available', 'listeners', 'timed_out')
+
+    def __init__(self, plugin: BasePlugin):
+        self.plugin = plugin
+        self.done = threading.Event()
+        self.available = False
+        self.listeners: List[AvailabilityCallback] = []
+        self.timed_out = False
+
+
+class AvailabilityProber:
+    """
+    插件可用性检查 (is_available()) 的并发执行与缓存。
+    检查在线程池中并发进行，每个插件从提交检查起超过 timeout 秒仍未得到结果时按不可用处理 (由一个看门狗线程统一计时；
+    包括因线程都被卡住的检查占用而一直排队的插件。超时的 is_available() 无法被中断，它稍后返回时会更新缓存并再次通知回调)。
+    结果按插件名称缓存 ttl 秒，GUI 刷新列表与执行插件时复用。
+    """
+
+    def __init__(self, workers: int = 8, timeout: float = DEFAULT_PROBE_TIMEOUT, ttl: float = DEFAULT_TTL):
+        self.timeout = timeout
+        self.ttl = ttl
+        self._workers = max(1, workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        # 插件名称 -> (是否可用, 过期时间)
+        self._results: Dict[str, Tuple[bool, float]] = {}
+        self._probes: Dict[str, _Probe] = {}
+        # 看门狗的截止时间堆: (截止时间, 序号, 插件名称, 检查)
+        self._deadlines: List[Tuple[float, int, str, _Probe]] = []
+        self._sequence = 0
+        self._watchdog: Optional[threading.Thread] = None
+        self._closed = False
+
+    # --- 查询 ---
+
+    def get_cached(self, plugin: BasePlugin) -> Optional[bool]:
+        """有效期内的检查结果；没有检查过、已过期或正在检查时返回 None"""
+        with self._lock:
+            return self._cached_locked(plugin.get_name())
+
+    def _cached_locked(self, key: str) -> Optional[bool]:
+        result = self._results.get(key)
+        if result is None or result[1] < time.monotonic():
+            return None
+        return result[0]
+
+    def is_available(self, plugin: BasePlugin) -> bool:
+        """阻塞地获取插件是否可用：优先使用缓存，正在检查时等待其结果，否则立即开始检查"""
+        key = plugin.get_name()
+        with self._lock:
+            cached = self._cached_locked(key)
+            if cached is not None:
+                return cached
+            probe = self._start_locked(key, plugin)
+        # 看门狗会在截止时间把检查按不可用处理；这里再限定等待时间，保证调用方不会无限期阻塞
+        if not probe.done.wait(self.timeout):
+            return False
+        return probe.available
+
+    # --- 后台检查 ---
+
+    def probe(self, plugins: Iterable[BasePlugin], callback: Optional[AvailabilityCallback] = None):
+        """
+        在后台检查一组插件，不等待结果。
+        每个插件得到结果时 (以及超时后迟到的结果) 在工作线程中调用 callback(plugin, available)；
+        有效期内已有结果的插件直接在当前线程中回调。
+        """
+        ready = []
+        with self._lock:
+            for plugin in plugins:
+                key = plugin.get_name()
+                cached = self._cached_locked(key)
+                if cached is not None:
+                    ready.append((plugin, cached))
+                    continue
+                probe = self._start_locked(key, plugin)
+                if callback is not None:
+                    probe.listeners.append(callback)
+        if callback is not None:
+            for plugin, available in ready:
+                callback(plugin, available)
+
+    def invalidate(self, plugin: Optional[BasePlugin] = None):
+        """丢弃某个插件 (plugin 为 None 时为全部插件) 的缓存结果"""
+        with self._lock:
+            if plugin is None:
+                self._results.clear()
+            else:
+                self._results.pop(plugin.get_name(), None)
+
+    def _start_locked(self, key: str, plugin: BasePlugin) -> _Probe:
+        """返回插件正在进行的检查，没有时提交一个新的检查 (调用方持有 self._lock)"""
+        probe = self._probes.get(key)
+        if probe is not None:
+            return probe
+        probe = _Probe(plugin)
+        self._probes[key] = probe
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="AvailabilityProbe")
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name="AvailabilityWatchdog", daemon=True)
+            self._watchdog.start()
+        # 超时从提交时计算 (包括在线程池中排队的时间)：线程都被卡住的检查占用时，排队的检查同样会超时
+        self._sequence += 1
+        heapq.heappush(self._deadlines, (time.monotonic() + self.timeout, self._sequence, key, probe))
+        self._cond.notify()
+        self._pool.submit(self._run, key, probe)
+        return probe
+
+    def _run(self, key: str, probe: _Probe):
+        try:
+            available = bool(probe.plugin.is_available())
+        except Exception as e:
+            print(f"[ERROR] 检查插件 {key} 的可用性失败: {e}")
+            available = False
+        self._finish(key, probe, available, timed_out=False)
+
+    def _watch(self):
+        """看门狗线程：把超过截止时间仍未完成的检查按不可用处理"""
+        while True:
+            expired = []
+            with self._lock:
+                while not self._closed:
+                    now = time.monotonic()
+                    while self._deadlines and (self._deadlines[0][0] <= now or self._deadlines[0][3].done.is_set()):
+                        _, _, key, probe = heapq.heappop(self._deadlines)
+                        if not probe.done.is_set():
+                            expired.append((key, probe))
+                    if expired:
+                        break
+                    self._cond.wait(self._deadlines[0][0] - now if self._deadlines else None)
+                if self._closed:
+                    return
+            for key, probe in expired:
+                print(f"[WARNING] 检查插件 {key} 的可用性超过 {self.timeout:g} 秒，按不可用处理")
+                self._finish(key, probe, False, timed_out=True)
+
+    def _finish(self, key: str, probe: _Probe, available: bool, timed_out: bool):
+        with self._lock:
+            if probe.timed_out and not timed_out:
+                # 超时后迟到的结果：只有这次检查的结果仍是当前结果时才更新
+                if self._probes.get(key) is not None:
+                    return
+            elif probe.done.is_set():
+                return
+            probe.available = available
+            probe.timed_out = timed_out
+            self._results[key] = (available, time.monotonic() + self.ttl)
+            if self._probes.get(key) is probe:
+                del self._probes[key]
+            listeners = list(probe.listeners)
+            # 在锁内标记完成，避免超时与正常结果同时到达时后者被前者覆盖
+            probe.done.set()
+        for listener in listeners:
+            try:
+                listener(probe.plugin, available)
+            except Exception as e:
+                print(f"[WARNING] 可用性回调执行失败: {e}")
+
+    def shutdown(self):
+        """停止看门狗并关闭线程池 (不等待仍在进行的检查)"""
+        with self._lock:
+            self._closed = True
+            self._cond.notify()
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+from core import Logger
+
+
+# ======================================================
+# 文件日志吞吐量基准测试
+# 比较同步模式 (逐行刷新) 与异步模式 (后台批量写入) 下，
+# 插件线程调用 print() 的耗时，以及异步模式最终落盘所需的时间。
+# 用法: python bench_logger.py [--lines 200000] [--threads 4] [--console]
+# ======================================================
+
+def run_benchmark(async_mode: bool, lines: int, threads: int, console: bool) -> dict:
+    log_path = os.path.join(tempfile.gettempdir(), f"SysTools_LoggerBench_{'async' if async_mode else 'sync'}.log")
+    if os.path.exists(log_path):
+        os.remove(log_path)
+
+    terminal = sys.__stdout__ if console else open(os.devnull, "w", encoding="utf-8")
+    logger = Logger(log_path, terminal, async_mode=async_mode)
+    per_thread = lines // threads
+    message = "[INFO] 插件输出示例: " + "x" * 60 + "\n"
+
+    def producer():
+        for _ in range(per_thread):
+            logger.write(message)
+
+    workers = [threading.Thread(target=producer) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    produced = time.perf_counter() - started
+    logger.drain(timeout=60)
+    finished = time.perf_counter() - started
+
+    logger.log.close()
+    if not console:
+        terminal.close()
+    with open(log_path, "r", encoding="utf-8") as f:
+        written = sum(1 for _ in f)
+    os.remove(log_path)
+    return {'produced': produced, 'finished': finished, 'written': written, 'expected': per_thread * threads}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件日志吞吐量基准测试")
+    parser.add_argument("--lines", type=int, default=200000, help="写入的总行数 (默认: 200000)")
+    parser.add_argument("--threads", type=int, default=4, help="并发写入的线程数 (默认: 4)")
+    parser.add_argument("--console", action="store_true", help="同时输出到真实控制台 (默认输出到空设备)")
+    args = parser.parse_args()
+
+    print(f"写入 {args.lines} 行，{args.threads} 个线程")
+    results = {}
+    for async_mode in (False, True):
+        name = "异步" if async_mode else "同步"
+        result = run_benchmark(async_mode, args.lines, args.threads, args.console)
+        results[name] = result
+        status = "完整" if result['written'] == result['expected'] else f"缺失 {result['expected'] - result['written']} 行"
+        print(f"{name}模式: 写入调用耗时 {result['produced']:.3f}秒 "
+              f"({result['expected'] / result['produced']:,.0f} 行/秒)，"
+              f"全部落盘耗时 {result['finished']:.3f}秒，日志{status}")
+
+    speedup = results["同步"]['produced'] / results["异步"]['produced']
+    print(f"异步模式下插件线程的写入耗时约为同步模式的 1/{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
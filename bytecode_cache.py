@@ -0,0 +1,218 @@
+import os
+import sys
+import time
+import argparse
+import threading
+import py_compile
+import importlib.util
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+# ======================================================
+# 插件字节码预编译缓存
+# 打包后的程序不会为插件写入 __pycache__ (PyInstaller 关闭了字节码写入，发布包也排除了 __pycache__，
+# 插件目录还可能位于只读介质上)，于是每次启动都要重新编译插件源码。
+# 这里把插件与工具模块预编译为按源文件内容哈希校验的 .pyc，保存在按解释器版本区分的缓存目录中，
+# 并把 sys.pycache_prefix 指向该目录，之后的导入直接使用；源文件内容变化后才重新编译。
+# 发布包中可以附带构建时生成的可迁移缓存 (bytecode/<解释器标记>/ 下按相对路径存放)，首次运行时直接复制，无需编译:
+#   python bytecode_cache.py build SysTools_FinalPackage
+# ======================================================
+
+SHIPPED_DIR_NAME = "bytecode"
+PYCACHE_PREFIX_ENV = "PYTHONPYCACHEPREFIX"
+# .pyc 头部 flags 字段中表示“基于哈希校验”的位 (PEP 552)
+_FLAG_HASH_BASED = 0b01
+
+
+def iter_sources(directory: str) -> Iterator[str]:
+    """目录 (递归) 中的所有 .py 文件，跳过 __pycache__"""
+    for root, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                yield os.path.join(root, filename)
+
+
+def pyc_is_fresh(pyc_path: str, source: bytes, source_mtime: float) -> bool:
+    """检查 .pyc 是否对应当前的源文件内容 (同时接受基于哈希和基于修改时间的 .pyc)"""
+    try:
+        with open(pyc_path, "rb") as f:
+            header = f.read(16)
+    except OSError:
+        return False
+    if len(header) < 16 or header[:4] != importlib.util.MAGIC_NUMBER:
+        return False
+    flags = int.from_bytes(header[4:8], "little")
+    if flags & _FLAG_HASH_BASED:
+        return header[8:16] == importlib.util.source_hash(source)
+    return (int.from_bytes(header[8:12], "little") == int(source_mtime) & 0xFFFFFFFF and
+            int.from_bytes(header[12:16], "little") == len(source) & 0xFFFFFFFF)
+
+
+def compile_source(source_path: str, pyc_path: str):
+    """编译为按源文件哈希校验的 .pyc (文件被复制、修改时间变化后仍然有效)，语法错误时抛出 py_compile.PyCompileError"""
+    py_compile.compile(source_path, cfile=pyc_path, doraise=True,
+                       invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH)
+
+
+def _relocatable_path(root: str, relative_source: str) -> str:
+    """可迁移缓存中源文件对应的 .pyc 路径: <root>/<相对目录>/<模块名>.<解释器标记>.pyc"""
+    directory, filename = os.path.split(relative_source)
+    return os.path.join(root, directory, f"{filename[:-3]}.{sys.implementation.cache_tag}.pyc")
+
+
+class BytecodeCache:
+    """
+    插件字节码缓存。
+    cache_root 下的 bytecode/<解释器标记> 目录作为 sys.pycache_prefix (布局由 importlib 决定，与源文件的绝对路径对应)；
+    base_dir 为程序所在目录，其中的 bytecode/<解释器标记> 为构建时生成的可迁移缓存 (布局为相对于 base_dir 的路径)。
+    """
+
+    def __init__(self, cache_root: str, base_dir: Optional[str] = None):
+        self.prefix = os.path.join(cache_root, SHIPPED_DIR_NAME, sys.implementation.cache_tag)
+        self.base_dir = os.path.abspath(base_dir) if base_dir else None
+        self.shipped_dir = (os.path.join(self.base_dir, SHIPPED_DIR_NAME, sys.implementation.cache_tag)
+                            if self.base_dir else None)
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def activate(self):
+        """
+        把 sys.pycache_prefix 指向缓存目录 (用户已通过 -X pycache_prefix 或环境变量指定时沿用其设置)。
+        同时设置环境变量，使插件工作进程也从这里读取字节码。
+        """
+        if sys.pycache_prefix and sys.pycache_prefix != self.prefix:
+            self.prefix = sys.pycache_prefix
+        sys.pycache_prefix = self.prefix
+        os.environ[PYCACHE_PREFIX_ENV] = self.prefix
+
+    def pyc_path(self, source_path: str) -> str:
+        """源文件在缓存目录中对应的 .pyc 路径 (与导入时 importlib 查找的位置相同)"""
+        saved, sys.pycache_prefix = sys.pycache_prefix, self.prefix
+        try:
+            return importlib.util.cache_from_source(os.path.abspath(source_path))
+        finally:
+            sys.pycache_prefix = saved
+
+    def _shipped_path(self, source_path: str) -> Optional[str]:
+        if not self.shipped_dir:
+            return None
+        relative = os.path.relpath(os.path.abspath(source_path), self.base_dir)
+        if relative.startswith(os.pardir):
+            return None
+        return _relocatable_path(self.shipped_dir, relative)
+
+    def precompile(self, directories: Iterable[str]) -> Dict[str, int]:
+        """
+        确保目录 (递归) 中每个 .py 文件在缓存目录中都有与当前内容一致的 .pyc：
+        已有则跳过，发布包附带的可迁移缓存中有一致的 .pyc 时直接复制，否则编译。
+        返回各类文件的数量: fresh / copied / compiled / failed。
+        """
+        stats = {'fresh': 0, 'copied': 0, 'compiled': 0, 'failed': 0}
+        for directory in directories:
+            for source_path in iter_sources(directory):
+                try:
+                    with open(source_path, "rb") as f:
+                        source = f.read()
+                    mtime = os.stat(source_path).st_mtime
+                except OSError:
+                    stats['failed'] += 1
+                    continue
+                target = self.pyc_path(source_path)
+                if pyc_is_fresh(target, source, mtime):
+                    stats['fresh'] += 1
+                    continue
+                shipped = self._shipped_path(source_path)
+                try:
+                    if shipped and pyc_is_fresh(shipped, source, mtime):
+                        self._copy(shipped, target)
+                        stats['copied'] += 1
+                    else:
+                        compile_source(source_path, target)
+                        stats['compiled'] += 1
+                except (OSError, py_compile.PyCompileError):
+                    # 语法错误等留给导入时报告
+                    stats['failed'] += 1
+        return stats
+
+    @staticmethod
+    def _copy(source: str, target: str):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+            dst.write(src.read())
+        os.replace(tmp_path, target)
+
+    def precompile_async(self, directories: Iterable[str]):
+        """在后台线程中预编译 (不阻塞插件发现)；已在进行时把目录加入队列，由同一线程随后处理"""
+        with self._lock:
+            self._pending.extend(d for d in directories if d not in self._pending)
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run_pending, name="BytecodePrecompile", daemon=True)
+            self._thread.start()
+
+    def _run_pending(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                directories, self._pending = self._pending, []
+            started = time.perf_counter()
+            try:
+                stats = self.precompile(directories)
+            except Exception as e:
+                print(f"[WARNING] 预编译插件字节码失败: {e}")
+                continue
+            if stats['compiled'] or stats['copied']:
+                print(f"[INFO] 预编译插件字节码: 编译 {stats['compiled']} 个，从发布包复制 {stats['copied']} 个，"
+                      f"已是最新 {stats['fresh']} 个 (耗时 {(time.perf_counter() - started) * 1000:.0f} 毫秒)")
+
+    def wait(self, timeout: Optional[float] = None):
+        """等待后台预编译完成 (用于测试与退出前)"""
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+def build_relocatable(package_dir: str, directories: Iterable[str]) -> Dict[str, int]:
+    """
+    构建时步骤：把发布包中插件目录下的所有模块编译到 <package_dir>/bytecode/<解释器标记>/，按相对路径存放，
+    与发布包的安装位置无关；目标机器首次运行时由 BytecodeCache.precompile() 复制到缓存目录。
+    """
+    package_dir = os.path.abspath(package_dir)
+    root = os.path.join(package_dir, SHIPPED_DIR_NAME, sys.implementation.cache_tag)
+    stats = {'compiled': 0, 'failed': 0}
+    for directory in directories:
+        directory = os.path.join(package_dir, directory)
+        if not os.path.isdir(directory):
+            continue
+        for source_path in iter_sources(directory):
+            try:
+                compile_source(source_path, _relocatable_path(root, os.path.relpath(source_path, package_dir)))
+                stats['compiled'] += 1
+            except (OSError, py_compile.PyCompileError) as e:
+                print(f"[WARNING] 无法编译 {source_path}: {e}")
+                stats['failed'] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预编译 SysTools 插件字节码")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="为发布包生成可迁移的字节码缓存")
+    build.add_argument("package_dir", help="发布包目录 (其中的 bytecode/ 目录将被写入)")
+    build.add_argument("directories", nargs="*", default=["plugins", "plugins_test"],
+                       help="相对于发布包的插件目录 (默认: plugins plugins_test)")
+    args = parser.parse_args()
+
+    stats = build_relocatable(args.package_dir, args.directories)
+    print(f"已为 Python {sys.implementation.cache_tag} 编译 {stats['compiled']} 个模块"
+          + (f"，{stats['failed']} 个失败" if stats['failed'] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,29 @@ import io
 import argparse
 import subprocess
 import tempfile
-from typing import List
-from plugin_manager import PluginManager
-from plugin_base import BasePlugin
+import asyncio
+import traceback
+from collections import deque
+from typing import Any, Dict, List, Optional
+from plugin_manager import PluginDiff, PluginManager
+from discovery_cache import DiscoveryCache
+from bytecode_cache import BytecodeCache
+from availability import AvailabilityProber, DEFAULT_PROBE_TIMEOUT
+from plugin_watcher import PluginWatcher
+from plugin_registry import QueryError
+from plugin_base import (BasePlugin, CancellationToken, ExecutionContext, call_execute, call_execute_async,
+                         plugin_is_async)
+from scheduler import DEFAULT_RESOURCE_LIMITS
+from executors import (ExecutionHooks, SerialExecutor, ThreadExecutor, AsyncioExecutor, EXECUTORS,
+                       create_executor)
+from events import (EventBus, LogEvent, ProgressEvent, PluginStateEvent, RunCompletedEvent, RunStartedEvent,
+                    PluginStartedEvent, PluginFinishedEvent, PluginSkippedEvent, PluginsChangedEvent)
+from process_executor import ProcessPluginRunner, PluginWorkerPool
+from run_journal import RunJournal, get_default_journal_dir
+from result_cache import ResultCache, get_default_cache_dir
+from structured_log import StructuredRunLog, COMPRESSIONS, get_default_log_dir
+from shell_pool import ShellPool, set_default_pool
+from timing_db import TimingDatabase, ProgressEstimator
 
 
 # =============================================
@@ -39,13 +59,52 @@ fix_encoding()
 # 文件日志记录器
 # ======================================================
 class Logger(object):
-    def __init__(self, filename="Default.log", stream=sys.stdout):
+    """
+    把输出同时写入原始输出流和日志文件。
+    默认每次 write() 都同步写入 (文件按行缓冲)；async_mode 下 write() 只把消息放入内存队列，
+    由后台写入线程按 flush_bytes 大小或 flush_interval 时间批量写出，调用方几乎不被阻塞。
+    异步模式下程序退出前必须调用 drain()，确保队列中的日志全部落盘。
+    """
+
+    def __init__(self, filename="Default.log", stream=sys.stdout, async_mode=False,
+                 flush_interval=0.2, flush_bytes=64 * 1024, capacity=100000):
         if stream is None:
             print(f"警告: 原始输出流为None，日志将只写入文件: {filename}")
         self.terminal = stream
-        self.log = open(filename, "a", encoding='utf-8', buffering=1)
+        self.async_mode = async_mode
+        # 异步模式下由写入线程批量刷新，不需要按行缓冲
+        self.log = open(filename, "a", encoding='utf-8', buffering=-1 if async_mode else 1)
+
+        if async_mode:
+            self.flush_interval = flush_interval
+            self.flush_bytes = flush_bytes
+            self.capacity = capacity
+            # 队列与待写出字节数一起在 _lock 内更新，写入方之间、写入方与写入线程之间都不会丢失计数
+            self._lock = threading.Lock()
+            self._queue = deque()
+            self._pending_bytes = 0
+            self._wakeup = threading.Event()
+            self._idle = threading.Event()
+            self._idle.set()
+            self._writer = threading.Thread(target=self._writer_loop, name="LoggerWriter", daemon=True)
+            self._writer.start()
 
     def write(self, message):
+        if not self.async_mode:
+            self._write_through(message)
+            return
+        # 队列已满时短暂等待写入线程，而不是丢弃日志
+        while len(self._queue) >= self.capacity:
+            self._wakeup.set()
+            time.sleep(0.001)
+        with self._lock:
+            self._queue.append(message)
+            self._pending_bytes += len(message)
+            flush_now = self._pending_bytes >= self.flush_bytes
+        if flush_now:
+            self._wakeup.set()
+
+    def _write_through(self, message):
         if self.terminal is not None:
             try:
                 self.terminal.write(message)
@@ -56,7 +115,32 @@ class Logger(object):
         except Exception:
             pass
 
+    def _writer_loop(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            wrote = False
+            while True:
+                with self._lock:
+                    chunks = list(self._queue)
+                    self._queue.clear()
+                    self._pending_bytes = 0
+                if not chunks:
+                    break
+                self._write_through("".join(chunks))
+                wrote = True
+            if wrote:
+                self._flush_streams()
+            self._idle.set()
+
     def flush(self):
+        if self.async_mode:
+            # 不阻塞调用方，只提醒写入线程尽快写出
+            self._wakeup.set()
+            return
+        self._flush_streams()
+
+    def _flush_streams(self):
         if self.terminal is not None:
             try:
                 self.terminal.flush()
@@ -67,6 +151,19 @@ class Logger(object):
         except Exception:
             pass
 
+    def drain(self, timeout: float = 5.0) -> bool:
+        """等待队列中的日志全部写出 (异步模式)，返回是否在超时前完成"""
+        if not self.async_mode:
+            self._flush_streams()
+            return True
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self._idle.clear()
+            self._wakeup.set()
+            if self._idle.wait(max(0.0, deadline - time.monotonic())) and not self._queue:
+                return True
+        return False
+
     def __del__(self):
         try:
             if self.log:
@@ -81,7 +178,9 @@ class Logger(object):
 def parse_arguments():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='系统封装部署工具')
-    parser.add_argument('-auto', '--auto', action='store_true', help='全自动模式：顺序执行所有插件')
+    parser.add_argument('-auto', '--auto', nargs='?', const=True, default=False, metavar='QUERY',
+                        help='全自动模式：顺序执行所有插件；给出查询时只执行匹配的插件，'
+                             '例如 -auto "tag:registry and not tag:slow" (字段: name、tag、category、phase)。')
     parser.add_argument('-debug', '--debug', action='store_true',
                         help='调试模式：模拟执行但不实际运行插件（随机成功/失败）')
     parser.add_argument('-debug-success', '--debug-success', action='store_true',
@@ -95,9 +194,117 @@ def parse_arguments():
     parser.add_argument('-test', '--test', action='store_true', help='测试模式：从 "plugins_test" 目录加载插件。')
     parser.add_argument('-console', '--console', action='store_true',
                         help='(内部使用) 为GUI应用附加一个控制台以显示日志。')
+    parser.add_argument('-async-log', '--async-log', action='store_true',
+                        help='异步文件日志：自动模式下日志先写入内存队列，由后台线程批量写入文件，减少大量输出时的阻塞。')
+    parser.add_argument('-jsonl-log', '--jsonl-log', action='store_true',
+                        help='结构化日志：把每个事件以一行 JSON 写入 %%TEMP%%\\SysTools_RunLog_<时间>.jsonl，便于分析与汇总。')
+    parser.add_argument('-jsonl-max-mb', '--jsonl-max-mb', type=float, default=10,
+                        help='结构化日志文件超过多少MB后轮转 (默认: 10)。')
+    parser.add_argument('-jsonl-compress', '--jsonl-compress', choices=COMPRESSIONS, default='gzip',
+                        help='轮转后的结构化日志分段的压缩方式 (默认: gzip；zstd 需要安装 zstandard)。')
+    parser.add_argument('-executor', '--executor', choices=sorted(EXECUTORS), default=None,
+                        help='执行后端：serial (顺序，默认)、thread (线程池并行)、process (子进程隔离并行)、'
+                             'asyncio (事件循环)。')
+    parser.add_argument('-parallel', '--parallel', action='store_true',
+                        help='并行模式：按插件声明的依赖关系并行执行互不依赖的插件 (等同于 -executor thread)。')
+    parser.add_argument('-workers', '--workers', type=int, default=4,
+                        help='并行模式下同时执行的最大插件数 (默认: 4)。')
+    parser.add_argument('-resource-limit', '--resource-limit', action='append', default=[], metavar='TAG=N',
+                        help='并行/asyncio 模式下某个资源标签上同时运行的最大插件数，可重复指定 '
+                             '(默认: registry、disk、network-stack 均为 1)。')
+    parser.add_argument('-asyncio', '--asyncio', action='store_true',
+                        help='asyncio 模式：在同一个事件循环中并发执行插件，async 插件直接运行，'
+                             '同步插件交给线程池 (最多 -workers 个)，同样遵循依赖关系 (等同于 -executor asyncio)。')
+    parser.add_argument('-async-limit', '--async-limit', type=int, default=32,
+                        help='asyncio 模式下同时运行的最大插件数 (默认: 32)。')
+    parser.add_argument('-isolate', '--isolate', action='store_true',
+                        help='进程隔离模式：每个插件在受监督的子进程中执行，超时或停止时强制终止。')
+    parser.add_argument('-timeout', '--timeout', type=float, default=None,
+                        help='进程隔离模式下插件的默认超时时间 (秒)，插件自身的 timeout 属性优先。')
+    parser.add_argument('-pool', '--pool', action='store_true',
+                        help='常驻进程池：进程隔离模式下复用预先导入插件模块的工作进程 (隐含 -isolate)。')
+    parser.add_argument('-pool-max-tasks', '--pool-max-tasks', type=int, default=50,
+                        help='工作进程执行多少个任务后被回收 (默认: 50)。')
+    parser.add_argument('-pool-max-rss', '--pool-max-rss', type=float, default=512,
+                        help='工作进程常驻内存超过多少MB后被回收 (默认: 512)。')
+    parser.add_argument('-resume', '--resume', nargs='?', const='latest', default=None, metavar='RUN_ID',
+                        help='继续执行：重放上一次(或指定 RUN_ID 的)执行日志，只执行尚未成功完成的插件。')
+    parser.add_argument('-force', '--force', action='store_true',
+                        help='强制执行：忽略结果缓存和 check_applied()，即使插件已是最新也重新执行。')
+    parser.add_argument('-no-plugin-cache', '--no-plugin-cache', action='store_true',
+                        help='重建插件发现缓存：重新解析和导入全部插件文件，而不是使用缓存的元数据。')
+    parser.add_argument('-watch', '--watch', action='store_true',
+                        help='热重载 (GUI模式)：监视插件目录，插件文件被修改、新增或删除后自动重新加载变化的插件。')
+    parser.add_argument('-probe-timeout', '--probe-timeout', type=float, default=DEFAULT_PROBE_TIMEOUT,
+                        help=f'单个插件可用性检查的最长秒数，超时按不可用处理 (默认: {DEFAULT_PROBE_TIMEOUT:g})。')
     return parser.parse_args()
 
 
+# ======================================================
+# 单次执行的状态 (交给执行后端回调)
+# ======================================================
+class _PluginRun(ExecutionHooks):
+    """
+    一次执行的统计与回调。执行后端在调用 run() 的线程中串行回调 on_start / on_finish / on_skip，
+    因此 failed_plugins 等统计数据无需加锁。
+    """
+
+    def __init__(self, engine: 'CoreEngine', plugins: List[BasePlugin], estimator: ProgressEstimator):
+        self.engine = engine
+        self.total = len(plugins)
+        self.estimator = estimator
+        self.failed_plugins: List[Dict[str, Any]] = []
+        self._started_at: Dict[str, float] = {}
+
+    def run_plugin(self, plugin: BasePlugin) -> Dict[str, Any]:
+        return self.engine._run_plugin_tracked(plugin, self.engine._run_plugin)
+
+    def can_run_async(self, plugin: BasePlugin) -> bool:
+        # 进程隔离与调试模拟都是同步的，此时 async 插件也交给线程池
+        return (self.engine.process_runner is None and not self.engine._is_simulated_run()
+                and plugin_is_async(plugin))
+
+    async def run_plugin_async(self, plugin: BasePlugin) -> Dict[str, Any]:
+        return await self.engine._run_plugin_tracked_async(plugin)
+
+    def should_stop(self) -> bool:
+        return self.engine.stop_requested
+
+    def on_start(self, index: int, plugin: BasePlugin):
+        plugin_name = plugin.get_name()
+        self._started_at[plugin_name] = time.monotonic()
+        self.estimator.start(plugin_name)
+        self.engine.events.publish(PluginStartedEvent(plugin_name, index, self.total))
+        self.engine._log(f"开始执行 ({index + 1}/{self.total}): {plugin_name}")
+        self._notify()
+
+    def on_finish(self, index: int, plugin: BasePlugin, result: Dict[str, Any]):
+        plugin_name = plugin.get_name()
+        duration = time.monotonic() - self._started_at.pop(plugin_name, time.monotonic())
+        self.estimator.finish(plugin_name)
+        self.engine.events.publish(PluginFinishedEvent(plugin_name, result, duration))
+        self.engine._report_result(plugin_name, result, self.failed_plugins)
+        self._notify()
+
+    def on_skip(self, index: int, plugin: BasePlugin, reason: str):
+        plugin_name = plugin.get_name()
+        self.estimator.finish(plugin_name)
+        self.failed_plugins.append({'name': plugin_name, 'error': reason})
+        self.engine.events.publish(PluginSkippedEvent(plugin_name, reason))
+        if self.engine.journal is not None:
+            self.engine.journal.record(plugin_name, RunJournal.SKIPPED, {'success': False, 'error': reason})
+        self.engine._log(f"- {plugin_name} 已跳过: {reason}", "warning")
+        self._notify()
+
+    def _notify(self):
+        self.engine._emit_progress(self.estimator)
+        # 并行时“正在执行”窗口显示所有运行中的插件，全部结束后才关闭
+        if self.estimator.running:
+            self.engine.events.publish(PluginStateEvent(self.estimator.describe_running(), 'starting'))
+        else:
+            self.engine.events.publish(PluginStateEvent("", 'finished'))
+
+
 # ======================================================
 # 核心引擎类
 # ======================================================
@@ -105,7 +312,7 @@ class CoreEngine:
     """
     应用程序的核心引擎。
     负责所有非GUI的逻辑，包括插件管理、执行、日志记录和状态管理。
-    通过回调函数与GUI进行通信。
+    通过事件总线 (self.events) 与GUI进行通信。
     """
 
     def __init__(self):
@@ -117,6 +324,17 @@ class CoreEngine:
         self.is_running = False
         self.plugins: List[BasePlugin] = []
         self.stop_requested = False
+        self.cancel_token = CancellationToken()
+        self._active_estimator: Optional[ProgressEstimator] = None
+        # 引擎事件总线：GUI、自动模式窗口与命令行调试界面都通过订阅它获得日志、进度与结果
+        self.events = EventBus()
+        self.journal: Optional[RunJournal] = None
+        self.journal_dir = get_default_journal_dir()
+        self.result_cache = ResultCache(get_default_cache_dir())
+        self.timing_db = TimingDatabase(get_default_cache_dir())
+        self.run_id: Optional[str] = None
+        self.resource_limits = self._parse_resource_limits(self.args.resource_limit)
+        self.last_resource_waits: List[Any] = []
 
         # 3. 设置插件目录
         plugin_dir_name = "plugins_test" if self.args.test else "plugins"
@@ -126,21 +344,73 @@ class CoreEngine:
             base_dir = os.path.dirname(os.path.abspath(__file__))
         self.plugins_dir = os.path.join(base_dir, plugin_dir_name)
 
-        # 4. 初始化插件管理器
-        self.plugin_manager = PluginManager(self.plugins_dir)
+        # 4. 初始化插件管理器 (未修改的插件文件使用发现缓存中的元数据，不再解析或导入)
+        discovery_cache = DiscoveryCache(get_default_cache_dir())
+        if self.args.no_plugin_cache:
+            discovery_cache.clear()
+        # 插件字节码缓存在插件发现时启用；发布包中附带的构建时缓存首次运行时直接复用
+        bytecode_cache = BytecodeCache(get_default_cache_dir(), base_dir)
+        self.plugin_manager = PluginManager(self.plugins_dir, cache=discovery_cache, bytecode_cache=bytecode_cache)
+
+        # 4.1 执行后端 (GUI模式与自动模式共用)
+        self.executor = create_executor(self._resolve_executor_name(), workers=self.args.workers,
+                                        async_limit=self.args.async_limit, resource_limits=self.resource_limits,
+                                        log=self._log)
+
+        # 4.2 进程隔离 (process 执行后端，或与其他后端组合使用的 -isolate / -pool)
+        self.process_runner = None
+        self.worker_pool = None
+        if self.args.pool:
+            self.worker_pool = PluginWorkerPool(
+                size=min(self.executor.max_workers, self.args.workers),
+                max_tasks=self.args.pool_max_tasks,
+                max_rss_mb=self.args.pool_max_rss,
+                extra_paths=[base_dir, self.plugins_dir],
+                log=self._log
+            )
+        if self.args.isolate or self.args.pool or self.executor.isolated:
+            self.process_runner = ProcessPluginRunner(
+                should_stop=lambda: self.stop_requested,
+                log=self._log,
+                default_timeout=self.args.timeout,
+                extra_paths=[base_dir, self.plugins_dir],
+                pool=self.worker_pool
+            )
+
+        # 4.3 常驻 shell 会话池：插件通过 context.shell() 借用，每次执行结束时关闭
+        self.shell_pool = ShellPool()
+        set_default_pool(self.shell_pool)
+
+        # 4.4 插件可用性检查：加载插件后在后台并发进行，结果在有效期内供 GUI 与执行复用
+        self.availability = AvailabilityProber(timeout=self.args.probe_timeout)
+
+        # 4.5 插件热重载 (-watch)：执行期间发生的变化在执行结束后再重新加载
+        self.plugin_watcher: Optional[PluginWatcher] = None
+        self._reload_pending = False
 
         # 5. 设置文件日志 (仅在自动模式下)
         if self.is_auto_mode():
             self._setup_file_logger()
 
-        # 6. 定义与GUI通信的回调函数
-        # GUI需要实现这些回调函数，并将它们赋值给CoreEngine的实例
-        self.on_log_message = None  # (message: str, level: str) -> None
-        self.on_progress_update = None  # (progress: float, current: int, total: int) -> None
-        self.on_execution_complete = None  # (failed_plugins: list) -> None
-        self.on_auto_progress_update = None  # (current: int, total: int, plugin_name: str) -> None
-        self.on_auto_execution_complete = None  # (executed: int, total: int, failed_plugins: list) -> None
-        self.on_plugin_state_change = None  # (plugin_name: str, state: str) -> None
+        # 5.1 结构化 JSONL 日志 (可选，任何模式下均可使用)
+        self.structured_log: Optional[StructuredRunLog] = None
+        if self.args.jsonl_log:
+            self.structured_log = StructuredRunLog(get_default_log_dir(),
+                                                   max_bytes=int(self.args.jsonl_max_mb * 1024 * 1024),
+                                                   compression=self.args.jsonl_compress)
+            self.structured_log.attach(self.events)
+            print(f"结构化日志将被记录到: {self.structured_log.path}")
+
+    def _parse_resource_limits(self, specs: List[str]) -> Dict[str, int]:
+        """解析 -resource-limit TAG=N 参数，格式错误的项被忽略"""
+        limits = dict(DEFAULT_RESOURCE_LIMITS)
+        for spec in specs:
+            tag, _, value = spec.partition('=')
+            try:
+                limits[tag.strip()] = max(1, int(value))
+            except ValueError:
+                print(f"[WARNING] 忽略无效的资源上限参数: {spec} (应为 TAG=N)")
+        return limits
 
     def is_auto_mode(self) -> bool:
         """检查当前是否处于任何一种非GUI的自动/调试模式"""
@@ -150,15 +420,16 @@ class CoreEngine:
         """外部请求停止当前执行的任务。"""
         self._log("接收到外部停止请求...", "warning")
         self.stop_requested = True
+        # 同时通知正在运行、支持执行上下文的插件尽快退出
+        self.cancel_token.cancel()
 
-    def _log(self, message: str, level: str = "info"):
+    def _log(self, message: str, level: str = "info", plugin: Optional[str] = None):
         """
         内部日志方法。
-        如果注册了回调，则调用它；否则，打印到控制台。
+        始终打印到控制台，并作为 LogEvent 发布到事件总线。
         """
         print(f"[{level.upper()}] {message}")  # 始终在后台打印一份
-        if self.on_log_message:
-            self.on_log_message(message, level)
+        self.events.publish(LogEvent(message, level, plugin))
 
     def _setup_file_logger(self):
         """在自动化模式下，设置并启用文件日志记录"""
@@ -167,8 +438,8 @@ class CoreEngine:
             timestamp = time.strftime("%Y%m%d_%H%M%S")
             log_filename = f"SysTools_AutoRun_{timestamp}.log"
             log_filepath = os.path.join(log_dir, log_filename)
-            sys.stdout = Logger(log_filepath, sys.stdout)
-            sys.stderr = Logger(log_filepath, sys.stderr)
+            sys.stdout = Logger(log_filepath, sys.stdout, async_mode=self.args.async_log)
+            sys.stderr = Logger(log_filepath, sys.stderr, async_mode=self.args.async_log)
             print("===================================================")
             print(f"自动化模式已启动，日志将被记录到: {log_filepath}")
             print(f"启动时间: {time.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -180,7 +451,10 @@ class CoreEngine:
         """加载插件并更新内部列表"""
         self._log("开始加载插件...", "info")
         self.plugins = self.plugin_manager.discover_plugins()
+        self.result_cache.forget_code_hashes()
         self._log(f"插件管理器返回了 {len(self.plugins)} 个插件", "info")
+        # 不等待结果：GUI 逐行填入检查结果，执行时再取用 (正在检查的插件会等待其结果)
+        self.availability.probe(self.plugins)
 
         if not self.plugins:
             self._log("警告: 未找到任何功能插件！", "warning")
@@ -193,7 +467,52 @@ class CoreEngine:
         else:
             self._log(f"已加载 {len(self.plugins)} 个功能插件", "info")
 
-    # --- GUI模式执行逻辑 ---
+        if self.worker_pool is not None:
+            # 预热常驻工作进程，使其提前导入本次发现的插件模块
+            self.worker_pool.set_preload_plugins(self.plugins)
+            self.worker_pool.warm_up()
+
+    def reload_changed_plugins(self) -> Optional[PluginDiff]:
+        """
+        只重新加载发生变化的插件文件，并发布 PluginsChangedEvent。
+        未变化的插件保留原有实例和可用性检查结果；正在执行时推迟到本次执行结束后，此时返回 None。
+        """
+        if self.is_running:
+            if not self._reload_pending:
+                self._reload_pending = True
+                self._log("插件文件已变化，将在本次执行结束后重新加载", "info")
+            return None
+        self._reload_pending = False
+
+        diff = self.plugin_manager.refresh()
+        if not diff:
+            return diff
+        self.plugins = self.plugin_manager.plugins
+        self.result_cache.forget_code_hashes()
+        for plugin in diff.removed + diff.updated:
+            self.availability.invalidate(plugin)
+        self.availability.probe(diff.added + diff.updated)
+        if self.worker_pool is not None:
+            self.worker_pool.set_preload_plugins(self.plugins)
+
+        for title, plugins in (("新增", diff.added), ("更新", diff.updated), ("移除", diff.removed)):
+            if plugins:
+                self._log(f"已{title}插件: {', '.join(p.get_name() for p in plugins)}", "info")
+        self.events.publish(PluginsChangedEvent(self.plugins,
+                                                added=[p.get_name() for p in diff.added],
+                                                removed=[p.get_name() for p in diff.removed],
+                                                updated=[p.get_name() for p in diff.updated]))
+        return diff
+
+    def start_plugin_watcher(self):
+        """使用 -watch 时开始监视插件目录 (GUI模式)"""
+        if not self.args.watch or self.plugin_watcher is not None:
+            return
+        self.plugin_watcher = PluginWatcher(self.plugins_dir, self.reload_changed_plugins)
+        self.plugin_watcher.start()
+        self._log(f"正在监视插件目录 ({self.plugin_watcher.backend})，插件文件变化后将自动重新加载", "info")
+
+    # --- 执行逻辑 (GUI模式与自动模式共用) ---
 
     def execute_plugins(self, plugins_to_execute: List[BasePlugin]):
         """
@@ -206,137 +525,366 @@ class CoreEngine:
         self.is_running = True
         self.reboot_required = False
         self.stop_requested = False
-        thread = threading.Thread(target=self._execute_plugins_thread, args=(plugins_to_execute,))
+        self.cancel_token.reset()
+        thread = threading.Thread(target=self._run_plugins, args=(plugins_to_execute,))
         thread.daemon = True
         thread.start()
 
-    def _execute_plugins_thread(self, plugins_to_execute: List[BasePlugin]):
-        """在后台线程中执行插件 (GUI模式)"""
-        total_plugins = len(plugins_to_execute)
-        failed_plugins = []
-        debug_mode = self.args.debuggui or self.args.debuggui_success
-        debug_success_mode = self.args.debuggui_success
-
-        for i, plugin in enumerate(plugins_to_execute):
-            if self.on_progress_update:
-                progress = (i / total_plugins) * 100
-                self.on_progress_update(progress, i, total_plugins)
-
-            plugin_name = plugin.get_name()
-            if self.on_plugin_state_change:
-                self.on_plugin_state_change(plugin_name, 'starting')
-            if self.stop_requested:
-                self._log("执行被用户中断。", "warning")
-                # 将当前插件和所有后续插件都标记为失败
-                failed_plugins.append({'name': plugin.get_name(), 'error': '用户取消'})
-                # 可以选择将后续所有未执行的插件也加入失败列表
-                for p in plugins_to_execute[i+1:]:
-                    failed_plugins.append({'name': p.get_name(), 'error': '未执行 (用户取消)'})
-                break  # 跳出循环
-
-            self._log(f"开始执行: {plugin_name}")
-
-            try:
-                result = {}
-                if debug_mode:
-                    import re, random
-                    sleep_time = max(0.5, min(3.0, int(re.search(r'(\d+)', plugin_name).group(1)) * 0.3 if re.search(
-                        r'(\d+)', plugin_name) else 1.0))
-                    time.sleep(sleep_time)
-
-                    if debug_success_mode or random.random() > 0.3:
-                        result = {'success': True, 'message': f'GUI调试模式模拟成功 (耗时{sleep_time:.1f}秒)'}
-                    else:
-                        result = {'success': False, 'error': f'GUI调试模式模拟失败 (耗时{sleep_time:.1f}秒)'}
-                else:
-                    result = plugin.execute()
-
-                if result.get('reboot', False):
-                    self.reboot_required = True
-                    self._log(f"  - {plugin_name} 请求在完成后重启系统。", "warning")
-
-                if result.get('success', False):
-                    self._log(f"✓ {plugin_name} 执行成功", "success")
-                    if 'message' in result: self._log(f"    {result['message']}")
-                else:
-                    error_msg = result.get('error', '未知错误')
-                    self._log(f"✗ {plugin_name} 执行失败: {error_msg}", "error")
-                    failed_plugins.append({'name': plugin_name, 'error': error_msg})
-
-            except Exception as e:
-                self._log(f"✗ {plugin_name} 执行异常: {str(e)}", "error")
-                failed_plugins.append({'name': plugin_name, 'error': str(e)})
-            if self.on_plugin_state_change:
-                self.on_plugin_state_change(plugin_name, 'finished')
-        # 所有插件执行完毕
-        self.is_running = False
-        if self.on_execution_complete:
-            self.on_execution_complete(failed_plugins)
-
-    # --- 自动模式执行逻辑 ---
-
     def start_auto_execution(self):
         """
         启动自动执行模式。
         """
         print("进入自动执行模式" + (" (调试模式)" if (self.args.debug or self.args.debug_success) else ""))
         self.load_plugins()
+        self.journal = None
+
+        if isinstance(self.args.auto, str):
+            self._select_auto_plugins(self.args.auto)
 
         if not self.plugins:
             print("错误：未找到任何插件")
-            if self.on_auto_progress_update:
-                self.on_auto_progress_update(0, 0, "错误：未找到任何插件！")
+            self.events.publish(ProgressEvent(0, 0, 0, "错误：未找到任何插件！"))
             # 等待GUI显示错误后退出
             time.sleep(3)
             sys.exit(1)
 
-        print(f"找到 {len(self.plugins)} 个插件，开始顺序执行...")
-        thread = threading.Thread(target=self._auto_execute_plugins)
+        if self.args.resume:
+            self._prepare_resume()
+
+        print(f"找到 {len(self.plugins)} 个插件，开始执行 ({self.executor.describe()})...")
+        self.is_running = True
+        thread = threading.Thread(target=self._run_plugins, args=(self.plugins,))
         thread.daemon = True
         thread.start()
 
-    def _auto_execute_plugins(self):
-        """在后台线程中自动执行所有插件"""
-        total_plugins = len(self.plugins)
-        failed_plugins = []
+    def _select_auto_plugins(self, query: str):
+        """自动模式只执行匹配查询的插件；查询无效时报告错误并退出"""
+        try:
+            selected = self.plugin_manager.select_plugins(query)
+        except QueryError as e:
+            print(f"错误：无效的插件查询 \"{query}\": {e}")
+            self.events.publish(ProgressEvent(0, 0, 0, f"错误：无效的插件查询: {e}"))
+            time.sleep(3)
+            sys.exit(2)
+        print(f"查询 \"{query}\" 选中了 {len(selected)}/{len(self.plugins)} 个插件")
+        self.plugins = selected
 
-        for i, plugin in enumerate(self.plugins):
-            if self.on_auto_progress_update:
-                self.on_auto_progress_update(i, total_plugins, plugin.get_name())
+    def _run_plugins(self, plugins: List[BasePlugin]):
+        """
+        在后台线程中执行插件。GUI模式与自动模式走同一流程，插件的调度方式由执行后端决定。
+        执行后端抛出未处理的异常时仍会完成收尾并发布 RunCompletedEvent，否则界面会一直停在“执行中”
+        """
+        ticker = None
+        failed_plugins: List[Dict[str, Any]] = []
+        try:
+            self._begin_journal(plugins)
+            self.events.publish(RunStartedEvent(self.run_id or '', [p.get_name() for p in plugins], self.executor.name))
+            estimator = self._create_progress_estimator(plugins)
+            ticker = self._start_progress_ticker(estimator)
+            run = _PluginRun(self, plugins, estimator)
+            failed_plugins = run.failed_plugins
+
+            self._log(f"执行模式: {self.executor.describe()}")
+            self.executor.run(plugins, run)
+        except Exception as e:
+            self._log(f"执行过程中发生未处理的错误: {e}\n{traceback.format_exc()}", "error")
+            failed_plugins.append({'name': '执行引擎', 'error': str(e)})
+        finally:
+            if ticker is not None:
+                ticker.set()
+            self.shell_pool.shutdown()
+            if self.stop_requested:
+                self._log("执行被用户中断。", "warning")
+            self._report_resource_waits()
+            self._finish_journal(failed_plugins)
+            self.is_running = False
+            self.events.publish(RunCompletedEvent(failed_plugins, max(0, len(plugins) - len(failed_plugins)), len(plugins)))
+        if self._reload_pending:
+            self.reload_changed_plugins()
+
+    def _run_plugin(self, plugin: BasePlugin) -> Dict[str, Any]:
+        """执行单个插件并返回结果字典 (支持调试模拟)"""
+        if self._is_simulated_run():
+            return self._simulate_plugin(plugin)
+        try:
+            return self._call_execute(plugin)
+        except Exception as e:
+            return {'success': False, 'error': str(e), 'exception': True}
+
+    def _simulate_plugin(self, plugin: BasePlugin) -> Dict[str, Any]:
+        """调试模式：按插件名称中的编号模拟一段耗时，随机 (或总是) 返回成功"""
+        import re, random
+        plugin_name = plugin.get_name()
+        match = re.search(r'(\d+)', plugin_name)
+        sleep_time = max(0.5, min(3.0, int(match.group(1)) * 0.3 if match else 1.0))
+        time.sleep(sleep_time)
+
+        if self.args.debug_success or self.args.debuggui_success or random.random() > 0.3:
+            return {'success': True, 'message': f'调试模式模拟成功 (耗时{sleep_time:.1f}秒)'}
+        return {'success': False, 'error': f'调试模式模拟失败 (耗时{sleep_time:.1f}秒)'}
+
+    def _report_result(self, plugin_name: str, result: Dict[str, Any], failed_plugins: list):
+        """记录单个插件的执行结果"""
+        if result.get('reboot', False):
+            self.reboot_required = True
+            self._log(f"  - {plugin_name} 请求在完成后重启系统。", "warning")
+
+        if result.get('unavailable', False):
+            self._log(f"○ {plugin_name} 在当前系统上不可用，跳过执行", "warning")
+        elif result.get('up_to_date', False):
+            self._log(f"✓ {plugin_name} 已是最新，跳过执行", "success")
+            if 'message' in result: self._log(f"    {result['message']}")
+        elif result.get('success', False):
+            self._log(f"✓ {plugin_name} 执行成功", "success")
+            if 'message' in result: self._log(f"    {result['message']}")
+        elif result.get('exception', False):
+            self._log(f"✗ {plugin_name} 执行异常: {result.get('error')}", "error")
+            failed_plugins.append({'name': plugin_name, 'error': result.get('error')})
+        else:
+            error_msg = result.get('error', '未知错误')
+            self._log(f"✗ {plugin_name} 执行失败: {error_msg}", "error")
+            failed_plugins.append({'name': plugin_name, 'error': error_msg})
+
+    def _call_execute(self, plugin: BasePlugin) -> Dict[str, Any]:
+        """调用插件的 execute()；进程隔离模式下改为在受监督的子进程中执行"""
+        if not self.availability.is_available(plugin):
+            return self._unavailable_result()
+        up_to_date_result = self._check_up_to_date(plugin)
+        if up_to_date_result is not None:
+            return up_to_date_result
+
+        context = self._create_execution_context(plugin)
+        if self.process_runner is not None:
+            result = self.process_runner.run(plugin, context)
+        else:
+            result = call_execute(plugin, context)
+        self._remember_result(plugin, result)
+        return result
 
-            print(f"执行插件 {i + 1}/{total_plugins}: {plugin.get_name()}")
+    async def _call_execute_async(self, plugin: BasePlugin) -> Dict[str, Any]:
+        """
+        _call_execute() 的 asyncio 版本，在事件循环中直接运行插件的 execute_async()。
+        用户停止执行时，除了设置取消令牌，还会取消插件任务 (在其下一个 await 处抛出 CancelledError)。
+        """
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self.availability.is_available, plugin):
+            return self._unavailable_result()
+        # 幂等检查可能需要读取文件计算哈希，放到线程池中执行，避免阻塞事件循环
+        up_to_date_result = await loop.run_in_executor(None, self._check_up_to_date, plugin)
+        if up_to_date_result is not None:
+            return up_to_date_result
+
+        context = self._create_execution_context(plugin)
+        task = asyncio.ensure_future(call_execute_async(plugin, context))
+        while not task.done():
+            await asyncio.wait({task}, timeout=0.1)
+            if self.stop_requested and not task.done():
+                task.cancel()
+        try:
+            result = task.result()
+        except asyncio.CancelledError:
+            result = {'success': False, 'error': '用户取消', 'cancelled': True}
+        await loop.run_in_executor(None, self._remember_result, plugin, result)
+        return result
+
+    def _create_execution_context(self, plugin: BasePlugin) -> ExecutionContext:
+        """为插件创建执行上下文，其子进度会被节流后转发给当前模式的进度回调"""
+        plugin_name = plugin.get_name()
+        estimator = self._active_estimator
+
+        def on_progress(fraction: float, message: Optional[str]):
+            if estimator is None:
+                return
+            estimator.update(plugin_name, fraction, message)
+            self._emit_progress(estimator)
+            if message and not self.stop_requested:
+                self.events.publish(PluginStateEvent(estimator.describe_running(), 'starting'))
 
-            result = {}
-            if self.args.debug or self.args.debug_success:
-                import re, random
-                sleep_time = max(1.5, min(5.0, int(re.search(r'(\d+)', plugin.get_name()).group(1)) * 0.5 if re.search(
-                    r'(\d+)', plugin.get_name()) else 2.0))
-                time.sleep(sleep_time)
+        def on_log(message: str, level: str):
+            self._log(message, level, plugin=plugin_name)
 
-                if self.args.debug_success or random.random() > 0.3:
-                    result = {'success': True, 'message': f'调试模式模拟成功 (耗时{sleep_time:.1f}秒)'}
-                else:
-                    result = {'success': False, 'error': f'调试模式模拟失败 (耗时{sleep_time:.1f}秒)'}
-            else:
-                try:
-                    result = plugin.execute()
-                except Exception as e:
-                    result = {'success': False, 'error': str(e)}
+        return ExecutionContext(plugin_name, self.cancel_token, progress_callback=on_progress, log_callback=on_log,
+                                shell_pool=self.shell_pool)
 
-            if result.get('reboot', False):
-                self.reboot_required = True
-                print(f"  - {plugin.get_name()} 请求在完成后重启系统。")
+    @staticmethod
+    def _unavailable_result() -> Dict[str, Any]:
+        """插件在当前系统上不可用：跳过执行，不计为失败"""
+        return {'success': False, 'unavailable': True, 'error': '插件在当前系统上不可用'}
 
-            if result.get('success', False):
-                print(f"✓ {plugin.get_name()} 执行成功")
-            else:
-                error_msg = result.get('error', '未知错误')
-                failed_plugins.append({'name': plugin.get_name(), 'error': error_msg})
-                print(f"✗ {plugin.get_name()} 执行失败: {error_msg}")
+    # --- 幂等检查 (插件指纹与结果缓存) ---
+
+    def _check_up_to_date(self, plugin: BasePlugin) -> Optional[Dict[str, Any]]:
+        """插件目标状态已生效或命中结果缓存时，返回“已是最新”的结果字典，否则返回 None"""
+        if self.args.force:
+            return None
+        plugin_name = plugin.get_name()
+        try:
+            if plugin.check_applied():
+                return {'success': True, 'up_to_date': True, 'message': '目标状态已生效，跳过执行'}
+            fingerprint = plugin.fingerprint()
+        except Exception as e:
+            self._log(f"{plugin_name} 的幂等检查失败，将正常执行: {e}", "warning")
+            return None
+        if fingerprint is None:
+            return None
+
+        entry = self.result_cache.lookup(plugin, fingerprint)
+        if entry is None:
+            return None
+        last_run = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry.get('ts', 0)))
+        return {'success': True, 'up_to_date': True, 'message': f'已是最新 (上次成功执行于 {last_run})，跳过执行'}
+
+    def _remember_result(self, plugin: BasePlugin, result: Dict[str, Any]):
+        """成功执行后按执行后的指纹写入结果缓存"""
+        if not isinstance(result, dict) or not result.get('success', False):
+            return
+        try:
+            fingerprint = plugin.fingerprint()
+        except Exception:
+            return
+        if fingerprint is not None:
+            self.result_cache.store(plugin, fingerprint, result)
+
+    # --- 执行后端 ---
+
+    def _resolve_executor_name(self) -> str:
+        """-executor 优先；-asyncio / -parallel 是旧的快捷写法"""
+        if self.args.executor:
+            return self.args.executor
+        if self.args.asyncio:
+            return AsyncioExecutor.name
+        if self.args.parallel:
+            return ThreadExecutor.name
+        return SerialExecutor.name
+
+    def _report_resource_waits(self):
+        """输出各插件在各资源上的等待时间，帮助调整资源上限"""
+        self.last_resource_waits = self.executor.resource_wait_report()
+        if not self.last_resource_waits:
+            return
+        self._log("资源等待时间:")
+        for plugin_name, tag, seconds in self.last_resource_waits:
+            self._log(f"  {plugin_name} 等待 {tag}: {seconds:.1f}秒")
+
+    # --- 进度估算 (基于历史耗时加权) ---
+
+    def _create_progress_estimator(self, plugins: List[BasePlugin]) -> ProgressEstimator:
+        names = [p.get_name() for p in plugins]
+        expected = {} if self._is_simulated_run() else self.timing_db.median_durations(names)
+        estimator = ProgressEstimator(names, expected, self.executor.max_workers)
+        # 供执行上下文转发插件子进度使用
+        self._active_estimator = estimator
+        return estimator
+
+    def _emit_progress(self, estimator: ProgressEstimator):
+        """把加权进度和剩余时间发布到事件总线"""
+        self.events.publish(ProgressEvent(estimator.progress(), estimator.completed, estimator.total,
+                                          estimator.describe_running() or "等待中...", estimator.eta()))
+
+    def _start_progress_ticker(self, estimator: ProgressEstimator, interval: float = 1.0) -> threading.Event:
+        """插件运行期间定时刷新进度与ETA，避免长时间运行的插件让进度条停滞；set() 返回的事件即可停止"""
+        stop_event = threading.Event()
+
+        def tick():
+            while not stop_event.wait(interval):
+                if estimator.running:
+                    self._emit_progress(estimator)
+
+        threading.Thread(target=tick, name="ProgressTicker", daemon=True).start()
+        return stop_event
+
+    def get_slowest_plugins(self, limit: int = 10):
+        """查询历史上最慢的插件 [(名称, 中位耗时秒数, 记录次数)]"""
+        return self.timing_db.slowest_plugins(limit)
+
+    # --- 执行日志 (崩溃安全，支持 --resume) ---
+
+    def _is_simulated_run(self) -> bool:
+        """调试模拟执行不写入执行日志，以免 --resume 误把模拟成功当作真实完成"""
+        return bool(self.args.debug or self.args.debug_success or self.args.debuggui or self.args.debuggui_success)
+
+    def _begin_journal(self, plugins: List[BasePlugin]):
+        """为本次执行开启执行日志；--resume 时沿用已重放的日志"""
+        names = [p.get_name() for p in plugins]
+        if self._is_simulated_run():
+            self.journal = None
+            self.run_id = time.strftime('%Y%m%d_%H%M%S')
+            return
+        if self.journal is not None and self.args.resume and self.is_auto_mode():
+            self.journal.start_run(names, resumed=True)
+            self.run_id = self.journal.run_id
+            return
+        RunJournal.prune(self.journal_dir, RunJournal.MAX_JOURNALS - 1)
+        self.journal = RunJournal(self.journal_dir)
+        self.run_id = self.journal.run_id
+        self.journal.start_run(names, mode=RunJournal.MODE_AUTO if self.is_auto_mode() else RunJournal.MODE_GUI)
+        self._log(f"执行日志: {self.journal.path}")
+
+    def _run_plugin_tracked(self, plugin: BasePlugin, run_plugin) -> Dict[str, Any]:
+        """执行插件，在执行前后把状态写入执行日志，并记录实际耗时"""
+        self._track_plugin_start(plugin)
+        started_at = time.monotonic()
+        result = run_plugin(plugin)
+        self._track_plugin_finish(plugin, result, time.monotonic() - started_at)
+        return result
+
+    async def _run_plugin_tracked_async(self, plugin: BasePlugin) -> Dict[str, Any]:
+        """_run_plugin_tracked() 的协程版本，用于直接在事件循环中运行的 async 插件"""
+        self._track_plugin_start(plugin)
+        started_at = time.monotonic()
+        try:
+            result = await self._call_execute_async(plugin)
+        except Exception as e:
+            result = {'success': False, 'error': str(e), 'exception': True}
+        self._track_plugin_finish(plugin, result, time.monotonic() - started_at)
+        return result
+
+    def _track_plugin_start(self, plugin: BasePlugin):
+        if self.journal is not None:
+            self.journal.record(plugin.get_name(), RunJournal.STARTED)
+
+    def _track_plugin_finish(self, plugin: BasePlugin, result: Dict[str, Any], duration: float):
+        plugin_name = plugin.get_name()
+        if self._counts_toward_timing(result) and not self._is_simulated_run():
+            self.timing_db.record(self.run_id or '', plugin_name, duration, result.get('success', False))
+        if self.journal is not None:
+            state = RunJournal.SUCCEEDED if result.get('success', False) else RunJournal.FAILED
+            self.journal.record(plugin_name, state, result)
+
+    @staticmethod
+    def _counts_toward_timing(result: Dict[str, Any]) -> bool:
+        """
+        结果的耗时是否计入耗时数据库：“已是最新”、不可用而跳过的插件几乎不耗时，被取消的插件只执行了一部分，
+        计入后会把历史中位耗时拉低，使进度估算的剩余时间偏短
+        """
+        return not any(result.get(key, False) for key in ('up_to_date', 'unavailable', 'cancelled'))
 
-        # 执行完成
-        if self.on_auto_execution_complete:
-            self.on_auto_execution_complete(len(self.plugins) - len(failed_plugins), total_plugins, failed_plugins)
+    def _finish_journal(self, failed_plugins: list):
+        if self.journal is not None:
+            self.journal.finish_run(len(failed_plugins))
+
+    def _prepare_resume(self):
+        """
+        重放最近一次自动模式运行的执行日志，从待执行列表中移除已成功完成的插件。
+        上次运行已全部成功时 (例如重启后继续) 只执行日志中没有的插件；没有任何执行日志时才执行全部插件
+        """
+        run_id = None if self.args.resume == 'latest' else self.args.resume
+        journal = RunJournal.find_resumable(self.journal_dir, run_id)
+        if journal is None:
+            print("未找到可继续的执行记录，将执行全部插件。")
+            return
+
+        completed = journal.completed_plugins()
+        remaining = [p for p in self.plugins if p.get_name() not in completed]
+        print(f"继续执行 {journal.run_id}: 跳过 {len(self.plugins) - len(remaining)} 个已完成的插件，"
+              f"剩余 {len(remaining)} 个")
+        for plugin in self.plugins:
+            if plugin.get_name() in completed:
+                print(f"  - 已完成，跳过: {plugin.get_name()}")
+        if not remaining:
+            print("上次运行的插件均已成功完成，没有需要继续执行的插件。")
+        self.plugins = remaining
+        self.journal = journal
 
     # --- 清理与自毁逻辑 ---
 
@@ -358,7 +906,21 @@ class CoreEngine:
             print("用户选择立即重启。将在5秒后重启计算机。")
             os.system("shutdown /r /t 5")
 
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown()
+        if self.plugin_watcher is not None:
+            self.plugin_watcher.stop()
+        self.availability.shutdown()
+        self.shell_pool.shutdown()
+
         print("程序即将退出...")
+        # os._exit 不会等待后台线程，先把异步订阅者排队中的事件投递完，再把日志队列写入文件
+        self.events.close(timeout=2.0)
+        if self.structured_log is not None:
+            self.structured_log.close()
+        for stream in (sys.stdout, sys.stderr):
+            if isinstance(stream, Logger):
+                stream.drain()
         os._exit(0)
 
     def _schedule_post_reboot_cleanup(self) -> bool:
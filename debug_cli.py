@@ -2,9 +2,13 @@ import sys
 import os
 import time
 import subprocess
+import multiprocessing
 from core import CoreEngine
+from events import ASYNC, LogEvent, ProgressEvent, RunCompletedEvent
 from plugin_base import BasePlugin
 from typing import List, Dict
+from timing_db import format_duration
+from plugin_registry import QueryError
 
 
 class CommandLineUI:
@@ -26,15 +30,11 @@ class CommandLineUI:
         self.core = CoreEngine()
         self.plugins: List[BasePlugin] = []
 
-        self.core.on_log_message = self.handle_log_message
-        self.core.on_progress_update = self.handle_progress_update
-        self.core.on_execution_complete = self.handle_execution_complete
+        self.core.events.subscribe(self.handle_core_event, mode=ASYNC, name="CommandLineUI")
 
         # 【修改】检查启动参数，如果是自动模式，则不进入交互界面
         if self.core.is_auto_mode():
             print("检测到自动模式参数，核心引擎将自动执行。")
-            # 在自动模式下，我们只需要一个简单的回调来显示最终结果
-            self.core.on_auto_execution_complete = self.handle_auto_mode_complete
             self.core.start_auto_execution()
             # 保持主线程存活以等待后台线程完成
             while self.core.is_running:
@@ -49,18 +49,32 @@ class CommandLineUI:
 
     # --- 回调处理函数 ---
 
+    def handle_core_event(self, event):
+        """订阅引擎事件流，分发给对应的处理函数"""
+        if isinstance(event, LogEvent):
+            self.handle_log_message(event.message, event.level)
+        elif isinstance(event, ProgressEvent):
+            self.handle_progress_update(event.progress, event.completed, event.total, event.eta)
+        elif isinstance(event, RunCompletedEvent):
+            if self.core.is_auto_mode():
+                # 在自动模式下，我们只需要简单地显示最终结果
+                self.handle_auto_mode_complete(event.executed, event.total, event.failed_plugins)
+            else:
+                self.handle_execution_complete(event.failed_plugins)
+
     def handle_log_message(self, message: str, level: str):
         timestamp = time.strftime("%H:%M:%S")
         sys.stdout.write("\r" + " " * 80 + "\r")
         sys.stdout.flush()
         print(f"[{timestamp}][{level.upper()}] {message}")
 
-    def handle_progress_update(self, progress: float, current: int, total: int):
+    def handle_progress_update(self, progress: float, current: int, total: int, eta: float = None):
         bar_length = 40
         filled_len = int(round(bar_length * progress / 100))
         bar = '█' * filled_len + '-' * (bar_length - filled_len)
         percent_str = f"{progress:.1f}%"
-        sys.stdout.write(f"\r进度: [{bar}] {percent_str} ({current}/{total})")
+        eta_str = f" 剩余约 {format_duration(eta)}" if eta is not None else ""
+        sys.stdout.write(f"\r进度: [{bar}] {percent_str} ({current}/{total}){eta_str}")
         sys.stdout.flush()
 
     def handle_execution_complete(self, failed_plugins: list):
@@ -120,7 +134,11 @@ class CommandLineUI:
         print("\n--- 操作命令 ---")
         print("  a                - 执行所有插件")
         print("  e <编号...>      - 执行选中的插件 (例如: e 6 7)")
+        print("  f <查询>         - 执行匹配查询的插件 (例如: f tag:registry and not tag:slow)")
         print("  r                - 重新加载插件")
+        print("  s                - 显示历史上最慢的插件")
+        print("  w                - 显示上次并行执行的资源等待时间")
+        print("  m                - 显示插件模块的导入耗时")
         print("  c                - 以指定的命令行参数重启")
         print("  q                - 退出程序")
         print("=" * 40)
@@ -147,6 +165,15 @@ class CommandLineUI:
             elif command == 'r':
                 self.load_plugins()
 
+            elif command == 's':
+                self.show_slowest_plugins()
+
+            elif command == 'w':
+                self.show_resource_waits()
+
+            elif command == 'm':
+                self.show_import_times()
+
             elif command == 'a':
                 if not self.plugins:
                     print("没有可执行的插件。");
@@ -156,6 +183,9 @@ class CommandLineUI:
                 self.core.execute_plugins(self.plugins)
                 while self.core.is_running: time.sleep(0.1)
 
+            elif command == 'f':
+                self.handle_query(user_input[len(parts[0]):].strip())
+
             elif command == 'e':
                 if not self.plugins:
                     print("没有可选择的插件。");
@@ -187,6 +217,62 @@ class CommandLineUI:
                 print(f"无效的命令: '{command}'");
                 time.sleep(1.5)
 
+    def handle_query(self, query: str):
+        """执行匹配查询的插件；没有给出查询时列出可用的标签、分类和阶段"""
+        registry = self.core.plugin_manager.registry
+        if not query:
+            print("\n--- 插件查询 ---")
+            print("  字段: name、tag、category、phase；可用 and / or / not 与括号组合，值中可使用通配符 *")
+            print(f"  标签: {', '.join(registry.tags()) or '(无)'}")
+            print(f"  分类: {', '.join(registry.categories()) or '(无)'}")
+            print(f"  阶段: {', '.join(str(p) for p in registry.phases()) or '(无)'}")
+            input("\n按 Enter 键返回主菜单...")
+            return
+        try:
+            plugins_to_run = registry.select(query)
+        except QueryError as e:
+            print(f"无效的查询: {e}")
+            time.sleep(2)
+            return
+        if not plugins_to_run:
+            print("没有匹配查询的插件。")
+            time.sleep(1.5)
+            return
+        print(f"\n即将执行匹配查询的 {len(plugins_to_run)} 个插件:")
+        for plugin in plugins_to_run:
+            print(f"  - {plugin.get_name()}")
+        self.core.execute_plugins(plugins_to_run)
+        while self.core.is_running: time.sleep(0.1)
+
+    def show_slowest_plugins(self):
+        """显示耗时数据库中历史中位耗时最高的插件"""
+        slowest = self.core.get_slowest_plugins(limit=10)
+        print("\n--- 历史上最慢的插件 (最近若干次执行的中位耗时) ---")
+        if not slowest:
+            print("  暂无耗时记录。")
+        for i, (name, median, runs) in enumerate(slowest):
+            print(f"  [{i + 1}] {name}: {format_duration(median)} (共 {runs} 次记录)")
+        input("\n按 Enter 键返回主菜单...")
+
+    def show_resource_waits(self):
+        """显示上一次并行执行中各插件因资源被占用而等待的时间"""
+        print("\n--- 上次并行执行的资源等待时间 ---")
+        if not self.core.last_resource_waits:
+            print("  没有插件因资源被占用而等待。")
+        for plugin_name, tag, seconds in self.core.last_resource_waits:
+            print(f"  {plugin_name} 等待 {tag}: {seconds:.1f}秒")
+        input("\n按 Enter 键返回主菜单...")
+
+    def show_import_times(self):
+        """显示本次发现以来各插件模块的导入耗时 (包括按需导入的模块)"""
+        import_times = self.core.plugin_manager.import_times
+        print("\n--- 插件模块的导入耗时 ---")
+        if not import_times:
+            print("  还没有导入任何插件模块 (插件都来自清单或发现缓存，尚未按需加载)。")
+        for module_name, seconds in sorted(import_times.items(), key=lambda item: item[1], reverse=True):
+            print(f"  {module_name}: {seconds * 1000:.1f} 毫秒")
+        input("\n按 Enter 键返回主菜单...")
+
     def handle_restart_with_args(self):
         """【新增】处理带参数重启的逻辑"""
         print("\n--- 选择一个命令行模式以重启 ---")
@@ -228,6 +314,7 @@ class CommandLineUI:
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     # 检查是否有自动模式参数，如果有，直接启动核心逻辑
     # 否则，启动交互式UI
     ui = CommandLineUI()
\ No newline at end of file
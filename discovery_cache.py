@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import time
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from result_cache import hash_file
+
+
+class DiscoveryCache:
+    """
+    插件发现结果的持久缓存。
+    每个插件文件记录一项：文件的修改时间、大小、内容哈希，以及发现时得到的插件元数据
+    (清单内容，或没有清单的模块在导入后记录的名称、描述与调度元数据) 和导入错误。
+    修改时间与大小都未变化时直接使用缓存，不读取文件；任一变化时再比较内容哈希，
+    内容相同 (如文件被复制或 touch) 只更新记录的修改时间，内容不同才重新解析或导入。
+    导入错误还与记录时的 Python 解释器有关 (如语法错误)，换用其他解释器或版本后缓存的错误失效。
+    """
+
+    FILE_NAME = "plugin_discovery.json"
+    # 2: 导入后记录的元数据增加了 tags / category / phase
+    VERSION = 2
+    # 文件在记录前这么多秒内被修改时，同一时间戳内可能还有后续写入，下次查询时仍核对内容哈希
+    RACY_WINDOW = 2.0
+
+    def __init__(self, cache_dir: str):
+        self.path = os.path.join(cache_dir, self.FILE_NAME)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get('version') == self.VERSION:
+                self._entries = data.get('files', {})
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save(self):
+        """有变化时原子地写回缓存文件 (先写临时文件再替换)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': self.VERSION, 'files': self._entries}
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    # json.dumps 使用 C 实现的编码器，比逐块写入的 json.dump 快得多
+                    f.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                print(f"[WARNING] 保存插件发现缓存失败: {e}")
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+
+    def lookup(self, path: str) -> Optional[Dict[str, Any]]:
+        """返回文件仍然有效的缓存项 ('plugins' 为元数据列表，'error' 为导入错误)，失效或不存在时返回 None"""
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            entry = None
+        if entry is None or (entry['error'] and entry.get('interpreter') != _interpreter()):
+            self.misses += 1
+            return None
+
+        unchanged = entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size
+        racy = entry['recorded'] - stat.st_mtime_ns / 1e9 < self.RACY_WINDOW
+        if not unchanged or racy:
+            if hash_file(key) != entry['sha256']:
+                self.misses += 1
+                return None
+            if not unchanged:
+                with self._lock:
+                    entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size, recorded=time.time())
+                    self._dirty = True
+        self.hits += 1
+        return entry
+
+    def store(self, path: str, source: str, plugins: List[Dict[str, Any]], error: Optional[str] = None):
+        """
+        记录文件的发现结果。source 为 'manifest' (静态清单) 或 'import' (导入后记录)；
+        元数据无法保存为 JSON 时不缓存该文件，下次仍重新发现。
+        """
+        key = os.path.abspath(path)
+        try:
+            stat = os.stat(key)
+            json.dumps(plugins)
+        except (OSError, TypeError, ValueError):
+            return
+        sha256 = hash_file(key)
+        if sha256 is None:
+            return
+        with self._lock:
+            self._entries[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha256,
+                                  'recorded': time.time(), 'source': source, 'plugins': plugins, 'error': error}
+            if error:
+                self._entries[key]['interpreter'] = _interpreter()
+            self._dirty = True
+
+    def prune(self, directory: str, keep: Iterable[str]):
+        """删除 directory 下已不存在 (不在 keep 中) 的文件的缓存项"""
+        directory = os.path.join(os.path.abspath(directory), "")
+        keep = {os.path.abspath(path) for path in keep}
+        with self._lock:
+            stale = [key for key in self._entries if key.startswith(directory) and key not in keep]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+
+def _interpreter() -> str:
+    """记录导入错误时的解释器与版本"""
+    return f"{sys.executable}|{sys.version}"
@@ -0,0 +1,317 @@
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+# ======================================================
+# 引擎事件
+# GUI、自动模式的浮动窗口、命令行调试界面以及日志/统计类的消费者都通过
+# 订阅 EventBus 上的这些事件获得执行状态，不再各自向 CoreEngine 注册一组回调函数。
+# 每个事件都带有发布时的单调时钟时间 timestamp (time.monotonic())，异步订阅者据此还原事件的实际发生时间。
+# ======================================================
+
+def _now() -> float:
+    return time.monotonic()
+
+
+@dataclass
+class LogEvent:
+    """一条日志消息；由插件通过执行上下文输出时 plugin 为插件名称"""
+    message: str
+    level: str = "info"
+    plugin: Optional[str] = None
+    timestamp: float = field(default_factory=_now, repr=False, compare=False)
+
+
+@dataclass
+class RunStartedEvent:
+    """一次执行开始"""
+    run_id: str
+    plugins: List[str] = field(default_factory=list)
+    executor: str = ""
+    timestamp: float = field(default_factory=_now, repr=False, compare=False)
+
+    critical = True
+
+
+@dataclass
+class PluginStartedEvent:
+    """单个插件开始执行"""
+    plugin_name: str
+    index: int = 0
+    total: int = 0
+    timestamp: float = field(default_factory=_now, repr=False, compare=False)
+
+
+@dataclass
+class PluginFinishedEvent:
+    """单个插件执行结束 (无论成功与否)；duration 为实际耗时秒数"""
+    plugin_name: str
+    result: Dict[str, Any] = field(default_factory=dict)
+    duration: float = 0.0
+    timestamp: float = field(default_factory=_now, repr=False, compare=False)
+
+
+@dataclass
+class PluginSkippedEvent:
+    """插件未被执行 (依赖失败、循环依赖或用户取消)"""
+    plugin_name: str
+    reason: str = ""
+    timestamp: float = field(default_factory=_now, repr=False, compare=False)
+
+
+@dataclass
+class ProgressEvent:
+    """
+    执行进度。
+    progress 为基于历史耗时加权的 0~100 百分比；current 是正在运行的插件 (及其当前步骤) 的说明文字。
+    """
+    progress: float
+    completed: int
+    total: int
+    current: str = ""
+    eta: Optional[float] = None
+    timestamp: float = field(default_factory=_now, repr=False, compare=False)
+
+    # 异步订阅者只需要最新的进度，队列中尚未投递的旧进度事件会被新的替换
+    coalesce_key = "progress"
+
+
+@dataclass
+class PluginStateEvent:
+    """正在运行的插件发生变化。state 为 'starting' (plugin_name 为全部运行中插件的说明) 或 'finished' (已没有运行中的插件)"""
+    plugin_name: str
+    state: str
+    timestamp: float = field(default_factory=_now, repr=False, compare=False)
+
+    coalesce_key = "plugin_state"
+
+
+@dataclass
+class RunCompletedEvent:
+    """一次执行全部结束"""
+    failed_plugins: List[Dict[str, Any]] = field(default_factory=list)
+    executed: int = 0
+    total: int = 0
+    timestamp: float = field(default_factory=_now, repr=False, compare=False)
+
+    # 队列已满时也不会被丢弃
+    critical = True
+
+
+@dataclass
+class PluginsChangedEvent:
+    """
+    插件文件变化后增量重新加载的结果。
+    plugins 为重新加载后的完整插件列表；added / removed / updated 为发生变化的插件名称，其余插件的实例保持不变。
+    """
+    plugins: List[Any] = field(default_factory=list)
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    timestamp: float = field(default_factory=_now, repr=False, compare=False)
+
+    critical = True
+
+
+SYNC = "sync"
+ASYNC = "async"
+
+# 异步队列已满时的处理方式
+DROP_OLDEST = "drop_oldest"   # 丢弃最早的普通事件；没有可以丢弃的事件时发布方等待
+BLOCK = "block"               # 从不丢弃：发布方等待队列腾出空间 (用于日志文件等必须完整的订阅者)
+
+
+class _Coalesced:
+    """队列中的占位项，投递时取该键最新的事件"""
+    __slots__ = ("key",)
+
+    def __init__(self, key: str):
+        self.key = key
+
+
+class Subscription:
+    """
+    事件总线上的一个订阅者。
+    同步订阅者在发布事件的线程中直接处理事件；异步订阅者拥有独立的有界队列和投递线程，
+    处理缓慢时不会拖慢发布事件的执行线程。
+    异步队列中，声明了 coalesce_key 的高频事件 (如进度) 只保留最新的一条；
+    队列已满时按 overflow 处理：DROP_OLDEST 丢弃最早的普通事件 (critical 事件从不丢弃)，丢弃数量记录在 dropped 中，
+    队列中只剩不能丢弃的事件时发布方等待；BLOCK 从不丢弃，发布方总是等待投递线程取走积压的事件。
+    """
+
+    def __init__(self, bus: 'EventBus', callback: Callable[[Any], None], event_types: Optional[Tuple[type, ...]],
+                 mode: str, max_queue: int, batch: bool, name: str, overflow: str = DROP_OLDEST):
+        if mode not in (SYNC, ASYNC):
+            raise ValueError(f"未知的事件投递方式: {mode}")
+        if overflow not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"未知的队列溢出处理方式: {overflow}")
+        self.bus = bus
+        self.callback = callback
+        self.event_types = event_types
+        self.mode = mode
+        self.max_queue = max(1, int(max_queue))
+        self.batch = batch
+        self.name = name
+        self.overflow = overflow
+        self.dropped = 0
+
+        self._queue: Deque[Any] = deque()
+        self._latest: Dict[str, Any] = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        if mode == ASYNC:
+            self._thread = threading.Thread(target=self._dispatch_loop, name=f"EventBus-{name}", daemon=True)
+            self._thread.start()
+
+    def accepts(self, event: Any) -> bool:
+        return self.event_types is None or isinstance(event, self.event_types)
+
+    def deliver(self, event: Any):
+        if self.mode == SYNC:
+            self._invoke([event])
+            return
+        key = getattr(event, 'coalesce_key', None)
+        with self._cond:
+            if self._closed:
+                return
+            if key is not None:
+                if key not in self._latest:
+                    self._queue.append(_Coalesced(key))
+                self._latest[key] = event
+            else:
+                if len(self._queue) >= self.max_queue and not (self.overflow == DROP_OLDEST and self._drop_oldest()):
+                    self._wait_for_room()
+                    if self._closed:
+                        return
+                self._queue.append(event)
+            self._cond.notify()
+
+    def _drop_oldest(self) -> bool:
+        """丢弃最早的一个普通事件，队列中没有可以丢弃的事件时返回 False (调用方持有 self._cond)"""
+        for i, item in enumerate(self._queue):
+            if not isinstance(item, _Coalesced) and not getattr(item, 'critical', False):
+                del self._queue[i]
+                self.dropped += 1
+                return True
+        return False
+
+    def _wait_for_room(self):
+        """等待投递线程取走积压的事件 (调用方持有 self._cond)"""
+        if threading.current_thread() is self._thread:
+            # 订阅者在处理事件时又发布了事件：投递线程不能等待自己，这一次允许超出容量
+            return
+        self._cond.wait_for(lambda: len(self._queue) < self.max_queue or self._closed)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                # 一次取出当前积压的全部事件，批量投递
+                events = []
+                while self._queue:
+                    item = self._queue.popleft()
+                    if isinstance(item, _Coalesced):
+                        item = self._latest.pop(item.key)
+                    events.append(item)
+                self._busy = True
+                # 唤醒因队列已满而等待的发布方
+                self._cond.notify_all()
+            try:
+                self._invoke(events)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _invoke(self, events: List[Any]):
+        batches = [events] if self.batch else [[event] for event in events]
+        for batch in batches:
+            try:
+                self.callback(batch if self.batch else batch[0])
+            except Exception as e:
+                print(f"[WARNING] 事件订阅者 {self.name} 处理 {type(batch[0]).__name__} 失败: {e}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待异步队列中的事件全部投递完毕，返回是否在超时前完成"""
+        if self.mode == SYNC or threading.current_thread() is self._thread:
+            return True
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """停止接收新事件，投递完已排队的事件后结束投递线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def unsubscribe(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    引擎事件总线。
+    任意数量的订阅者通过 subscribe() 注册，可以只订阅指定类型的事件，并选择同步或异步投递：
+    同步订阅者在发布事件的线程中依次处理事件；异步订阅者各自在独立线程中批量处理，互不影响，也不拖慢引擎。
+    需要在 GUI 线程处理事件的订阅者应自行通过 root.after 转交。
+    单个订阅者抛出的异常不会影响其他订阅者和引擎。
+    """
+
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[Any], None], event_types: Optional[Tuple[type, ...]] = None,
+                  mode: str = SYNC, max_queue: int = 1000, batch: bool = False,
+                  name: Optional[str] = None, overflow: str = DROP_OLDEST) -> Subscription:
+        """
+        注册订阅者。
+        event_types: 只接收这些类型的事件 (None 表示全部)；
+        mode: SYNC 或 ASYNC；max_queue: 异步队列的容量；
+        batch: 为真时 callback 每次收到一个事件列表 (异步模式下为一次积压的全部事件)；
+        overflow: 异步队列已满时的处理方式，DROP_OLDEST 或 BLOCK (从不丢弃事件)。
+        """
+        subscription = Subscription(self, callback, tuple(event_types) if event_types else None, mode,
+                                    max_queue, batch, name or getattr(callback, '__qualname__', repr(callback)),
+                                    overflow)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+        subscription.close()
+
+    def publish(self, event: Any):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.accepts(event):
+                subscription.deliver(event)
+
+    def flush(self, timeout: Optional[float] = None):
+        """等待所有异步订阅者处理完已发布的事件"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.flush(timeout)
+
+    def close(self, timeout: Optional[float] = 2.0):
+        """程序退出前调用：投递完所有排队中的事件并结束投递线程"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            self._subscriptions.clear()
+        for subscription in subscriptions:
+            subscription.close(timeout)
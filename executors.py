@@ -0,0 +1,163 @@
+import abc
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from plugin_base import BasePlugin
+from scheduler import PluginScheduler
+
+
+class ExecutionHooks:
+    """
+    执行后端与引擎之间的接口，由引擎为每次执行创建。
+    执行后端只负责决定插件“怎样被调度”，插件的实际调用、结果统计、日志与进度都通过这些方法交还给引擎。
+    """
+
+    def run_plugin(self, plugin: BasePlugin) -> Dict[str, Any]:
+        """同步执行单个插件并返回结果字典 (可能在工作线程中调用)"""
+        raise NotImplementedError
+
+    def can_run_async(self, plugin: BasePlugin) -> bool:
+        """插件能否直接在事件循环中以协程方式执行"""
+        return False
+
+    async def run_plugin_async(self, plugin: BasePlugin) -> Dict[str, Any]:
+        """以协程方式执行单个插件 (仅在 can_run_async() 为真时调用)"""
+        raise NotImplementedError
+
+    def on_start(self, index: int, plugin: BasePlugin):
+        pass
+
+    def on_finish(self, index: int, plugin: BasePlugin, result: Dict[str, Any]):
+        pass
+
+    def on_skip(self, index: int, plugin: BasePlugin, reason: str):
+        pass
+
+    def should_stop(self) -> bool:
+        return False
+
+
+class Executor(metaclass=abc.ABCMeta):
+    """
+    插件执行后端的基类。
+    GUI模式与自动模式共用同一个执行后端，on_start / on_finish / on_skip 总是在调用 run() 的线程中串行回调。
+    """
+
+    name = ""
+    # 为真时，引擎在受监督的子进程中执行插件 (见 process_executor.ProcessPluginRunner)
+    isolated = False
+
+    def __init__(self, max_workers: int = 1, resource_limits: Optional[Dict[str, int]] = None,
+                 log: Optional[Callable[[str, str], None]] = None):
+        self.max_workers = max(1, int(max_workers))
+        self.resource_limits = resource_limits
+        self._log = log or (lambda message, level="info": print(f"[{level.upper()}] {message}"))
+        self._last_scheduler: Optional[PluginScheduler] = None
+
+    @abc.abstractmethod
+    def run(self, plugins: List[BasePlugin], hooks: ExecutionHooks):
+        """执行全部插件，直到每个插件都完成或被跳过后返回"""
+        pass
+
+    def describe(self) -> str:
+        """用于日志的执行模式说明"""
+        return f"{self.name} (最大并发数: {self.max_workers})"
+
+    def resource_wait_report(self) -> List[Tuple[str, str, float]]:
+        """上一次执行中各插件在各资源上的等待时间 [(插件名称, 资源标签, 秒数)]"""
+        if self._last_scheduler is None:
+            return []
+        return self._last_scheduler.resource_wait_report()
+
+    def _create_scheduler(self, plugins: List[BasePlugin]) -> PluginScheduler:
+        self._last_scheduler = PluginScheduler(plugins, max_workers=self.max_workers, log=self._log,
+                                               resource_limits=self.resource_limits)
+        return self._last_scheduler
+
+
+class ThreadExecutor(Executor):
+    """按依赖关系与资源标签，在有界线程池中并行执行插件"""
+
+    name = "thread"
+
+    def describe(self) -> str:
+        return f"线程池并行 (最大并发数: {self.max_workers})"
+
+    def run(self, plugins: List[BasePlugin], hooks: ExecutionHooks):
+        scheduler = self._create_scheduler(plugins)
+        scheduler.run(hooks.run_plugin, on_start=hooks.on_start, on_finish=hooks.on_finish,
+                      on_skip=hooks.on_skip, should_stop=hooks.should_stop)
+
+
+class SerialExecutor(ThreadExecutor):
+    """
+    逐个执行插件 (默认模式)：与线程池模式使用同一个调度器，但并发数固定为 1。
+    插件按文件名顺序执行，depends_on 声明的依赖先于依赖方执行，依赖失败的插件被跳过
+    """
+
+    name = "serial"
+
+    def __init__(self, max_workers: int = 1, resource_limits: Optional[Dict[str, int]] = None,
+                 log: Optional[Callable[[str, str], None]] = None):
+        super().__init__(1, resource_limits, log)
+
+    def describe(self) -> str:
+        return "顺序执行"
+
+
+class ProcessExecutor(ThreadExecutor):
+    """与线程池模式的调度方式相同，但每个插件都在受监督的子进程中执行，超时或停止时可被强制终止"""
+
+    name = "process"
+    isolated = True
+
+    def describe(self) -> str:
+        return f"进程隔离 (最大并发数: {self.max_workers})"
+
+
+class AsyncioExecutor(Executor):
+    """
+    在同一个事件循环中调度所有插件。
+    async 插件直接作为任务运行，可以互相重叠等待时间；其余插件交给最多 thread_workers 个线程执行，不阻塞事件循环。
+    """
+
+    name = "asyncio"
+
+    def __init__(self, max_workers: int = 32, resource_limits: Optional[Dict[str, int]] = None,
+                 log: Optional[Callable[[str, str], None]] = None, thread_workers: int = 4):
+        super().__init__(max_workers, resource_limits, log)
+        self.thread_workers = max(1, int(thread_workers))
+
+    def describe(self) -> str:
+        return f"asyncio (最大并发数: {self.max_workers}，同步插件线程数: {self.thread_workers})"
+
+    def run(self, plugins: List[BasePlugin], hooks: ExecutionHooks):
+        asyncio.run(self._run_async(self._create_scheduler(plugins), hooks))
+
+    async def _run_async(self, scheduler: PluginScheduler, hooks: ExecutionHooks):
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.thread_workers,
+                                                     thread_name_prefix="PluginWorker"))
+
+        async def run_plugin(plugin: BasePlugin) -> Dict[str, Any]:
+            if hooks.can_run_async(plugin):
+                return await hooks.run_plugin_async(plugin)
+            return await loop.run_in_executor(None, hooks.run_plugin, plugin)
+
+        await scheduler.run_async(run_plugin, on_start=hooks.on_start, on_finish=hooks.on_finish,
+                                  on_skip=hooks.on_skip, should_stop=hooks.should_stop)
+
+
+EXECUTORS = {cls.name: cls for cls in (SerialExecutor, ThreadExecutor, ProcessExecutor, AsyncioExecutor)}
+
+
+def create_executor(name: str, workers: int = 4, async_limit: int = 32,
+                    resource_limits: Optional[Dict[str, int]] = None,
+                    log: Optional[Callable[[str, str], None]] = None) -> Executor:
+    """按名称创建执行后端 (serial / thread / process / asyncio)"""
+    if name == AsyncioExecutor.name:
+        return AsyncioExecutor(async_limit, resource_limits, log, thread_workers=workers)
+    if name not in EXECUTORS:
+        raise ValueError(f"未知的执行后端: {name}")
+    return EXECUTORS[name](workers, resource_limits, log)
@@ -1,15 +1,27 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+import tkinter.font as tkfont
 import sys
 import os
+import re
 import time
+import tempfile
 import webbrowser
 import ctypes
-from typing import List, TYPE_CHECKING, Callable
+import threading
+from collections import deque
+from typing import List, TYPE_CHECKING, Callable, Optional
+from timing_db import format_duration
+from log_index import LogIndex, LogFilter, LOG_LEVELS, find_auto_run_logs
 
 # GUI_DEBUG_MODE 开关依然保留，用于独立UI调试 True为gui调试，False为正常运行
 GUI_DEBUG_MODE = False
 
+# 日志与进度的刷新间隔 (毫秒，约 30 帧/秒)；两次刷新之间到达的日志合并为一次插入，进度只取最新值
+UI_REFRESH_INTERVAL_MS = 33
+# 日志框最多保留的行数，超出后删除最早的行，长时间运行时内存占用保持平稳
+MAX_LOG_LINES = 5000
+
 if TYPE_CHECKING:
     from plugin_base import BasePlugin
 
@@ -255,13 +267,14 @@ class FloatingNotice:
             self._progress_glow_position = -self._progress_glow_width
         self._animation_job_ids['progress_glow'] = self.notice.after(30, self._animate_progress_glow)
 
-    def update_task(self, task_name: str, progress: int = None):
+    def update_task(self, task_name: str, progress: int = None, eta: float = None):
         if self.notice and self.notice.winfo_exists():
             self.task_label.config(text=f"正在执行：{task_name}")
             if progress is not None:
                 self._progress_value = progress
                 self._draw_progress_bar()  # <-- 使用新的绘制函数
-                self.task_label.config(text=f"正在执行：{task_name}（{progress}%）")
+                eta_text = f"，剩余约 {format_duration(eta)}" if eta is not None else ""
+                self.task_label.config(text=f"正在执行：{task_name}（{progress}%{eta_text}）")
             self.notice.update_idletasks()
 
     def _start_animations(self):
@@ -472,8 +485,9 @@ class HelpDialog:
 
         self.help_message = (
             "SysTools.exe 支持以下命令行参数:\n\n"
-            "-auto\n"
-            "    全自动模式：按顺序静默执行所有 'plugins' 目录中的插件。\n\n"
+            "-auto [QUERY]\n"
+            "    全自动模式：按顺序静默执行所有 'plugins' 目录中的插件。\n"
+            "    给出查询时只执行匹配的插件，例如 -auto \"tag:registry and not tag:slow\"、-auto \"phase:2\"。\n\n"
             "-test\n"
             "    测试模式：加载并执行 'plugins_test' 目录中的插件。\n\n"
             "-cleanup\n"
@@ -489,6 +503,41 @@ class HelpDialog:
             "    调试模式 (GUI)：在GUI界面中模拟插件执行（随机成功/失败）。\n\n"
             "-debuggui-success\n"
             "    调试模式 (GUI - 全部成功)：在GUI界面中模拟插件执行，并总是返回成功。\n\n"
+            "-async-log\n"
+            "    异步文件日志：自动模式下日志先进入内存队列，由后台线程批量写入文件，插件大量输出时不再被逐行刷新拖慢。\n\n"
+            "-jsonl-log\n"
+            "    结构化日志：把日志、插件开始/结束/跳过等事件逐行以 JSON 写入 %TEMP%\\SysTools_RunLog_<时间>.jsonl。\n"
+            "    -jsonl-max-mb MB 控制轮转大小 (默认 10)，-jsonl-compress gzip|zstd|none 控制轮转文件的压缩方式。\n\n"
+            "-executor NAME\n"
+            "    执行后端 (GUI与 -auto 模式通用)：serial 顺序执行 (默认)、thread 线程池并行、\n"
+            "    process 子进程隔离并行、asyncio 事件循环并发。\n\n"
+            "-parallel\n"
+            "    并行模式：按插件声明的依赖关系 (depends_on / conflicts_with) 并行执行插件，等同于 -executor thread。\n\n"
+            "-workers N\n"
+            "    并行模式下同时执行的最大插件数，默认为 4。\n\n"
+            "-asyncio\n"
+            "    asyncio 模式：在同一个事件循环中并发执行插件，async 插件 (execute_async) 可以互相重叠等待时间，\n"
+            "    同步插件交给最多 -workers 个线程执行；-async-limit N 控制同时运行的插件数 (默认 32)。\n\n"
+            "-resource-limit TAG=N\n"
+            "    并行/asyncio 模式下，声明了资源标签 TAG 的插件最多同时运行 N 个，可重复指定。\n"
+            "    registry、disk、network-stack 默认均为 1；exclusive 标签的插件总是独占运行。\n\n"
+            "-isolate\n"
+            "    进程隔离模式：每个插件在独立子进程中执行，超时或点击停止时立即强制终止。\n\n"
+            "-timeout S\n"
+            "    进程隔离模式下插件的默认超时秒数 (插件自身声明的 timeout 优先)。\n\n"
+            "-pool\n"
+            "    常驻进程池：复用预先导入了插件模块的工作进程，显著降低隔离模式的派发开销 (隐含 -isolate)。\n"
+            "    可通过 -pool-max-tasks N 与 -pool-max-rss MB 控制工作进程的回收时机。\n\n"
+            "-resume [RUN_ID]\n"
+            "    继续执行：与 -auto 同时使用，重放上一次 (或指定 RUN_ID 的) 执行日志，只执行尚未成功的插件。\n\n"
+            "-force\n"
+            "    强制执行：忽略结果缓存与插件的 check_applied() 检查，已是最新的插件也会重新执行。\n\n"
+            "-no-plugin-cache\n"
+            "    重建插件发现缓存：重新解析和导入全部插件文件。插件依赖的环境变化后可使用此参数。\n\n"
+            "-watch\n"
+            "    热重载：监视插件目录，插件文件被修改、新增或删除后自动重新加载变化的插件。\n\n"
+            "-probe-timeout S\n"
+            "    单个插件可用性检查的最长秒数 (默认10)，超时的插件按不可用处理。\n\n"
             "示例用法：\n"
             "    -test -auto >> 以自动模式加载并执行 'plugins_test' 目录中的插件。\n"
             "    -auto -cleanup >> 以自动模式加载并执行 'plugins' 目录中的插件，并清理程序本身。"
@@ -527,6 +576,340 @@ class HelpDialog:
         y = (screen_height // 2) - (height // 2)
         self.dialog.geometry(f"{width}x{height}+{x}+{y}")
 
+class LogViewerDialog:
+    """
+    磁盘日志查看器。
+    通过 LogIndex 按需读取日志文件，Text 控件中只保留当前可见的几十行，打开数 GB 的自动模式日志也不会占用大量内存。
+    索引在后台线程中建立，首屏立即显示；支持按级别过滤和边输入边搜索，正在写入的日志会自动追加新内容。
+    """
+
+    LEVEL_CHOICES = ("全部",) + LOG_LEVELS
+    POLL_INTERVAL_MS = 100
+    SEARCH_DELAY_MS = 250
+
+    def __init__(self, parent, path: Optional[str] = None):
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("日志查看器")
+        set_window_icon(self.dialog)
+        self.dialog.transient(parent)
+
+        self.index: Optional[LogIndex] = None
+        self.filter: Optional[LogFilter] = None
+        self.top_row = 0
+        self.match_line: Optional[int] = None
+        # 切换过滤条件后要定位到的原始行号 (过滤结果还没建立到该行时暂存)
+        self._anchor_line: Optional[int] = None
+        # 打开新文件或更换过滤条件时递增，旧的后台任务据此自行退出
+        self._generation = 0
+        self._search_generation = 0
+        self._search_after_id = None
+        self._search_result = None
+        self._workers: List[threading.Thread] = []
+        self._rendered_state = None
+
+        self.setup_ui()
+        self.center_window(1000, 650)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+
+        if path is None:
+            logs = find_auto_run_logs()
+            path = logs[-1] if logs else None
+        if path:
+            self.open_file(path)
+        self.dialog.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.dialog, padding=(10, 10, 10, 5))
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # --- 工具栏：打开文件、级别过滤、搜索 ---
+        toolbar = ttk.Frame(main_frame)
+        toolbar.pack(fill=tk.X, pady=(0, 8))
+        ttk.Button(toolbar, text="打开...", command=self._choose_file).pack(side=tk.LEFT)
+        ttk.Label(toolbar, text="级别:").pack(side=tk.LEFT, padx=(15, 5))
+        self.level_var = tk.StringVar(value=self.LEVEL_CHOICES[0])
+        level_box = ttk.Combobox(toolbar, textvariable=self.level_var, values=self.LEVEL_CHOICES,
+                                 state="readonly", width=10)
+        level_box.pack(side=tk.LEFT)
+        level_box.bind("<<ComboboxSelected>>", lambda e: self._apply_filter())
+        ttk.Label(toolbar, text="搜索:").pack(side=tk.LEFT, padx=(15, 5))
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self._schedule_search())
+        search_entry = ttk.Entry(toolbar, textvariable=self.search_var, width=30)
+        search_entry.pack(side=tk.LEFT)
+        search_entry.bind("<Return>", lambda e: self._search(backwards=False, from_match=True))
+        search_entry.bind("<Shift-Return>", lambda e: self._search(backwards=True, from_match=True))
+        ttk.Button(toolbar, text="上一个", command=lambda: self._search(True, True)).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(toolbar, text="下一个", command=lambda: self._search(False, True)).pack(side=tk.LEFT, padx=(5, 0))
+
+        # --- 日志区域：Text 只显示可见的行，垂直滚动条由本类根据行号换算 ---
+        body = ttk.Frame(main_frame)
+        body.pack(fill=tk.BOTH, expand=True)
+        body.columnconfigure(0, weight=1)
+        body.rowconfigure(0, weight=1)
+        self.text_font = tkfont.Font(family="Consolas", size=10)
+        self.text = tk.Text(body, wrap=tk.NONE, font=self.text_font, state="disabled", cursor="arrow")
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.v_scroll = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.v_scroll.grid(row=0, column=1, sticky="ns")
+        h_scroll = ttk.Scrollbar(body, orient="horizontal", command=self.text.xview)
+        h_scroll.grid(row=1, column=0, sticky="ew")
+        self.text.configure(xscrollcommand=h_scroll.set)
+        for tag, color in {"error": "#E74C3C", "warning": "#E67E22", "success": "#27AE60", "info": "#3498DB"}.items():
+            self.text.tag_config(tag, foreground=color)
+        self.text.tag_config("lineno", foreground="#95A5A6")
+        self.text.tag_config("match", background="#FFF3B0")
+
+        self.text.bind("<Configure>", lambda e: self._render())
+        self.text.bind("<MouseWheel>", lambda e: self._scroll_rows(-3 if e.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda e: self._scroll_rows(-3))
+        self.text.bind("<Button-5>", lambda e: self._scroll_rows(3))
+        for key, action in {"<Up>": lambda: self._scroll_rows(-1), "<Down>": lambda: self._scroll_rows(1),
+                            "<Prior>": lambda: self._scroll_rows(-self._visible_rows()),
+                            "<Next>": lambda: self._scroll_rows(self._visible_rows()),
+                            "<Control-Home>": lambda: self._scroll_to(0),
+                            "<Control-End>": lambda: self._scroll_to(self._row_count())}.items():
+            self.dialog.bind(key, lambda e, action=action: action())
+
+        self.status_label = ttk.Label(main_frame, text="未打开日志文件", foreground="#7F8C8D")
+        self.status_label.pack(fill=tk.X, pady=(5, 0))
+
+    def center_window(self, width, height):
+        self.dialog.update_idletasks()
+        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
+        self.dialog.geometry(f"{width}x{height}+{x}+{y}")
+
+    # --- 文件与后台索引 ---
+
+    def _choose_file(self):
+        initial_dir = os.path.dirname(self.index.path) if self.index else tempfile.gettempdir()
+        path = filedialog.askopenfilename(parent=self.dialog, initialdir=initial_dir,
+                                          filetypes=[("日志文件", "*.log"), ("所有文件", "*.*")])
+        if path:
+            self.open_file(path)
+
+    def open_file(self, path: str):
+        self._generation += 1
+        self.index = LogIndex(path)
+        self.filter = None
+        self.top_row = 0
+        self.match_line = None
+        self._anchor_line = None
+        self.level_var.set(self.LEVEL_CHOICES[0])
+        self.dialog.title(f"日志查看器 - {os.path.basename(path)}")
+        self._start_workers()
+        self._render()
+
+    def _apply_filter(self):
+        if self.index is None:
+            return
+        anchor = self._row_to_line(self.top_row) if self._row_count() else 0
+        self._generation += 1
+        level = self.level_var.get()
+        self.filter = None if level == self.LEVEL_CHOICES[0] else LogFilter(self.index, [level])
+        self._start_workers()
+        self.top_row = 0 if self.filter else anchor
+        self._anchor_line = anchor if self.filter else None
+        self._render()
+
+    def _start_workers(self):
+        """启动 (或在文件增长后重新启动) 建立索引与过滤结果的后台线程"""
+        generation, index, log_filter = self._generation, self.index, self.filter
+        stopped = lambda: generation != self._generation
+
+        def build_index():
+            try:
+                index.build(should_stop=stopped)
+            except OSError as e:
+                print(f"[WARNING] 读取日志文件失败: {e}")
+                index.complete = True
+
+        def build_filter():
+            # 索引仍在建立时，过滤结果跟随已索引的块逐步增加
+            while not stopped():
+                done = index.complete
+                log_filter.build(should_stop=stopped)
+                if done:
+                    return
+                time.sleep(0.05)
+
+        self._workers = [threading.Thread(target=build_index, name="LogIndexBuilder", daemon=True)]
+        if log_filter is not None:
+            self._workers.append(threading.Thread(target=build_filter, name="LogFilterBuilder", daemon=True))
+        for worker in self._workers:
+            worker.start()
+
+    def _poll(self):
+        """定时检查后台任务的进展：刷新可见区域、状态栏，并在文件增长时继续索引"""
+        if not self.dialog.winfo_exists():
+            return
+        if self._search_result is not None:
+            generation, line = self._search_result
+            self._search_result = None
+            if generation == self._search_generation:
+                self._show_match(line)
+        if self.index is not None:
+            idle = not any(worker.is_alive() for worker in self._workers)
+            if idle and self.index.file_size() > self.index.indexed_bytes:
+                self.index.complete = False
+                self._start_workers()
+            state = (self.index.line_count, self.index.complete, len(self.filter) if self.filter else None,
+                     self.filter.complete if self.filter else None)
+            if state != self._rendered_state:
+                self._render()
+        self.dialog.after(self.POLL_INTERVAL_MS, self._poll)
+
+    # --- 行号换算与渲染 ---
+
+    def _row_count(self) -> int:
+        if self.index is None:
+            return 0
+        return len(self.filter) if self.filter is not None else self.index.line_count
+
+    def _estimated_rows(self) -> int:
+        """滚动条使用的总行数：索引未完成时按已扫描字节的比例估算"""
+        rows = self._row_count()
+        if self.index is not None and not self.index.complete and self.index.indexed_bytes:
+            rows = int(rows * self.index.file_size() / self.index.indexed_bytes)
+        return max(rows, 1)
+
+    def _row_to_line(self, row: int) -> int:
+        return self.filter.line_at(row) if self.filter is not None else row
+
+    def _visible_rows(self) -> int:
+        return max(1, self.text.winfo_height() // self.text_font.metrics("linespace"))
+
+    def _scroll_rows(self, delta: int):
+        self._scroll_to(self.top_row + delta)
+
+    def _scroll_to(self, row: int):
+        self.top_row = row
+        self._anchor_line = None
+        self._render()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self._estimated_rows()))
+        elif args[0] == "scroll":
+            step = self._visible_rows() if args[2] == "pages" else 1
+            self._scroll_rows(int(args[1]) * step)
+
+    def _render(self):
+        if self._anchor_line is not None and self.filter is not None:
+            row = self.filter.row_of(self._anchor_line)
+            if row < len(self.filter) or self.filter.complete:
+                self.top_row = row
+                self._anchor_line = None
+        rows = self._row_count()
+        visible = self._visible_rows()
+        self.top_row = max(0, min(self.top_row, rows - visible))
+        end_row = min(self.top_row + visible, rows)
+        if self.filter is not None:
+            line_numbers = [self.filter.line_at(row) for row in range(self.top_row, end_row)]
+            texts = [self.index.read_line(n) for n in line_numbers]
+        elif self.index is not None:
+            line_numbers = list(range(self.top_row, end_row))
+            texts = self.index.read_lines(self.top_row, end_row - self.top_row)
+        else:
+            line_numbers, texts = [], []
+
+        args = []
+        for n, line in zip(line_numbers, texts):
+            level = line[1:line.find("]")].lower() if line.startswith("[") else ""
+            tags = (level,) if level in ("error", "warning", "success", "info") else ()
+            if n == self.match_line:
+                tags += ("match",)
+            args += [f"{n + 1:>9}  ", "lineno", line + "\n", tags]
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        if args:
+            self.text.insert("1.0", *args)
+        self.text.configure(state="disabled")
+
+        total = self._estimated_rows()
+        self.v_scroll.set(self.top_row / total, min(1.0, (self.top_row + visible) / total))
+        self._rendered_state = (self.index.line_count, self.index.complete,
+                                len(self.filter) if self.filter else None,
+                                self.filter.complete if self.filter else None) if self.index else None
+        self._update_status()
+
+    def _update_status(self):
+        if self.index is None:
+            return
+        status = f"{self.index.path}    共 {self.index.line_count:,} 行"
+        if self.filter is not None:
+            status += f"，符合过滤条件 {len(self.filter):,} 行"
+        if not self.index.complete:
+            size = self.index.file_size()
+            status += f"    正在建立索引 {self.index.indexed_bytes * 100 // max(size, 1)}%"
+        self.status_label.config(text=status)
+
+    # --- 搜索 ---
+
+    def _schedule_search(self):
+        """输入搜索内容时延迟片刻再从当前位置开始搜索，连续输入只搜索最后一次"""
+        if self._search_after_id is not None:
+            self.dialog.after_cancel(self._search_after_id)
+        self._search_after_id = self.dialog.after(self.SEARCH_DELAY_MS, self._search, False, False)
+
+    def _search(self, backwards: bool = False, from_match: bool = False):
+        self._search_after_id = None
+        self._search_generation += 1
+        query = self.search_var.get()
+        if self.index is None or not query:
+            self.match_line = None
+            self._render()
+            return
+        if from_match and self.match_line is not None:
+            start = self.match_line if backwards else self.match_line + 1
+        else:
+            start = self._row_to_line(self.top_row) if self._row_count() else 0
+        generation, index, log_filter = self._search_generation, self.index, self.filter
+        pattern = re.compile(re.escape(query.encode(index.encoding)))
+        stopped = lambda: generation != self._search_generation
+
+        def accept(line):
+            if log_filter is None:
+                return True
+            row = log_filter.row_of(line)
+            return row < len(log_filter) and log_filter.line_at(row) == line
+
+        def run():
+            found = next((n for n in index.iter_matches(pattern, start, backwards, stopped) if accept(n)), None)
+            if found is None and not stopped():
+                # 到达文件开头/末尾后从另一端继续查找
+                wrap_start = index.line_count if backwards else 0
+                for n in index.iter_matches(pattern, wrap_start, backwards, stopped):
+                    if (n < start) if backwards else (n >= start):
+                        break
+                    if accept(n):
+                        found = n
+                        break
+            if not stopped():
+                self._search_result = (generation, found)
+
+        self.status_label.config(text=f"正在搜索“{query}”...")
+        threading.Thread(target=run, name="LogSearch", daemon=True).start()
+
+    def _show_match(self, line: Optional[int]):
+        if line is None:
+            self.match_line = None
+            self._render()
+            self.status_label.config(text=f"未找到“{self.search_var.get()}”")
+            return
+        self.match_line = line
+        self._anchor_line = None
+        row = self.filter.row_of(line) if self.filter is not None else line
+        self.top_row = max(0, row - self._visible_rows() // 3)
+        self._render()
+
+    def close(self):
+        self._generation += 1
+        self._search_generation += 1
+        self.dialog.destroy()
+
+
 class TkinterGUI:
     """
     Tkinter View (视图) 层。
@@ -540,6 +923,11 @@ class TkinterGUI:
         self.root = tk.Tk()
         self.stop_callback = None
 
+        # 工作线程只把日志和进度放入队列，由GUI线程定时统一取出，避免每条消息都向 Tk 事件队列投递一次
+        self._ui_lock = threading.Lock()
+        self._pending_logs = deque(maxlen=MAX_LOG_LINES)
+        self._pending_progress = None
+
         # 1. 像以前一样，先 withdraw() 来进行所有后台配置
         self.root.withdraw()
 
@@ -553,6 +941,7 @@ class TkinterGUI:
 
         self._setup_styles()
         self._setup_gui()
+        self.root.after(UI_REFRESH_INTERVAL_MS, self._drain_ui_queue)
 
         # 2. 在所有组件都创建好之后，居中
         self.center_window(self.root, 900, 700)
@@ -594,19 +983,24 @@ class TkinterGUI:
             self.about_btn.config(command=callback)
         elif name == "show_help":
             self.help_btn.config(command=callback)
+        elif name == "show_log_viewer":
+            self.log_viewer_btn.config(command=callback)
         elif name == "stop_execution":
             self.stop_callback = callback
         elif name == "stop_execution":
             self.stop_callback = callback
 
-    def display_plugins(self, plugins: List['BasePlugin']):
-        """【新增】接收 Presenter 发来的插件数据并更新列表。"""
+    def display_plugins(self, plugins: List['BasePlugin'], statuses: Optional[List[Optional[bool]]] = None):
+        """
+        【新增】接收 Presenter 发来的插件数据并更新列表。
+        statuses 为各插件已知的可用性 (None 表示仍在检查)，检查结果稍后通过 safe_update_plugin_status() 填入。
+        """
         self._clear_plugin_list()
         for i, plugin in enumerate(plugins):
-            status_text = "✓ 可用" if plugin.is_available() else "✗ 不可用"
+            status_text = self._status_text(statuses[i] if statuses else None)
             item_id = self.plugin_tree.insert("", "end",
                                               values=("⚪", plugin.get_name(), plugin.get_description(), status_text))
-            self.plugin_vars[i] = {'selected': False, 'item_id': item_id}
+            self.plugin_vars[i] = {'selected': False, 'item_id': item_id, 'name': plugin.get_name()}
         self._add_log_message(f"已加载 {len(plugins)} 个功能插件", "info")
 
     def get_selected_indices(self) -> List[int]:
@@ -618,10 +1012,13 @@ class TkinterGUI:
     # ======================================================
 
     def safe_add_log_message(self, message: str, level: str):
-        self.root.after(0, self._add_log_message, message, level)
+        line = f"[{time.strftime('%H:%M:%S')}] {message}\n"
+        with self._ui_lock:
+            self._pending_logs.append((line, level))
 
-    def safe_update_progress(self, progress: float, current: int, total: int):
-        self.root.after(0, self._update_progress, progress, current, total)
+    def safe_update_progress(self, progress: float, current: int, total: int, eta: Optional[float] = None):
+        with self._ui_lock:
+            self._pending_progress = (progress, current, total, eta)
 
     def safe_show_running_indicator(self, plugin_name: str):
         self.root.after(0, self._show_running_indicator, plugin_name)
@@ -633,24 +1030,61 @@ class TkinterGUI:
         """【新增】一个专用于UI重置的安全方法"""
         self.root.after(0, self._ui_reset_on_complete)
 
+    def safe_update_plugin_status(self, index: int, available: bool):
+        self.root.after(0, self._update_plugin_status, index, available)
+
+    def safe_apply_plugin_diff(self, plugins: List['BasePlugin'], statuses: List[Optional[bool]],
+                               removed: List[str], changed: List[str]):
+        self.root.after(0, self._apply_plugin_diff, plugins, statuses, removed, changed)
+
     # ======================================================
     # Section 3: UI 内部实现方法 (以下方法通常由 Presenter 通过安全接口调用)
     # ======================================================
 
-    def _add_log_message(self, message: str, level: str):
+    def _drain_ui_queue(self):
+        """定时任务：取出两次刷新之间积压的日志与最新进度，一次性更新界面"""
+        self._flush_ui_queue()
+        self.root.after(UI_REFRESH_INTERVAL_MS, self._drain_ui_queue)
+
+    def _flush_ui_queue(self):
+        with self._ui_lock:
+            logs = list(self._pending_logs)
+            self._pending_logs.clear()
+            progress, self._pending_progress = self._pending_progress, None
+        if logs:
+            self._insert_log_lines(logs)
+        if progress is not None:
+            self._update_progress(*progress)
+
+    def _insert_log_lines(self, lines: List[tuple]):
+        """把 [(文本, 标签)] 合并为一次 insert 调用 (相邻同标签的行拼接在一起)，再裁剪超出上限的旧行"""
+        args = []
+        for text, tag in lines:
+            if args and args[-1] == tag:
+                args[-2] += text
+            else:
+                args += [text, tag]
         try:
-            self.log_text.insert(tk.END, f"[{time.strftime('%H:%M:%S')}] {message}\n", level);
+            self.log_text.insert(tk.END, *args)
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - MAX_LOG_LINES
+            if excess > 0:
+                self.log_text.delete('1.0', f'{excess + 1}.0')
             self.log_text.see(tk.END)
         except tk.TclError:
             pass
 
-    def _update_progress(self, progress: float, current: int, total: int):
+    def _add_log_message(self, message: str, level: str):
+        self._insert_log_lines([(f"[{time.strftime('%H:%M:%S')}] {message}\n", level)])
+
+    def _update_progress(self, progress: float, current: int, total: int, eta: Optional[float] = None):
         self.progress_var.set(progress);
-        self.progress_label.config(text=f"{current}/{total}");
-        self.root.update_idletasks()
+        eta_text = f"  剩余约 {format_duration(eta)}" if eta is not None else ""
+        self.progress_label.config(text=f"{current}/{total}{eta_text}")
 
     def _ui_reset_on_complete(self):
         """仅重置UI元素，不显示任何消息框。"""
+        # 先刷新队列中剩余的日志与进度，避免旧进度覆盖“完成”状态
+        self._flush_ui_queue()
         self.progress_var.set(100)
         self.progress_label.config(text="完成")
         self.set_buttons_state(True)
@@ -744,6 +1178,9 @@ class TkinterGUI:
         self.help_btn = ttk.Button(left_bottom_frame, text="启动参数", style="Custom.TButton")
         self.help_btn.pack(side=tk.LEFT, padx=5)
 
+        self.log_viewer_btn = ttk.Button(left_bottom_frame, text="查看日志文件", style="Custom.TButton")
+        self.log_viewer_btn.pack(side=tk.LEFT, padx=5)
+
         self.clear_log_btn = ttk.Button(bottom_frame, text="清空日志", style="Custom.TButton")
         self.clear_log_btn.pack(side=tk.RIGHT, padx=5)
 
@@ -760,6 +1197,44 @@ class TkinterGUI:
         if (idx := self.plugin_tree.index(item)) in self.plugin_vars: self.plugin_vars[idx]['selected'] = (
                     new_val == "✅")
 
+    @staticmethod
+    def _status_text(available: Optional[bool]) -> str:
+        if available is None:
+            return "… 检查中"
+        return "✓ 可用" if available else "✗ 不可用"
+
+    def _apply_plugin_diff(self, plugins, statuses, removed, changed):
+        """
+        按插件名称把列表更新为 plugins：未变化的行原样保留 (包括勾选状态)，
+        changed 中的行更新描述与状态，新增的插件插入到对应位置，removed 中的行删除。
+        """
+        rows = {}
+        for data in self.plugin_vars.values():
+            rows.setdefault(data['name'], []).append(data)
+        changed = set(changed)
+        self.plugin_vars = {}
+        for i, plugin in enumerate(plugins):
+            name = plugin.get_name()
+            data = rows[name].pop(0) if rows.get(name) else None
+            if data is None:
+                item_id = self.plugin_tree.insert("", i, values=("⚪", name, plugin.get_description(),
+                                                                 self._status_text(statuses[i])))
+                data = {'selected': False, 'item_id': item_id, 'name': name}
+            else:
+                self.plugin_tree.move(data['item_id'], "", i)
+                if name in changed:
+                    self.plugin_tree.set(data['item_id'], "描述", plugin.get_description())
+                    self.plugin_tree.set(data['item_id'], "状态", self._status_text(statuses[i]))
+            self.plugin_vars[i] = data
+        for stale in rows.values():
+            for data in stale:
+                self.plugin_tree.delete(data['item_id'])
+        self._add_log_message(f"插件列表已更新 (新增/更新 {len(changed)} 个，移除 {len(removed)} 个)", "info")
+
+    def _update_plugin_status(self, index: int, available: bool):
+        if index in self.plugin_vars:
+            self.plugin_tree.set(self.plugin_vars[index]['item_id'], "状态", self._status_text(available))
+
     def _clear_plugin_list(self):
         for item in self.plugin_tree.get_children(): self.plugin_tree.delete(item)
         self.plugin_vars = {}
@@ -785,6 +1260,9 @@ class TkinterGUI:
     def show_about_dialog(self):
         AboutDialog(self.root)
 
+    def show_log_viewer(self, path: Optional[str] = None):
+        LogViewerDialog(self.root, path)
+
     def show_restart_dialog(self):
         return RestartDialog(self.root).show_dialog()
 
@@ -898,7 +1376,7 @@ if __name__ == '__main__':
             # 使用 lambda 捕获 name 变量
             app.bind_command(cmd, lambda name=cmd: mock_callback(name))
 
-        # 3. 模拟 Presenter 加载插件数据
+        # 3. 模拟 Presenter 加载插件数据 (第三个插件的可用性稍后填入)
         app.display_plugins([
             # 【修复】为所有 lambda 添加一个参数（通常用 _ 表示忽略）来接收 self
             type('MockPlugin', (), {
@@ -916,7 +1394,8 @@ if __name__ == '__main__':
                 'get_description': lambda _: '这是一个不可用的模拟插件。',
                 'is_available': lambda _: False
             })(),
-        ])
+        ], [True, True, None])
+        app.safe_update_plugin_status(2, False)
 
         # 4. 运行 GUI
         app.run()
\ No newline at end of file
@@ -0,0 +1,259 @@
+import os
+import re
+import glob
+import bisect
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+# 日志行开头的级别标记，与 CoreEngine._log() 的输出格式 "[LEVEL] 消息" 一致
+LOG_LEVELS = ("INFO", "SUCCESS", "WARNING", "ERROR")
+
+
+def find_auto_run_logs(log_dir: Optional[str] = None) -> List[str]:
+    """列出自动模式写下的日志文件 (SysTools_AutoRun_*.log)，按文件名即时间排序"""
+    log_dir = log_dir or tempfile.gettempdir()
+    return sorted(glob.glob(os.path.join(glob.escape(log_dir), "SysTools_AutoRun_*.log")))
+
+
+class LogIndex:
+    """
+    磁盘日志文件的行偏移索引。
+    文件被切分为约 BLOCK_SIZE 大小、边界对齐到换行符的块，每块只记录 (起始偏移, 结束偏移, 首行行号)。
+    建立索引时只在 C 层统计换行符，不逐行解析，也不把内容留在内存中；读取某几行时只读入所在的块，
+    最近读过的 CACHE_BLOCKS 个块会被缓存。
+    build() 可以在后台线程中执行，已索引的部分立即可读；文件继续增长时再次调用 build() 只扫描新增部分。
+    """
+
+    BLOCK_SIZE = 1024 * 1024
+    CACHE_BLOCKS = 8
+
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.complete = False
+
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._first_lines: List[int] = []
+        self._line_count = 0
+        self._indexed_bytes = 0
+        # 最后一块以不完整的行结束 (文件末尾没有换行符)，文件增长后需要重新扫描这一块
+        self._tail_partial = False
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._cache: 'OrderedDict[int, List[str]]' = OrderedDict()
+
+    @property
+    def line_count(self) -> int:
+        return self._line_count
+
+    @property
+    def block_count(self) -> int:
+        return len(self._starts)
+
+    @property
+    def indexed_bytes(self) -> int:
+        return self._indexed_bytes
+
+    def file_size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def block_info(self, i: int) -> Tuple[int, int, int, bool]:
+        """第 i 块的 (起始偏移, 结束偏移, 首行行号, 是否为不完整的末尾块)"""
+        with self._lock:
+            partial = self._tail_partial and i == len(self._starts) - 1
+            return self._starts[i], self._ends[i], self._first_lines[i], partial
+
+    def build(self, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """扫描尚未索引的部分直到文件末尾；返回是否扫描到了末尾 (False 表示被 should_stop 中断)"""
+        with self._build_lock:
+            with self._lock:
+                if self._tail_partial:
+                    self._drop_last_block()
+            offset = self._indexed_bytes
+            with open(self.path, "rb") as f:
+                while True:
+                    if should_stop is not None and should_stop():
+                        return False
+                    f.seek(offset)
+                    chunk = f.read(self.BLOCK_SIZE)
+                    if not chunk:
+                        break
+                    cut = chunk.rfind(b"\n")
+                    while cut == -1:
+                        # 超长的一行：继续读到换行符或文件末尾
+                        more = f.read(self.BLOCK_SIZE)
+                        if not more:
+                            break
+                        chunk += more
+                        cut = chunk.rfind(b"\n")
+                    if cut == -1:
+                        self._add_block(offset, offset + len(chunk), 1, partial=True)
+                        break
+                    self._add_block(offset, offset + cut + 1, chunk.count(b"\n", 0, cut + 1), partial=False)
+                    offset += cut + 1
+            self.complete = True
+            return True
+
+    def _add_block(self, start: int, end: int, lines: int, partial: bool):
+        with self._lock:
+            self._starts.append(start)
+            self._ends.append(end)
+            self._first_lines.append(self._line_count)
+            self._line_count += lines
+            self._indexed_bytes = end
+            self._tail_partial = partial
+
+    def _drop_last_block(self):
+        """去掉不完整的末尾块 (调用方持有 self._lock)"""
+        last = len(self._starts) - 1
+        self._indexed_bytes = self._starts.pop()
+        self._ends.pop()
+        self._line_count = self._first_lines.pop()
+        self._tail_partial = False
+        self._cache.pop(last, None)
+
+    def _block_of_line(self, line: int) -> int:
+        with self._lock:
+            return bisect.bisect_right(self._first_lines, line) - 1
+
+    def _read_raw(self, i: int) -> bytes:
+        start, end, _, _ = self.block_info(i)
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def _read_block(self, i: int) -> List[str]:
+        with self._lock:
+            lines = self._cache.get(i)
+            if lines is not None:
+                self._cache.move_to_end(i)
+                return lines
+        lines = self._read_raw(i).decode(self.encoding, errors="replace").split("\n")
+        if lines and lines[-1] == "":
+            lines.pop()
+        lines = [line.rstrip("\r") for line in lines]
+        with self._lock:
+            self._cache[i] = lines
+            while len(self._cache) > self.CACHE_BLOCKS:
+                self._cache.popitem(last=False)
+        return lines
+
+    def read_lines(self, start: int, count: int) -> List[str]:
+        """读取从第 start 行 (从 0 开始) 起的最多 count 行"""
+        result: List[str] = []
+        if start < 0 or start >= self._line_count:
+            return result
+        i = self._block_of_line(start)
+        while len(result) < count and i < self.block_count:
+            first_line = self.block_info(i)[2]
+            skip = start + len(result) - first_line
+            result.extend(self._read_block(i)[skip:skip + count - len(result)])
+            i += 1
+        return result
+
+    def read_line(self, line: int) -> str:
+        lines = self.read_lines(line, 1)
+        return lines[0] if lines else ""
+
+    def iter_matches(self, pattern: 're.Pattern', start_line: int = 0, backwards: bool = False,
+                     should_stop: Optional[Callable[[], bool]] = None) -> Iterator[int]:
+        """
+        按顺序逐块查找匹配 pattern (bytes 正则) 的行号。
+        向前查找从 start_line (含) 开始，向后查找从 start_line 之前的一行开始；只扫描已建立索引的部分。
+        """
+        if self.block_count == 0:
+            return
+        if backwards:
+            first_block = self._block_of_line(max(0, start_line - 1))
+            blocks = range(first_block, -1, -1)
+        else:
+            blocks = range(max(0, self._block_of_line(start_line)), self.block_count)
+        for i in blocks:
+            if should_stop is not None and should_stop():
+                return
+            data = self._read_raw(i)
+            line = self.block_info(i)[2]
+            matches = []
+            position = 0
+            for match in pattern.finditer(data):
+                line += data.count(b"\n", position, match.start())
+                position = match.start()
+                if not matches or matches[-1] != line:
+                    matches.append(line)
+            if backwards:
+                matches = [n for n in reversed(matches) if n < start_line]
+            else:
+                matches = [n for n in matches if n >= start_line]
+            yield from matches
+
+
+class LogFilter:
+    """
+    按日志级别过滤后的行号列表。
+    在 LogIndex 的基础上逐块查找以 "[LEVEL]" 开头的行 (用 bytes.find 查找 "\\n[LEVEL]"，比逐字节尝试的正则快得多)，
+    同样可以在后台线程中增量建立。
+    """
+
+    def __init__(self, index: LogIndex, levels: Sequence[str]):
+        self.index = index
+        self.levels = tuple(levels)
+        self._markers = [f"[{level}]".encode("ascii") for level in self.levels]
+        self.lines = array("Q")
+        # 索引已完成且全部块都已处理
+        self.complete = False
+        self._next_block = 0
+        self._committed = 0
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def line_at(self, row: int) -> int:
+        return self.lines[row]
+
+    def row_of(self, line: int) -> int:
+        """第 line 行在过滤结果中的位置 (不在结果中时为其后第一条结果的位置)"""
+        return bisect.bisect_left(self.lines, line)
+
+    def build(self, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """处理索引中尚未过滤的块；返回是否已处理完当前索引的全部块"""
+        index_complete = self.index.complete
+        # 上次处理过的不完整末尾块可能已被重新索引，丢弃其结果后重新处理
+        del self.lines[self._committed:]
+        while self._next_block < self.index.block_count:
+            if should_stop is not None and should_stop():
+                return False
+            i = self._next_block
+            _, _, line, partial = self.index.block_info(i)
+            data = self.index._read_raw(i)
+            position = 0
+            for start in self._line_starts(data):
+                line += data.count(b"\n", position, start)
+                position = start
+                self.lines.append(line)
+            if partial:
+                break
+            self._next_block += 1
+            self._committed = len(self.lines)
+        self.complete = index_complete
+        return True
+
+    def _line_starts(self, data: bytes) -> List[int]:
+        """块内以任一级别标记开头的行的起始偏移，按偏移排序"""
+        starts = []
+        for marker in self._markers:
+            if data.startswith(marker):
+                starts.append(0)
+            needle = b"\n" + marker
+            position = data.find(needle)
+            while position != -1:
+                starts.append(position + 1)
+                position = data.find(needle, position + 1)
+        starts.sort()
+        return starts
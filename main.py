@@ -3,6 +3,7 @@ import os
 import tkinter as tk
 from tkinter import messagebox
 import ctypes
+import multiprocessing
 import textwrap  # 【核心新增】导入 textwrap 模块
 
 
@@ -30,6 +31,7 @@ except ImportError:
 # 1. 明确导入最终使用的核心组件
 # ======================================================
 from core import CoreEngine
+from events import ASYNC, ProgressEvent, RunCompletedEvent
 from gui_tk import TkinterGUI, FloatingNotice, RestartDialog, set_window_icon, set_app_id
 from presenter import Presenter
 
@@ -72,10 +74,6 @@ def main():
         temp_root.geometry("0x0+10000+10000")
         notice = FloatingNotice(temp_root)
 
-        def auto_progress_callback(current, total, plugin_name):
-            progress = int(current / total * 100) if total > 0 else 0
-            temp_root.after(0, notice.update_task, plugin_name, progress)
-
         # 【核心修复】将 presenter.py 中完善的错误处理逻辑移植到这里
         def step_3_show_dialogs(failed_plugins):
             user_wants_reboot = False
@@ -106,8 +104,16 @@ def main():
             notice.update_task("执行完成", 100)
             temp_root.after(1000, step_2_close_notice_and_proceed, failed_plugins)
 
-        core.on_auto_progress_update = auto_progress_callback
-        core.on_auto_execution_complete = step_1_show_completion_and_wait
+        def on_core_event(event):
+            # 引擎在后台线程 (或 asyncio 事件循环线程) 中发布事件，Tk 组件只能在主线程中操作
+            if isinstance(event, ProgressEvent):
+                temp_root.after(0, notice.update_task, event.current, int(event.progress), event.eta)
+            elif isinstance(event, RunCompletedEvent):
+                temp_root.after(0, step_1_show_completion_and_wait, event.executed, event.total,
+                                event.failed_plugins)
+
+        core.events.subscribe(on_core_event, event_types=(ProgressEvent, RunCompletedEvent), mode=ASYNC,
+                              name="FloatingNotice")
         core.start_auto_execution()
         temp_root.mainloop()
 
@@ -121,6 +127,9 @@ def main():
 
 
 if __name__ == "__main__":
+    # 0. 进程隔离模式在打包环境下需要此调用，子进程会在这里接管执行
+    multiprocessing.freeze_support()
+
     # 1. 为应用设置唯一的ID (为了任务栏图标)
     set_app_id("Tition.SysTools.1.0")
 
@@ -1,10 +1,224 @@
 import abc
-from typing import Any, Dict
+import time
+import asyncio
+import inspect
+import threading
+import contextlib
+from typing import Any, Callable, Dict, List, Optional
+
+
+class PluginCancelled(Exception):
+    """插件在执行过程中响应了停止请求"""
+    pass
+
+
+class CancellationToken:
+    """
+    协作式取消令牌。
+    插件在长循环中检查 is_cancelled 或调用 raise_if_cancelled()，即可在停止请求后几毫秒内退出。
+    event 可以是 threading.Event 或 multiprocessing.Event (进程隔离模式)。
+    """
+
+    def __init__(self, event=None):
+        self._event = event if event is not None else threading.Event()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def reset(self):
+        self._event.clear()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise PluginCancelled("用户取消")
+
+    def wait(self, timeout: float) -> bool:
+        """可被停止请求打断的 sleep，返回 True 表示已被取消"""
+        return self._event.wait(timeout)
+
+
+class ExecutionContext:
+    """
+    插件执行上下文，由引擎传给 execute(context)。
+    提供取消令牌、子进度报告 report_progress(fraction, message)、日志方法 log(message, level)
+    以及实时输出日志的子进程辅助方法 run_command() 和常驻 shell 会话 shell()。
+    子进度按 min_interval 节流后再转发给引擎，插件可以放心地在循环中频繁调用。
+    """
+
+    def __init__(self, plugin_name: str,
+                 cancel_token: Optional[CancellationToken] = None,
+                 progress_callback: Optional[Callable[[float, Optional[str]], None]] = None,
+                 log_callback: Optional[Callable[[str, str], None]] = None,
+                 min_interval: float = 0.1,
+                 shell_pool=None):
+        self.plugin_name = plugin_name
+        self.cancel_token = cancel_token or CancellationToken()
+        self._progress_callback = progress_callback
+        self._log_callback = log_callback
+        self.min_interval = min_interval
+        self.progress = 0.0
+        self.progress_message: Optional[str] = None
+        self._last_forward = 0.0
+        self._shell_pool = shell_pool
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_token.is_cancelled
+
+    def raise_if_cancelled(self):
+        self.cancel_token.raise_if_cancelled()
+
+    def report_progress(self, fraction: float, message: Optional[str] = None):
+        """报告插件内部进度 (0.0 ~ 1.0)，可附带一条当前步骤说明"""
+        self.progress = min(1.0, max(0.0, float(fraction)))
+        if message is not None:
+            self.progress_message = message
+        now = time.monotonic()
+        if self._progress_callback and (now - self._last_forward >= self.min_interval or self.progress >= 1.0):
+            self._last_forward = now
+            self._progress_callback(self.progress, self.progress_message)
+
+    def log(self, message: str, level: str = "info"):
+        self.emit_log(f"[{self.plugin_name}] {message}", level)
+
+    def run_command(self, command, **kwargs):
+        """
+        运行子进程，输出逐行实时写入日志，用户停止时结束子进程并抛出 PluginCancelled。
+        参数与返回值见 subprocess_stream.run_streaming()。
+        """
+        from subprocess_stream import run_streaming
+        return run_streaming(command, log=self.log, cancel_token=self.cancel_token, **kwargs)
+
+    @contextlib.contextmanager
+    def shell(self, flavor: Optional[str] = None):
+        """
+        从引擎的会话池借用一个常驻 shell 会话 (Windows 上默认为 PowerShell)，适合需要执行多条短命令的插件。
+        会话中命令的输出实时写入日志，用户停止时抛出 PluginCancelled。用法见 shell_pool.ShellSession.run()。
+        """
+        from shell_pool import get_default_pool
+        pool = self._shell_pool or get_default_pool()
+        with pool.session(flavor, log=self.log, cancel_token=self.cancel_token) as session:
+            yield session
+
+    def emit_log(self, message: str, level: str = "info"):
+        """输出已带插件名称前缀的日志 (进程隔离模式下父进程用它转发子进程中的 log() 调用)"""
+        if self._log_callback:
+            self._log_callback(message, level)
+        else:
+            print(f"[{level.upper()}] {message}")
+
+
+def _accepts_positional_argument(func) -> bool:
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD, p.VAR_POSITIONAL) for p in parameters)
+
+
+def plugin_accepts_context(plugin) -> bool:
+    """判断插件的 execute 是否接受执行上下文参数 (兼容旧的无参 execute())"""
+    return _accepts_positional_argument(plugin.execute)
+
+
+def plugin_is_async(plugin) -> bool:
+    """插件是否提供了 async def execute_async()"""
+    return inspect.iscoroutinefunction(getattr(plugin, 'execute_async', None))
+
+
+def call_execute(plugin, context: Optional[ExecutionContext]) -> Dict[str, Any]:
+    """按插件支持的签名调用 execute()；插件响应取消时返回用户取消的结果"""
+    try:
+        if context is not None and plugin_accepts_context(plugin):
+            return plugin.execute(context)
+        return plugin.execute()
+    except PluginCancelled:
+        return {'success': False, 'error': '用户取消', 'cancelled': True}
+
+
+async def call_execute_async(plugin, context: Optional[ExecutionContext]) -> Dict[str, Any]:
+    """call_execute() 的异步版本，用于调用插件的 execute_async()"""
+    try:
+        if context is not None and _accepts_positional_argument(plugin.execute_async):
+            return await plugin.execute_async(context)
+        return await plugin.execute_async()
+    except PluginCancelled:
+        return {'success': False, 'error': '用户取消', 'cancelled': True}
+
+
+def plugin_metadata(**metadata):
+    """
+    类装饰器：静态声明插件元数据，例如
+    @plugin_metadata(name="注册表修复", description="...", order=10, resources=["registry"], tags=["slow"])。
+    插件管理器通过 AST 读取这些参数，不导入模块即可列出插件，模块在插件被选中或执行时才会导入，
+    因此所有参数都必须是字面量。声明了 name / description 的类可以省略 get_name() / get_description()。
+    """
+
+    def decorate(cls):
+        cls.metadata = dict(metadata)
+        for key in ("depends_on", "conflicts_with", "resources", "timeout", "tags", "category", "phase"):
+            if key in metadata:
+                setattr(cls, key, metadata[key])
+        if "name" in metadata and "get_name" not in cls.__dict__:
+            cls.get_name = lambda self: metadata["name"]
+        if "description" in metadata and "get_description" not in cls.__dict__:
+            cls.get_description = lambda self: metadata["description"]
+        # 类创建时记录的抽象方法不会随之更新，这里重新计算
+        cls.__abstractmethods__ = frozenset(
+            name for name in getattr(cls, "__abstractmethods__", ())
+            if getattr(getattr(cls, name, None), "__isabstractmethod__", False))
+        return cls
+
+    return decorate
 
 
 class BasePlugin(metaclass=abc.ABCMeta):
     """插件基类，所有功能插件必须继承此类"""
 
+    # 静态元数据 (由 @plugin_metadata 设置)：name、description、order 以及下面的调度与分类元数据
+    metadata: Dict[str, Any] = {}
+
+    # --- 调度元数据 (并行模式使用，均以插件名称 get_name() 引用) ---
+    # depends_on: 必须先成功执行的插件；任一依赖失败时，本插件将被跳过
+    depends_on: List[str] = []
+    # conflicts_with: 不能与本插件同时运行的插件
+    conflicts_with: List[str] = []
+    # resources: 插件使用的资源标签，例如 "registry"、"disk"、"network-stack"；
+    # 同一资源上同时运行的插件数受引擎的资源上限约束，"exclusive" 表示运行期间独占整个系统
+    resources: List[str] = []
+
+    # --- 执行限制 (进程隔离模式使用) ---
+    # timeout: 单次执行的最长时间 (秒)，超时后插件进程将被强制终止；None 表示使用引擎默认值
+    timeout: Optional[float] = None
+
+    # --- 分类元数据 (插件查询使用，见 plugin_registry) ---
+    # tags: 自由标签，例如 "network"、"slow"；resources 中的资源标签同样可以按标签查询
+    tags: List[str] = []
+    # category: 插件所属的分类
+    category: Optional[str] = None
+    # phase: 插件所属的执行阶段 (整数)，None 表示不属于任何阶段
+    phase: Optional[int] = None
+
+    def __init_subclass__(cls, abstract: bool = False, **kwargs):
+        """
+        类创建时检查插件恰好实现了 execute() 与 async def execute_async() 之一，否则抛出 TypeError。
+        只提供公共方法、由具体插件继承的中间基类可以声明为 class MyBase(BasePlugin, abstract=True) 跳过检查。
+        """
+        super().__init_subclass__(**kwargs)
+        if abstract:
+            return
+        has_execute = cls.execute is not BasePlugin.execute
+        execute_async = getattr(cls, 'execute_async', None)
+        if execute_async is not None and not inspect.iscoroutinefunction(execute_async):
+            raise TypeError(f"插件类 {cls.__name__} 的 execute_async() 必须是 async def")
+        if has_execute == (execute_async is not None):
+            problem = "同时实现了" if has_execute else "未实现"
+            raise TypeError(f"插件类 {cls.__name__} {problem} execute() 与 execute_async()，两者必须恰好实现其一")
+
     @abc.abstractmethod
     def get_name(self) -> str:
         """返回插件名称"""
@@ -15,15 +229,36 @@ class BasePlugin(metaclass=abc.ABCMeta):
         """返回插件描述"""
         pass
 
-    @abc.abstractmethod
-    def execute(self) -> Dict[str, Any]:
-        """执行插件功能，返回执行结果"""
-        pass
+    def execute(self, context: Optional[ExecutionContext] = None) -> Dict[str, Any]:
+        """
+        执行插件功能，返回执行结果。
+        插件也可以声明为 execute(self, context)，以接收 ExecutionContext
+        (取消令牌、子进度报告与日志)；旧的无参形式仍然完全支持。
+
+        主要在等待子进程或文件 I/O 的插件可以改为实现 async def execute_async(self, context)，
+        无需覆盖本方法：asyncio 模式下它直接在引擎的事件循环中与其他插件并发运行，
+        其他模式下由这里的默认实现在新的事件循环中运行。
+        """
+        if plugin_is_async(self):
+            return asyncio.run(call_execute_async(self, context))
+        raise NotImplementedError(f"插件 {type(self).__name__} 必须实现 execute() 或 execute_async()")
 
     def is_available(self) -> bool:
         """检查插件是否可用"""
         return True
 
+    def fingerprint(self) -> Optional[str]:
+        """
+        返回描述插件目标状态的指纹 (可选)。
+        指纹与插件代码均未变化且上次执行成功时，引擎会报告“已是最新”并跳过执行。
+        返回 None 表示不使用结果缓存。
+        """
+        return None
+
+    def check_applied(self) -> bool:
+        """检查插件的目标状态是否已经生效 (可选)，返回 True 时引擎跳过执行"""
+        return False
+
     def get_progress_message(self) -> str:
         """返回执行时的进度消息"""
         return f"正在执行: {self.get_name()}"
\ No newline at end of file
@@ -0,0 +1,428 @@
+import os
+import io
+import sys
+import json
+import stat
+import hashlib
+import zipfile
+import zipimport
+import argparse
+import posixpath
+import py_compile
+import tempfile
+import threading
+import importlib.util
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from plugin_manifest import ManifestError, read_manifest_file
+from result_cache import get_default_cache_dir, hash_file
+
+
+# ======================================================
+# 插件包 (.stpkg)
+# 一个 zip 文件，根目录包含:
+#   manifest.json  包描述: {"format": 1, "name": ..., "version": ...,
+#                            "plugins": [{"module": ..., "class": ..., "name": ..., "description": ..., ...}],
+#                            "files": {"成员路径": "sha256", ...}}
+#   *.pyc          预编译的插件模块 (也可以是 .py)，通过 zipimport 直接从包中导入，不解压
+#   tools/...      插件使用的工具文件，通过 get_resources() 只读访问
+# manifest.json 之外的每个成员都必须列在 files 中且哈希一致，否则整个包不会被加载。
+# 用法: python plugin_bundle.py build -o plugins/50_reg.stpkg plugins/01_reg_repair.py --tools plugins/tools
+# ======================================================
+
+BUNDLE_SUFFIX = ".stpkg"
+MANIFEST_NAME = "manifest.json"
+BUNDLE_FORMAT = 1
+TOOLS_PREFIX = "tools/"
+
+_lock = threading.Lock()
+# 已打开的插件包: 包路径 -> PluginBundle
+_bundles: Dict[str, 'PluginBundle'] = {}
+# 从插件包导入的模块: 模块名 -> PluginBundle
+_module_bundles: Dict[str, 'PluginBundle'] = {}
+
+
+class BundleError(Exception):
+    """插件包格式错误或完整性校验失败"""
+    pass
+
+
+def _normalize_member(path: str) -> str:
+    """把资源路径规范化为包内的相对路径，拒绝绝对路径和 '..'"""
+    normalized = posixpath.normpath(path.replace("\\", "/")).lstrip("/")
+    if normalized in ("", ".") or normalized == ".." or normalized.startswith("../"):
+        raise ValueError(f"无效的资源路径: {path}")
+    return normalized
+
+
+class PluginResources:
+    """插件工具文件的只读访问接口；路径相对于工具目录，使用 '/' 分隔"""
+
+    def open(self, path: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def exists(self, path: str) -> bool:
+        raise NotImplementedError
+
+    def list(self, prefix: str = "") -> List[str]:
+        """列出 prefix 目录下 (递归) 的所有文件"""
+        raise NotImplementedError
+
+    def as_file(self, path: str) -> str:
+        """资源在文件系统中的路径，供需要真实文件的外部程序 (如 PowerShell 脚本) 使用，不应修改；资源不存在时抛出 FileNotFoundError"""
+        raise NotImplementedError
+
+    def read_bytes(self, path: str) -> bytes:
+        with self.open(path) as f:
+            return f.read()
+
+    def read_text(self, path: str, encoding: str = "utf-8") -> str:
+        return self.read_bytes(path).decode(encoding)
+
+
+class DirectoryResources(PluginResources):
+    """散装插件的工具目录 (plugins/tools)"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, path: str) -> str:
+        return os.path.join(self.root, *_normalize_member(path).split("/"))
+
+    def open(self, path: str) -> BinaryIO:
+        return open(self._path(path), "rb")
+
+    def exists(self, path: str) -> bool:
+        return os.path.isfile(self._path(path))
+
+    def list(self, prefix: str = "") -> List[str]:
+        base = self._path(prefix) if prefix else self.root
+        files = []
+        for directory, dirnames, filenames in os.walk(base):
+            dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+            for filename in filenames:
+                relative = os.path.relpath(os.path.join(directory, filename), self.root)
+                files.append(relative.replace(os.sep, "/"))
+        return sorted(files)
+
+    def as_file(self, path: str) -> str:
+        file_path = self._path(path)
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"没有资源: {file_path}")
+        return file_path
+
+
+class BundleResources(PluginResources):
+    """插件包中 tools/ 下的文件，直接从 zip 中读取"""
+
+    def __init__(self, bundle: 'PluginBundle'):
+        self.bundle = bundle
+        # 同一包的资源在多个线程中同时解出时依次进行
+        self._extract_lock = threading.Lock()
+
+    def _member(self, path: str) -> str:
+        return TOOLS_PREFIX + _normalize_member(path)
+
+    def open(self, path: str) -> BinaryIO:
+        member = self._member(path)
+        if not self.exists(path):
+            raise FileNotFoundError(f"{self.bundle.path} 中没有资源: {path}")
+        return io.BytesIO(self.bundle.read_member(member))
+
+    def exists(self, path: str) -> bool:
+        return self._member(path) in self.bundle.manifest["files"]
+
+    def list(self, prefix: str = "") -> List[str]:
+        start = self._member(prefix).rstrip("/") + "/" if prefix else TOOLS_PREFIX
+        return sorted(member[len(TOOLS_PREFIX):] for member in self.bundle.manifest["files"]
+                      if member.startswith(start))
+
+    def as_file(self, path: str) -> str:
+        """
+        把资源解出到缓存目录 (按包内容哈希区分版本) 并设为只读后返回其路径；
+        已解出且哈希一致时直接复用。先写入同目录下唯一的临时文件再替换，其他进程同时解出时也不会读到写了一半的文件。
+        """
+        member = self._member(path)
+        expected = self.bundle.manifest["files"].get(member)
+        if expected is None:
+            raise FileNotFoundError(f"{self.bundle.path} 中没有资源: {path}")
+        target = os.path.join(self.bundle.extract_dir(), *member.split("/"))
+        with self._extract_lock:
+            if os.path.isfile(target) and hash_file(target) == expected:
+                return target
+            data = self.bundle.read_member(member)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(target):
+                os.chmod(target, stat.S_IREAD | stat.S_IWRITE)
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(target) + ".", suffix=".tmp",
+                                            dir=os.path.dirname(target))
+            try:
+                with open(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, target)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            os.chmod(target, stat.S_IREAD)
+            return target
+
+
+class PluginBundle:
+    """一个 .stpkg 插件包：读取清单、校验内容哈希、通过 zipimport 导入其中的模块"""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.stat = _stat(self.path)
+        self.manifest = self._read_manifest()
+        self.resources = BundleResources(self)
+        self._modules: Dict[str, Any] = {}
+        self._importer: Optional[zipimport.zipimporter] = None
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with zipfile.ZipFile(self.path) as archive:
+                manifest = json.loads(archive.read(MANIFEST_NAME).decode("utf-8"))
+        except KeyError:
+            raise BundleError(f"插件包中没有 {MANIFEST_NAME}")
+        except (OSError, zipfile.BadZipFile, ValueError) as e:
+            raise BundleError(f"无法读取插件包: {e}")
+        if not isinstance(manifest, dict) or manifest.get("format") != BUNDLE_FORMAT:
+            raise BundleError(f"不支持的插件包格式: {manifest.get('format') if isinstance(manifest, dict) else None}")
+        if not isinstance(manifest.get("files"), dict) or not isinstance(manifest.get("plugins"), list):
+            raise BundleError("插件包清单缺少 files 或 plugins")
+        for entry in manifest["plugins"]:
+            missing = [key for key in ("module", "class", "name", "description") if key not in entry]
+            if missing:
+                raise BundleError(f"插件包清单中的插件缺少: {', '.join(missing)}")
+        return manifest
+
+    @property
+    def name(self) -> str:
+        return self.manifest.get("name") or os.path.basename(self.path)
+
+    def plugin_entries(self) -> List[Dict[str, Any]]:
+        """清单中声明的插件元数据 (与 plugin_manifest.read_manifest() 的返回格式相同，另含 'module')"""
+        return [dict(entry) for entry in self.manifest["plugins"]]
+
+    def verify(self):
+        """校验每个成员的 SHA-256 与清单一致，且没有清单之外的成员；失败时抛出 BundleError"""
+        expected = self.manifest["files"]
+        try:
+            with zipfile.ZipFile(self.path) as archive:
+                members = [info for info in archive.infolist() if not info.is_dir()]
+                names = {info.filename for info in members}
+                unlisted = names - set(expected) - {MANIFEST_NAME}
+                if unlisted:
+                    raise BundleError(f"插件包中有清单之外的文件: {', '.join(sorted(unlisted))}")
+                missing = set(expected) - names
+                if missing:
+                    raise BundleError(f"插件包中缺少文件: {', '.join(sorted(missing))}")
+                for info in members:
+                    if info.filename == MANIFEST_NAME:
+                        continue
+                    digest = hashlib.sha256()
+                    with archive.open(info) as f:
+                        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                            digest.update(chunk)
+                    if digest.hexdigest() != expected[info.filename]:
+                        raise BundleError(f"插件包中的文件已被修改: {info.filename}")
+        except (OSError, zipfile.BadZipFile) as e:
+            raise BundleError(f"无法读取插件包: {e}")
+
+    def read_member(self, member: str) -> bytes:
+        with zipfile.ZipFile(self.path) as archive:
+            return archive.read(member)
+
+    def extract_dir(self) -> str:
+        """as_file() 解出资源的目录，按包内容区分 (包更新后不会复用旧文件)"""
+        digest = hashlib.sha256(json.dumps(self.manifest["files"], sort_keys=True).encode("utf-8")).hexdigest()
+        return os.path.join(get_default_cache_dir(), "bundles", digest[:16])
+
+    def import_module(self, module_name: str):
+        """通过 zipimport 从包中导入模块 (每个包中的模块只执行一次)"""
+        with _lock:
+            module = self._modules.get(module_name)
+            if module is not None:
+                return module
+            if self._importer is None:
+                self._importer = zipimport.zipimporter(self.path)
+                # 包中的模块互相导入时通过 sys.path 找到本包
+                if self.path not in sys.path:
+                    sys.path.insert(0, self.path)
+            spec = self._importer.find_spec(module_name)
+            if spec is None:
+                raise ImportError(f"插件包 {self.name} 中没有模块 {module_name}")
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            _module_bundles[module_name] = self
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                sys.modules.pop(module_name, None)
+                _module_bundles.pop(module_name, None)
+                raise
+            self._modules[module_name] = module
+            return module
+
+    def unload(self):
+        """卸载从包中导入的模块 (包文件被替换后重新加载前调用)"""
+        with _lock:
+            for module_name in self._modules:
+                sys.modules.pop(module_name, None)
+                _module_bundles.pop(module_name, None)
+            self._modules.clear()
+            self._importer = None
+            zipimport._zip_directory_cache.pop(self.path, None)
+            if self.path in sys.path:
+                sys.path.remove(self.path)
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def open_bundle(path: str) -> PluginBundle:
+    """
+    打开插件包 (同一路径只打开一次，包文件的修改时间或大小变化后卸载旧模块并重新打开)。
+    这里不校验内容，校验由调用方按需进行 (见 PluginManager 与发现缓存)。
+    """
+    path = os.path.abspath(path)
+    with _lock:
+        bundle = _bundles.get(path)
+    if bundle is not None and bundle.stat != _stat(path):
+        close_bundle(path)
+        bundle = None
+    if bundle is None:
+        bundle = PluginBundle(path)
+        with _lock:
+            bundle = _bundles.setdefault(path, bundle)
+    return bundle
+
+
+def close_bundle(path: str):
+    """卸载并忘记插件包，下次 open_bundle() 时重新读取"""
+    with _lock:
+        bundle = _bundles.pop(os.path.abspath(path), None)
+    if bundle is not None:
+        bundle.unload()
+
+
+def get_resources(module_name: str) -> PluginResources:
+    """
+    插件模块的工具文件：从插件包导入的模块返回包中 tools/ 下的文件，
+    散装插件返回模块所在目录下的 tools 目录。插件中一般写作 get_resources(__name__)。
+    """
+    with _lock:
+        bundle = _module_bundles.get(module_name)
+    if bundle is not None:
+        return bundle.resources
+    module = sys.modules.get(module_name)
+    module_file = getattr(module, "__file__", None)
+    base_dir = os.path.dirname(os.path.abspath(module_file)) if module_file else os.getcwd()
+    return DirectoryResources(os.path.join(base_dir, "tools"))
+
+
+# ======================================================
+# 构建插件包
+# ======================================================
+
+def _compile(source_path: str) -> bytes:
+    """把源文件编译为不校验源文件的 .pyc 内容 (包中没有源文件可供校验)"""
+    fd, cfile = tempfile.mkstemp(suffix=".pyc")
+    os.close(fd)
+    try:
+        py_compile.compile(source_path, cfile=cfile, doraise=True,
+                           invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        with open(cfile, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(cfile)
+
+
+def build_bundle(output: str, modules: List[str], tools_dir: Optional[str] = None, name: Optional[str] = None,
+                 version: str = "1.0", include_source: bool = False) -> Dict[str, Any]:
+    """
+    把插件模块 (必须声明 @plugin_metadata 或 PLUGIN_MANIFEST) 与工具目录打成一个插件包，返回其清单。
+    模块默认编译为当前 Python 版本的 .pyc；include_source 为 True 时保留 .py 源文件。
+    """
+    members: Dict[str, bytes] = {}
+    plugins = []
+    for source_path in modules:
+        module_name = os.path.splitext(os.path.basename(source_path))[0]
+        try:
+            entries = read_manifest_file(source_path)
+        except (ManifestError, SyntaxError) as e:
+            raise BundleError(f"{source_path}: 清单无法静态读取: {e}")
+        if not entries:
+            raise BundleError(f"{source_path}: 没有声明 @plugin_metadata 或 PLUGIN_MANIFEST，无法不导入就列出插件")
+        for entry in entries:
+            entry["module"] = module_name
+            plugins.append(entry)
+        if include_source:
+            with open(source_path, "rb") as f:
+                members[f"{module_name}.py"] = f.read()
+        else:
+            members[f"{module_name}.pyc"] = _compile(source_path)
+
+    if tools_dir:
+        for resource in DirectoryResources(tools_dir).list():
+            if resource.endswith(".pyc"):
+                continue
+            with open(os.path.join(tools_dir, *resource.split("/")), "rb") as f:
+                members[TOOLS_PREFIX + resource] = f.read()
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "name": name or os.path.splitext(os.path.basename(output))[0],
+        "version": version,
+        "python": f"{sys.version_info[0]}.{sys.version_info[1]}",
+        "plugins": plugins,
+        "files": {member: hashlib.sha256(data).hexdigest() for member, data in sorted(members.items())},
+    }
+    tmp_path = output + ".tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=1))
+        for member, data in sorted(members.items()):
+            archive.writestr(member, data)
+    os.replace(tmp_path, output)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建或检查 SysTools 插件包 (.stpkg)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="把插件模块与工具文件打成插件包")
+    build.add_argument("modules", nargs="+", help="插件源文件 (需声明 @plugin_metadata 或 PLUGIN_MANIFEST)")
+    build.add_argument("-o", "--output", required=True, help=f"输出文件 (*{BUNDLE_SUFFIX})")
+    build.add_argument("--tools", help="工具文件目录，打包为 tools/ 下的只读资源")
+    build.add_argument("--name", help="包名称 (默认为输出文件名)")
+    build.add_argument("--version", default="1.0", help="包版本 (默认: 1.0)")
+    build.add_argument("--source", action="store_true", help="保留 .py 源文件而不是编译为 .pyc")
+    check = commands.add_parser("verify", help="校验插件包的完整性并列出其中的插件")
+    check.add_argument("bundle", help="插件包路径")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            manifest = build_bundle(args.output, args.modules, args.tools, args.name, args.version, args.source)
+            print(f"已生成 {args.output}: {len(manifest['plugins'])} 个插件，{len(manifest['files'])} 个文件")
+        else:
+            bundle = PluginBundle(args.bundle)
+            bundle.verify()
+            print(f"{bundle.name} {bundle.manifest.get('version', '')} (Python {bundle.manifest.get('python', '?')}) 校验通过")
+            for entry in bundle.plugin_entries():
+                print(f"  - {entry['name']} ({entry['module']}.{entry['class']})")
+    except BundleError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
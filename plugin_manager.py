@@ -2,16 +2,88 @@ import os
 import importlib
 import sys
 import io
-from typing import List
-from plugin_base import BasePlugin
+import time
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from plugin_base import BasePlugin, plugin_is_async
+from plugin_manifest import PLUGIN_ATTRIBUTES, LazyPlugin, ManifestError, read_module_declarations
+from plugin_registry import PluginRegistry
+from discovery_cache import DiscoveryCache
+from bytecode_cache import BytecodeCache
+from plugin_bundle import BUNDLE_SUFFIX, BundleError, close_bundle, open_bundle
+
+try:
+    from importlib import metadata as importlib_metadata
+except ImportError:
+    importlib_metadata = None
+
+
+# 通过 importlib.metadata 入口点注册插件的组名，例如在发行包的 pyproject.toml 中:
+#   [project.entry-points."systools.plugins"]
+#   net_reset = "team_net.net_reset:NetResetPlugin"   (省略 ":类名" 时加载模块中的所有插件类)
+ENTRY_POINT_GROUP = "systools.plugins"
+
+# 缺少依赖导致的导入错误在安装依赖后就会消失 (插件文件不变)，不写入发现缓存，下次发现时重新导入
+UNCACHED_IMPORT_ERRORS = ("ImportError:", "ModuleNotFoundError:")
+
+
+@dataclass
+class _ImportTask:
+    """发现阶段中需要导入才能得到插件的模块 (没有清单，也没有有效的发现缓存)"""
+    key: str
+    label: str
+    module_name: str
+    module_file: Optional[str]
+    thread_safe: bool
+    class_name: Optional[str] = None
+
+
+@dataclass
+class PluginDiff:
+    """两次发现之间插件列表的差异 (均为插件实例；removed 中为旧实例，updated 中为新实例)"""
+    added: List[BasePlugin] = field(default_factory=list)
+    removed: List[BasePlugin] = field(default_factory=list)
+    updated: List[BasePlugin] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.updated)
 
 
 class PluginManager:
     """插件管理器，负责动态加载和管理插件"""
 
-    def __init__(self, plugins_dir: str = "plugins"):
+    def __init__(self, plugins_dir: str = "plugins", cache: Optional[DiscoveryCache] = None,
+                 bytecode_cache: Optional[BytecodeCache] = None, import_workers: int = 8):
         self.plugins_dir = plugins_dir
         self.plugins: List[BasePlugin] = []
+        # 插件列表的名称/标签/分类/阶段索引，随 self.plugins 一起替换
+        self.registry = PluginRegistry()
+        # 发现结果的持久缓存 (None 表示每次都重新解析和导入)
+        self.cache = cache
+        # 插件字节码缓存 (None 表示由 Python 自行决定是否写入 __pycache__)
+        self.bytecode_cache = bytecode_cache
+        # 本轮发现中已导入的模块，同一模块中的多个插件类只导入一次
+        self._imported_modules: Dict[str, object] = {}
+        # 刷新或重新加载后需要从磁盘重新导入的模块：下次导入前先从 sys.modules 中移除
+        self._stale_modules: Set[str] = set()
+        # 每个模块一把导入锁：发现时的并行导入与 LazyPlugin 的按需加载可能同时导入同一模块
+        self._module_locks: Dict[str, threading.RLock] = {}
+        self._module_locks_guard = threading.Lock()
+        # 本轮发现中导入失败的模块: 模块名 -> 错误信息
+        self.import_errors: Dict[str, str] = {}
+        # 模块的导入耗时 (秒): 模块名 -> 耗时，包括发现时的导入与 LazyPlugin 按需加载时的导入
+        self.import_times: Dict[str, float] = {}
+        # 并行导入声明了 PLUGIN_IMPORT_THREAD_SAFE 的模块时使用的线程数 (1 表示全部依次导入)
+        self.import_workers = import_workers
+        # 通过入口点注册的插件: 入口点名称 -> 插件 (排在插件目录中的插件之后)
+        self._entry_point_plugins: Dict[str, List[BasePlugin]] = {}
+        # 每个插件文件发现的插件与发现时的 (修改时间, 大小)，增量刷新据此判断哪些文件需要重新加载
+        self._file_plugins: Dict[str, List[BasePlugin]] = {}
+        self._file_stats: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._lock = threading.RLock()
 
         # 修复编码问题
         self._fix_encoding()
@@ -39,73 +111,466 @@ class PluginManager:
                 print(f"[WARNING] 在 plugin_manager.py 中修复编码失败: {str(e)}")
 
     def discover_plugins(self) -> List[BasePlugin]:
-        """发现并加载所有插件"""
-        self.plugins.clear()
-
+        """
+        发现并加载所有插件。
+        声明了清单 (@plugin_metadata 或 PLUGIN_MANIFEST) 的模块只通过 AST 读取元数据，登记为 LazyPlugin，
+        在检查可用性或执行时才导入；其余模块立即导入并实例化。
+        这里不检查插件是否可用 (is_available() 可能很慢)，由 AvailabilityProber 在后台并发检查。
+        启用了发现缓存时，未修改的文件直接使用缓存的元数据登记为 LazyPlugin，既不解析也不导入。
+        插件目录中含 __init__.py 的子目录作为包递归发现，其中的模块以 "包名.模块名" 导入；
+        此外还会发现通过入口点 (组 systools.plugins) 注册的插件。
+        """
+        with self._lock:
+            started = time.perf_counter()
+            # 重新发现时，之前导入过的模块要从磁盘重新导入 (首次发现时直接使用 sys.modules 中已有的模块)
+            self._stale_modules.update(self._imported_modules)
+            self._imported_modules.clear()
+            self.import_errors.clear()
+            self.import_times.clear()
+            self._file_plugins.clear()
+            self._file_stats.clear()
+            if self.cache is not None:
+                self.cache.reset_stats()
+
+            # 插件目录不存在时仍然发现入口点注册的插件
+            plugin_files = self._list_plugin_files() or []
+
+            print(f"[INFO] 发现并排序后的插件文件: {plugin_files}")
+            self._precompile()
+
+            for filename in plugin_files:
+                self._file_stats[filename] = self._stat_file(filename)
+            self._file_plugins.update(self._discover_files(plugin_files))
+            self._entry_point_plugins = self._discover_entry_points()
+            self._set_plugins(self._ordered_plugins())
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if self.cache is not None:
+                self._save_cache()
+                print(f"[INFO] 插件发现耗时 {elapsed_ms:.0f} 毫秒 "
+                      f"(发现缓存命中 {self.cache.hits}/{len(plugin_files)} 个文件)")
+            else:
+                print(f"[INFO] 插件发现耗时 {elapsed_ms:.0f} 毫秒")
+            self.report_import_times()
+            print(f"[INFO] 最终按顺序加载了 {len(self.plugins)} 个插件")
+            return self.plugins
+
+    def refresh(self) -> PluginDiff:
+        """
+        增量刷新：只重新发现修改时间或大小发生变化的插件文件 (以及新增、删除的文件)，
+        只重新导入这些模块；未变化的文件保留原有的插件实例。
+        新的插件列表构建完成后一次性替换 self.plugins，返回与刷新前相比的差异。
+        入口点注册的插件随发行包安装，只在 discover_plugins() 时重新发现。
+        """
+        with self._lock:
+            if not self._file_stats:
+                previous = list(self.plugins)
+                return self._diff(previous, self.discover_plugins())
+
+            plugin_files = self._list_plugin_files()
+            if plugin_files is None:
+                return PluginDiff()
+            stats = {filename: self._stat_file(filename) for filename in plugin_files}
+            changed = [f for f in plugin_files if self._file_stats.get(f) != stats[f]]
+            removed = [f for f in self._file_plugins if f not in stats]
+            if not changed and not removed:
+                return PluginDiff()
+            self._precompile()
+
+            for filename in removed:
+                print(f"[INFO] [{filename}] 插件文件已删除")
+                self._forget_file(filename)
+                del self._file_plugins[filename]
+                del self._file_stats[filename]
+            for filename in changed:
+                print(f"[INFO] [{filename}] 插件文件已变化，重新加载")
+                self._forget_file(filename)
+                self._file_stats[filename] = stats[filename]
+            self._file_plugins.update(self._discover_files(changed))
+            if self.cache is not None:
+                self._save_cache()
+
+            previous = self.plugins
+            self._set_plugins(self._ordered_plugins())
+            return self._diff(previous, self.plugins)
+
+    def _list_plugin_files(self) -> Optional[List[str]]:
+        """
+        插件目录 (及其中的包) 中按相对路径排序的 .py 文件与 .stpkg 插件包，路径以 '/' 分隔；
+        目录不存在或无法读取时返回 None
+        """
         if not os.path.exists(self.plugins_dir):
             print(f"[WARNING] 插件目录不存在: {self.plugins_dir}")
-            return []
+            return None
 
         # 将插件目录添加到Python路径
         if self.plugins_dir not in sys.path:
             sys.path.insert(0, self.plugins_dir)
 
-        # 遍历plugins目录下的所有.py文件
+        # 遍历plugins目录及其中的包下的所有.py文件
         plugin_files = []
         try:
-            for filename in os.listdir(self.plugins_dir):
-                if filename.endswith('.py') and not filename.startswith('__'):
-                    plugin_files.append(filename)
+            self._collect_plugin_files(self.plugins_dir, "", plugin_files)
         except Exception as e:
             print(f"[ERROR] 读取插件目录失败: {str(e)}")
-            return []
+            return None
 
         # ===================================================================
         # Python的默认字符串排序对于 "01_xxx.py", "02_xxx.py" 这种格式是完美的
         # ===================================================================
         plugin_files.sort()
+        return plugin_files
+
+    def _collect_plugin_files(self, directory: str, prefix: str, plugin_files: List[str]):
+        """递归收集插件文件 (相对于插件目录，以 / 分隔)；插件包只在插件目录顶层查找"""
+        for entry in os.scandir(directory):
+            if entry.name.startswith(('__', '.')):
+                continue
+            if entry.is_dir():
+                # 只进入包 (含 __init__.py 的目录)；tools 等普通目录中的文件不是插件
+                if os.path.isfile(os.path.join(entry.path, '__init__.py')):
+                    self._collect_plugin_files(entry.path, f"{prefix}{entry.name}/", plugin_files)
+            elif entry.name.endswith('.py') or (not prefix and entry.name.endswith(BUNDLE_SUFFIX)):
+                plugin_files.append(prefix + entry.name)
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.plugins_dir, *filename.split('/'))
+
+    @staticmethod
+    def _module_name(filename: str) -> str:
+        """插件文件的模块名: 移除 .py 后缀，包中的模块为 包名.模块名"""
+        return filename[:-3].replace('/', '.')
+
+    def _precompile(self):
+        """让导入使用字节码缓存，并在后台把插件与工具模块预编译到缓存中 (只编译内容变化过的文件)"""
+        if self.bytecode_cache is not None:
+            self.bytecode_cache.activate()
+            self.bytecode_cache.precompile_async([self.plugins_dir])
+
+    def _stat_file(self, filename: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._path(filename))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _forget_module(self, module_name: str):
+        """丢弃模块的导入结果，下次需要时从磁盘重新导入"""
+        self._imported_modules.pop(module_name, None)
+        self._stale_modules.add(module_name)
+        self.import_errors.pop(module_name, None)
+
+    def _forget_file(self, filename: str):
+        """丢弃插件文件的导入结果；插件包还会卸载从包中导入的模块"""
+        if filename.endswith(BUNDLE_SUFFIX):
+            close_bundle(self._path(filename))
+            self.import_errors.pop(filename, None)
+        else:
+            self._forget_module(self._module_name(filename))
+
+    def _set_plugins(self, plugins: List[BasePlugin]):
+        """替换插件列表，并为新列表重建索引"""
+        self.registry = PluginRegistry(plugins)
+        self.plugins = plugins
+
+    def _ordered_plugins(self) -> List[BasePlugin]:
+        plugins = [plugin for filename in sorted(self._file_plugins) for plugin in self._file_plugins[filename]]
+        plugins += [plugin for name in sorted(self._entry_point_plugins) for plugin in self._entry_point_plugins[name]]
+        # 清单中的 order 越小越靠前 (未声明为 0)，相同时保持文件名顺序
+        plugins.sort(key=lambda p: p.metadata.get('order', 0))
+        return plugins
 
-        print(f"[INFO] 发现并排序后的插件文件: {plugin_files}")
+    def _save_cache(self):
+        self.cache.prune(self.plugins_dir, [self._path(f) for f in self._file_plugins])
+        self.cache.save()
+
+    @staticmethod
+    def _diff(previous: List[BasePlugin], current: List[BasePlugin]) -> PluginDiff:
+        """按插件名称比较两个列表：名称相同但实例不同的插件视为已更新"""
+        old = {plugin.get_name(): plugin for plugin in previous}
+        new = {plugin.get_name(): plugin for plugin in current}
+        return PluginDiff(added=[p for name, p in new.items() if name not in old],
+                          removed=[p for name, p in old.items() if name not in new],
+                          updated=[p for name, p in new.items() if name in old and old[name] is not p])
+
+    def _discover_files(self, filenames: List[str]) -> Dict[str, List[BasePlugin]]:
+        """
+        发现一组插件文件：先依次读取发现缓存与静态清单，需要导入的模块再统一导入
+        (声明了 PLUGIN_IMPORT_THREAD_SAFE = True 的模块在线程池中并行导入，其余模块依次导入)。
+        导入结果按文件名顺序处理，日志与插件列表的顺序与导入完成的先后无关。
+        """
+        results: Dict[str, List[BasePlugin]] = {}
+        tasks: List[_ImportTask] = []
+        for filename in filenames:
+            discovered = self._discover_file(filename)
+            if isinstance(discovered, _ImportTask):
+                tasks.append(discovered)
+            else:
+                results[filename] = discovered
+        for task, plugins_in_module in self._run_imports(tasks):
+            results[task.key] = self._finish_import(task, plugins_in_module)
+        return results
+
+    def _discover_file(self, filename: str) -> Union[List[BasePlugin], _ImportTask]:
+        """发现单个插件文件中的插件 (发现缓存 -> 静态清单)，需要导入时返回导入任务"""
+        if filename.endswith(BUNDLE_SUFFIX):
+            return self._discover_bundle(filename)
+        return self._discover_module(filename, filename, self._module_name(filename), self._path(filename))
+
+    def _discover_module(self, key: str, label: str, module_name: str, module_file: str,
+                         class_name: Optional[str] = None) -> Union[List[BasePlugin], _ImportTask]:
+        """从发现缓存或静态清单登记模块中的插件 (class_name 不为 None 时只登记该类)，都没有时返回导入任务"""
+        entry = self.cache.lookup(module_file) if self.cache is not None else None
+        if entry is not None:
+            entries = [e for e in entry['plugins'] if class_name is None or e['class'] == class_name]
+            plugins = self._create_lazy_plugins(module_name, module_file, entries)
+            for plugin in plugins:
+                print(f"[INFO] [{label}] 从发现缓存登记插件 (按需导入): {plugin.get_name()}")
+            if entry['error']:
+                self.import_errors[module_name] = entry['error']
+                print(f"[WARNING] [{label}] 导入失败 (发现缓存，修改文件后重试): {entry['error']}")
+            return plugins
+
+        lazy_plugins, thread_safe = self._read_lazy_plugins(module_name, module_file)
+        if lazy_plugins:
+            if self.cache is not None:
+                self.cache.store(module_file, 'manifest', [plugin.metadata for plugin in lazy_plugins])
+            lazy_plugins = [p for p in lazy_plugins if class_name is None or p.class_name == class_name]
+            for plugin in lazy_plugins:
+                print(f"[INFO] [{label}] 从清单登记插件 (按需导入): {plugin.get_name()}")
+            return lazy_plugins
+        return _ImportTask(key, label, module_name, module_file, thread_safe, class_name)
+
+    def _run_imports(self, tasks: List[_ImportTask]) -> List[Tuple[_ImportTask, List[BasePlugin]]]:
+        """
+        执行导入任务，按任务顺序返回 (任务, 模块中的插件)。
+        未声明线程安全的模块先在当前线程中依次导入，之后声明了线程安全的模块在线程池中并行导入。
+        """
+        parallel = [task for task in tasks if task.thread_safe] if self.import_workers > 1 else []
+        results: Dict[str, List[BasePlugin]] = {}
+        for task in tasks:
+            if not (task.thread_safe and parallel):
+                results[task.key] = self._import_task(task)
+        if len(parallel) > 1:
+            started = time.perf_counter()
+            workers = min(self.import_workers, len(parallel))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="PluginImport") as executor:
+                for task, plugins_in_module in zip(parallel, executor.map(self._import_task, parallel)):
+                    results[task.key] = plugins_in_module
+            print(f"[INFO] 并行导入了 {len(parallel)} 个声明线程安全的模块 ({workers} 个线程)，"
+                  f"耗时 {(time.perf_counter() - started) * 1000:.0f} 毫秒")
+        elif parallel:
+            results[parallel[0].key] = self._import_task(parallel[0])
+        return [(task, results[task.key]) for task in tasks]
+
+    def _import_task(self, task: _ImportTask) -> List[BasePlugin]:
+        """导入模块并实例化其中的插件类，记录导入耗时 (可能在导入线程中调用，不输出日志)"""
+        started = time.perf_counter()
+        plugins_in_module = self._load_plugin_module(task.module_name)
+        self.import_times[task.module_name] = time.perf_counter() - started
+        return plugins_in_module
+
+    def _finish_import(self, task: _ImportTask, plugins_in_module: List[BasePlugin]) -> List[BasePlugin]:
+        """记录导入结果到发现缓存 (模块中的全部插件)，并校验插件 (class_name 不为 None 时只保留该类)"""
+        plugins = []
+        try:
+            error = self.import_errors.get(task.module_name)
+            if self.cache is not None and task.module_file is not None \
+                    and not (error and error.startswith(UNCACHED_IMPORT_ERRORS)):
+                self.cache.store(task.module_file, 'import', [self._describe_plugin(p) for p in plugins_in_module],
+                                 error)
+            if task.class_name is not None:
+                plugins_in_module = [p for p in plugins_in_module if type(p).__name__ == task.class_name]
+            if task.module_name in self.import_errors:
+                print(f"[WARNING] [{task.label}] 导入失败: {self.import_errors[task.module_name]}")
+
+            for plugin in plugins_in_module:
+                if plugin and self._validate_plugin(plugin):
+                    plugins.append(plugin)
+                    print(f"[INFO] [{task.label}] 成功加载插件: {plugin.get_name()}")
+                elif plugin:
+                    print(f"[WARNING] [{task.label}] 插件验证失败: {plugin.get_name()}")
+        except Exception as e:
+            print(f"[ERROR] 加载文件 {task.label} 失败: {e}")
+        return plugins
 
-        # 按排序后的顺序，依次加载每个插件文件
-        loaded_count = 0
-        for filename in plugin_files:
-            module_name = filename[:-3]  # 移除.py后缀
+    def _discover_entry_points(self) -> Dict[str, List[BasePlugin]]:
+        """
+        发现通过入口点 (组 systools.plugins) 注册的插件。
+        能找到模块源文件时与插件目录中的模块一样先查发现缓存与清单 (有清单则按需导入)，否则立即导入。
+        """
+        results: Dict[str, List[BasePlugin]] = {}
+        tasks: List[_ImportTask] = []
+        for entry_point in self._entry_points():
+            label = f"入口点 {entry_point.name}"
+            module_name, _, class_name = entry_point.value.partition(':')
+            module_name, class_name = module_name.strip(), class_name.strip() or None
             try:
-                # self.logger.info(f"正在加载模块: {module_name}") # 日志太多可以注释掉
-                plugins_in_module = self._load_plugin_module(module_name)
-
-                for plugin in plugins_in_module:
-                    if plugin and self._validate_plugin(plugin):
-                        # 因为文件是有序加载的，所以append进去的插件列表自然也是有序的
-                        self.plugins.append(plugin)
-                        loaded_count += 1
-                        print(f"[INFO] [{filename}] 成功加载插件: {plugin.get_name()}")
-                    elif plugin:
-                        print(f"[WARNING] [{filename}] 插件验证失败: {plugin.get_name()}")
-            except Exception as e:
-                self.logger.error(f"加载文件 {filename} 失败: {e}")
+                spec = importlib.util.find_spec(module_name)
+            except (ImportError, ValueError) as e:
+                print(f"[ERROR] [{label}] 找不到模块 {module_name}: {e}")
+                continue
+            if spec is None:
+                print(f"[ERROR] [{label}] 找不到模块 {module_name}")
+                continue
+            module_file = spec.origin if spec.origin and spec.origin.endswith('.py') else None
+            if module_file is not None:
+                discovered = self._discover_module(entry_point.name, label, module_name, module_file, class_name)
+            else:
+                discovered = _ImportTask(entry_point.name, label, module_name, None, False, class_name)
+            if isinstance(discovered, _ImportTask):
+                tasks.append(discovered)
+            else:
+                results[entry_point.name] = discovered
+        for task, plugins_in_module in self._run_imports(tasks):
+            results[task.key] = self._finish_import(task, plugins_in_module)
+        return results
+
+    @staticmethod
+    def _entry_points() -> list:
+        """组 systools.plugins 中的入口点，按名称排序 (多个发行包注册了同名入口点时只使用第一个)"""
+        if importlib_metadata is None:
+            return []
+        try:
+            entry_points = importlib_metadata.entry_points(group=ENTRY_POINT_GROUP)
+        except TypeError:
+            # Python 3.9 及更早版本的 entry_points() 不接受 group 参数
+            entry_points = importlib_metadata.entry_points().get(ENTRY_POINT_GROUP, [])
+        unique = {}
+        for entry_point in entry_points:
+            unique.setdefault(entry_point.name, entry_point)
+        return [unique[name] for name in sorted(unique)]
+
+    def report_import_times(self, limit: int = 10):
+        """输出已导入的插件模块数、累计导入耗时与最慢的几个模块"""
+        if not self.import_times:
+            return
+        slowest = sorted(self.import_times.items(), key=lambda item: item[1], reverse=True)
+        total_ms = sum(self.import_times.values()) * 1000
+        print(f"[INFO] 导入了 {len(slowest)} 个插件模块，累计耗时 {total_ms:.0f} 毫秒，最慢的模块:")
+        for module_name, seconds in slowest[:limit]:
+            print(f"[INFO]   {module_name}: {seconds * 1000:.1f} 毫秒")
+
+    def _discover_bundle(self, filename: str) -> List[BasePlugin]:
+        """
+        发现插件包中的插件 (均登记为 LazyPlugin，执行时通过 zipimport 从包中导入)。
+        包的内容哈希只在包文件变化后校验一次：校验结果随发现缓存保存，修改时间与大小未变化时直接使用。
+        """
+        bundle_file = self._path(filename)
+        entry = self.cache.lookup(bundle_file) if self.cache is not None else None
+        if entry is not None:
+            if entry['error']:
+                self.import_errors[filename] = entry['error']
+                print(f"[WARNING] [{filename}] 插件包无效 (发现缓存，修改文件后重试): {entry['error']}")
+                return []
+            entries, source = entry['plugins'], "发现缓存"
+        else:
+            try:
+                bundle = open_bundle(bundle_file)
+                bundle.verify()
+                entries, source = bundle.plugin_entries(), "插件包"
+            except BundleError as e:
+                close_bundle(bundle_file)
+                self.import_errors[filename] = str(e)
+                print(f"[ERROR] [{filename}] 插件包无效，已跳过: {e}")
+                if self.cache is not None:
+                    self.cache.store(bundle_file, 'bundle', [], str(e))
+                return []
+            if self.cache is not None:
+                self.cache.store(bundle_file, 'bundle', entries)
+
+        plugins = [LazyPlugin(dict(item), item['module'], bundle_file,
+                              loader=lambda module_name=item['module'], class_name=item['class']:
+                              self._instantiate(module_name, class_name, bundle_file))
+                   for item in entries]
+        for plugin in plugins:
+            print(f"[INFO] [{filename}] 从{source}登记插件 (按需导入): {plugin.get_name()}")
+        return plugins
 
-        print(f"[INFO] 最终按顺序加载了 {loaded_count} 个可用插件")
-        return self.plugins
+    def _read_lazy_plugins(self, module_name: str, module_file: str) -> Tuple[List[LazyPlugin], bool]:
+        """
+        读取模块的静态清单并创建 LazyPlugin，同时返回模块是否声明了可以在线程中并行导入；
+        模块没有清单或清单无法读取时插件列表为空 (改为立即导入)
+        """
+        try:
+            entries, thread_safe = read_module_declarations(module_file)
+        except ManifestError as e:
+            print(f"[WARNING] [{os.path.basename(module_file)}] 清单无法静态读取，改为直接导入: {e}")
+            return [], False
+        except (OSError, SyntaxError, UnicodeDecodeError):
+            # 读取或语法错误留给导入时报告
+            return [], False
+        return self._create_lazy_plugins(module_name, module_file, entries), thread_safe
+
+    def _create_lazy_plugins(self, module_name: str, module_file: str,
+                             entries: List[Dict[str, Any]]) -> List[LazyPlugin]:
+        return [LazyPlugin(dict(entry), module_name, module_file,
+                           loader=lambda class_name=entry['class']: self._instantiate(module_name, class_name))
+                for entry in entries]
+
+    @staticmethod
+    def _describe_plugin(plugin: BasePlugin) -> Dict[str, Any]:
+        """导入得到的插件实例的元数据，写入发现缓存后，下次发现时无需再导入即可登记"""
+        metadata = dict(type(plugin).metadata)
+        metadata.update(name=plugin.get_name(), description=plugin.get_description(), **{
+            key: getattr(plugin, key) for key in PLUGIN_ATTRIBUTES})
+        metadata['class'] = type(plugin).__name__
+        return metadata
+
+    def _instantiate(self, module_name: str, class_name: str, bundle_file: Optional[str] = None) -> BasePlugin:
+        """导入模块并实例化指定的插件类 (LazyPlugin 的加载函数)；bundle_file 为模块所在的插件包"""
+        if self.plugins_dir not in sys.path:
+            sys.path.insert(0, self.plugins_dir)
+        started = time.perf_counter()
+        if bundle_file is not None:
+            module = open_bundle(bundle_file).import_module(module_name)
+        else:
+            module = self._import_module(module_name)
+        self.import_times.setdefault(module_name, time.perf_counter() - started)
+        plugin_class = getattr(module, class_name, None)
+        if not (isinstance(plugin_class, type) and issubclass(plugin_class, BasePlugin)):
+            raise ImportError(f"模块 {module_name} 中没有插件类 {class_name}")
+        plugin = plugin_class()
+        if not self._check_plugin_interface(plugin):
+            raise TypeError(f"插件类 {class_name} 未实现 execute() 或 execute_async()")
+        return plugin
+
+    def _module_lock(self, module_name: str) -> threading.RLock:
+        with self._module_locks_guard:
+            lock = self._module_locks.get(module_name)
+            if lock is None:
+                lock = self._module_locks[module_name] = threading.RLock()
+            return lock
+
+    def _import_module(self, module_name: str):
+        """
+        导入插件模块并记录到本轮发现已导入的模块中 (同一模块的查找、导入与记录在该模块的锁内完成)。
+        只有刷新或重新加载后的第一次导入会先从 sys.modules 中移除旧模块，其余情况与普通 import 相同
+        """
+        with self._module_lock(module_name):
+            module = self._imported_modules.get(module_name)
+            if module is not None:
+                return module
+            if module_name in self._stale_modules:
+                sys.modules.pop(module_name, None)
+                self._stale_modules.discard(module_name)
+            module = importlib.import_module(module_name)
+            self._imported_modules[module_name] = module
+            return module
+
+    def _check_plugin_interface(self, plugin: BasePlugin) -> bool:
+        """检查插件是否实现了必要的方法"""
+        required_methods = ['get_name', 'get_description', 'execute']
+        for method in required_methods:
+            if not hasattr(plugin, method) or not callable(getattr(plugin, method)):
+                return False
+        # execute() 与 execute_async() 至少实现其一
+        return not (type(plugin).execute is BasePlugin.execute and not plugin_is_async(plugin))
 
     def _validate_plugin(self, plugin: BasePlugin) -> bool:
-        """验证插件是否有效"""
+        """验证插件是否有效 (不检查是否可用，见 AvailabilityProber)"""
         try:
-            # 检查必要的方法是否存在
-            required_methods = ['get_name', 'get_description', 'execute']
-            for method in required_methods:
-                if not hasattr(plugin, method) or not callable(getattr(plugin, method)):
-                    # self.logger.warning(f"插件缺少 {method} 方法: {type(plugin)}")
-                    return False
-
-            # 检查插件是否可用
-            if hasattr(plugin, 'is_available') and callable(plugin.is_available):
-                return plugin.is_available()
-            else:
-                # 如果没有is_available方法，默认可用
-                return True
-
+            return self._check_plugin_interface(plugin)
         except Exception as e:
             print(f"[ERROR] 验证插件失败: {e}")
             return False
@@ -115,11 +580,7 @@ class PluginManager:
         plugins = []
 
         try:
-            # 清除模块缓存，确保重新加载
-            if module_name in sys.modules:
-                del sys.modules[module_name]
-
-            module = importlib.import_module(module_name)
+            module = self._import_module(module_name)
 
             # 查找模块中所有继承自BasePlugin的类
             for attr_name in dir(module):
@@ -140,9 +601,9 @@ class PluginManager:
                         print(f"[ERROR] 实例化类 {attr_name} 失败: {e}")
 
         except Exception as e:
-            # 简化错误日志，避免在控制台刷屏
+            # 简化错误日志，避免在控制台刷屏；错误信息记录下来，由调用方统一输出并写入发现缓存
             # self.logger.error(f"导入模块 {module_name} 失败: {e}")
-            pass
+            self.import_errors[module_name] = f"{type(e).__name__}: {e}"
 
         return plugins
 
@@ -153,13 +614,14 @@ class PluginManager:
         return str(error)  # 简化处理
 
     def get_plugin_by_name(self, name: str) -> BasePlugin:
-        for plugin in self.plugins:
-            if plugin.get_name() == name:
-                return plugin
-        return None
+        return self.registry.get(name)
 
     def get_plugins_by_names(self, names: List[str]) -> List[BasePlugin]:
-        return [plugin for plugin in self.plugins if plugin.get_name() in names]
+        return self.registry.get_many(names)
+
+    def select_plugins(self, query: str) -> List[BasePlugin]:
+        """按查询选择插件，例如 "tag:registry and not tag:slow" (语法见 plugin_registry)，查询无效时抛出 QueryError"""
+        return self.registry.select(query)
 
     def reload_plugins(self) -> List[BasePlugin]:
         print("[INFO] 重新加载所有插件...")
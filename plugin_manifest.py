@@ -0,0 +1,213 @@
+import os
+import ast
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from plugin_base import BasePlugin, call_execute
+
+
+# 模块级清单变量名：PLUGIN_MANIFEST = {"类名": {"name": ..., "description": ..., ...}}
+MANIFEST_VARIABLE = "PLUGIN_MANIFEST"
+# 模块级声明：PLUGIN_IMPORT_THREAD_SAFE = True 表示模块可以与其他插件模块在不同线程中同时导入
+# (导入时不修改全局状态、不依赖其他插件模块的导入顺序)，插件管理器会并行导入这些模块
+IMPORT_THREAD_SAFE_VARIABLE = "PLUGIN_IMPORT_THREAD_SAFE"
+# 类装饰器名：@plugin_metadata(name=..., description=..., ...)
+METADATA_DECORATOR = "plugin_metadata"
+# 类体中以字面量赋值时也会被静态读取的调度元数据
+SCHEDULING_ATTRIBUTES = ("depends_on", "conflicts_with", "resources", "timeout")
+# 同样会被静态读取的分类元数据 (插件查询使用)
+SELECTION_ATTRIBUTES = ("tags", "category", "phase")
+PLUGIN_ATTRIBUTES = SCHEDULING_ATTRIBUTES + SELECTION_ATTRIBUTES
+# 不导入模块就能列出插件所必需的元数据
+REQUIRED_KEYS = ("name", "description")
+
+
+class ManifestError(ValueError):
+    """清单存在但无法静态读取 (不是字面量或缺少必需的键)"""
+    pass
+
+
+def _is_metadata_decorator(node: ast.expr) -> bool:
+    if not isinstance(node, ast.Call):
+        return False
+    func = node.func
+    name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+    return name == METADATA_DECORATOR
+
+
+def _assigned_name(node: ast.stmt) -> Optional[str]:
+    if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+        return node.targets[0].id
+    if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and node.value is not None:
+        return node.target.id
+    return None
+
+
+def _class_scheduling_attributes(node: ast.ClassDef) -> Dict[str, Any]:
+    """类体中以字面量赋值的调度与分类元数据 (depends_on / resources / tags / phase 等)"""
+    attributes = {}
+    for statement in node.body:
+        name = _assigned_name(statement)
+        if name in PLUGIN_ATTRIBUTES:
+            try:
+                attributes[name] = ast.literal_eval(statement.value)
+            except ValueError:
+                pass
+    return attributes
+
+
+def read_manifest(source: str, filename: str = "<plugin>") -> List[Dict[str, Any]]:
+    """
+    不执行代码，从插件源码中静态读取清单，按源码顺序返回每个插件类的元数据 (键 'class' 为类名)。
+    模块没有声明清单时返回空列表；清单无法静态读取时抛出 ManifestError。
+    """
+    return _read_manifest_tree(ast.parse(source, filename))
+
+
+def _read_manifest_tree(tree: ast.Module) -> List[Dict[str, Any]]:
+    declared: Dict[str, Dict[str, Any]] = {}
+    class_attributes: Dict[str, Dict[str, Any]] = {}
+    try:
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                class_attributes[node.name] = _class_scheduling_attributes(node)
+                for decorator in node.decorator_list:
+                    if _is_metadata_decorator(decorator):
+                        declared[node.name] = {kw.arg: ast.literal_eval(kw.value)
+                                               for kw in decorator.keywords if kw.arg}
+            elif _assigned_name(node) == MANIFEST_VARIABLE:
+                manifest = ast.literal_eval(node.value)
+                if not isinstance(manifest, dict):
+                    raise ManifestError(f"{MANIFEST_VARIABLE} 必须是以类名为键的字典")
+                for class_name, metadata in manifest.items():
+                    declared.setdefault(class_name, {}).update(metadata)
+    except ValueError as e:
+        if isinstance(e, ManifestError):
+            raise
+        raise ManifestError(f"清单中只能使用字面量: {e}")
+
+    entries = []
+    for class_name, metadata in declared.items():
+        missing = [key for key in REQUIRED_KEYS if key not in metadata]
+        if missing:
+            raise ManifestError(f"类 {class_name} 的清单缺少: {', '.join(missing)}")
+        entry = dict(class_attributes.get(class_name, {}))
+        entry.update(metadata)
+        entry["class"] = class_name
+        entries.append(entry)
+    return entries
+
+
+def read_manifest_file(path: str) -> List[Dict[str, Any]]:
+    with open(path, "rb") as f:
+        return read_manifest(f.read().decode("utf-8-sig"), path)
+
+
+def _declares_thread_safe_import(tree: ast.Module) -> bool:
+    for node in tree.body:
+        if _assigned_name(node) == IMPORT_THREAD_SAFE_VARIABLE:
+            try:
+                return ast.literal_eval(node.value) is True
+            except ValueError:
+                return False
+    return False
+
+
+def read_module_declarations(path: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    只解析一次源码，返回 (清单, 是否声明了 PLUGIN_IMPORT_THREAD_SAFE = True)。
+    清单的含义与异常同 read_manifest()；清单无法静态读取时同样抛出 ManifestError。
+    """
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read().decode("utf-8-sig"), path)
+    return _read_manifest_tree(tree), _declares_thread_safe_import(tree)
+
+
+class LazyPlugin(BasePlugin):
+    """
+    由清单元数据构造的插件代理。
+    列表显示、排序和调度只使用元数据；第一次需要真实插件时 (执行、检查可用性或访问元数据之外的属性)
+    才通过 loader 导入模块并实例化，之后的调用都转交给真实插件。
+    """
+
+    def __init__(self, metadata: Dict[str, Any], module_name: str, source_file: str,
+                 loader: Callable[[], BasePlugin]):
+        self.metadata = metadata
+        self.module_name = module_name
+        self.class_name = metadata["class"]
+        self.source_file = source_file
+        self.load_error: Optional[str] = None
+        self._loader = loader
+        self._plugin: Optional[BasePlugin] = None
+        self._lock = threading.RLock()
+        for key in PLUGIN_ATTRIBUTES:
+            if key in metadata:
+                setattr(self, key, metadata[key])
+
+    @property
+    def is_loaded(self) -> bool:
+        """是否已尝试导入 (无论成功与否)"""
+        return self._plugin is not None or self.load_error is not None
+
+    def load(self) -> Optional[BasePlugin]:
+        """导入模块并实例化插件 (只进行一次)，失败时返回 None，原因记录在 load_error"""
+        with self._lock:
+            if not self.is_loaded:
+                try:
+                    self._plugin = self._loader()
+                except Exception as e:
+                    self.load_error = str(e) or type(e).__name__
+                    print(f"[ERROR] 加载插件 {self.get_name()} 失败: {self.load_error}")
+            return self._plugin
+
+    def plugin_location(self) -> Tuple[str, str, str]:
+        """(模块名, 模块文件, 类名)，进程隔离模式据此在子进程中加载插件，父进程无需导入"""
+        return self.module_name, os.path.abspath(self.source_file), self.class_name
+
+    def get_name(self) -> str:
+        return self.metadata["name"]
+
+    def get_description(self) -> str:
+        return self.metadata["description"]
+
+    def is_available(self) -> bool:
+        # 每次都转交给真实插件，结果的缓存与过期由 AvailabilityProber 负责
+        plugin = self.load()
+        if plugin is None:
+            return False
+        try:
+            return bool(plugin.is_available())
+        except Exception as e:
+            print(f"[ERROR] 检查插件 {self.get_name()} 可用性失败: {e}")
+            return False
+
+    def execute(self, context=None) -> Dict[str, Any]:
+        plugin = self.load()
+        if plugin is None:
+            return {'success': False, 'error': f'加载插件失败: {self.load_error}'}
+        return call_execute(plugin, context)
+
+    def fingerprint(self) -> Optional[str]:
+        plugin = self.load()
+        return plugin.fingerprint() if plugin is not None else None
+
+    def check_applied(self) -> bool:
+        plugin = self.load()
+        return plugin.check_applied() if plugin is not None else False
+
+    def get_progress_message(self) -> str:
+        plugin = self.load()
+        return plugin.get_progress_message() if plugin is not None else super().get_progress_message()
+
+    def __getattr__(self, name: str):
+        # 只有在代理自身找不到的属性才会走到这里；私有属性不转交，避免初始化期间的递归
+        if name.startswith("_"):
+            raise AttributeError(name)
+        plugin = self.load()
+        if plugin is None:
+            raise AttributeError(name)
+        return getattr(plugin, name)
+
+    def __repr__(self) -> str:
+        state = "已加载" if self._plugin is not None else ("加载失败" if self.load_error else "未加载")
+        return f"<LazyPlugin {self.get_name()} ({self.module_name}.{self.class_name}, {state})>"
@@ -0,0 +1,251 @@
+import re
+import fnmatch
+import operator
+import functools
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from plugin_base import BasePlugin
+
+
+# ======================================================
+# 插件索引与查询
+# 查询语法 (关键字不区分大小写):
+#   tag:registry and not tag:slow      标签 (插件的 tags 与 resources)
+#   category:网络 or phase:2           分类 / 阶段
+#   phase:<=2                          阶段比较: =  <  <=  >  >=
+#   name:"注册表修复"  或  注册表*     名称 (不带字段时按名称匹配)
+#   (tag:disk or tag:registry) and not name:*测试*
+# 值中可以使用通配符 * ? [...]；包含空格或括号的值用双引号括起来。标签与分类不区分大小写。
+# ======================================================
+
+QUERY_FIELDS = ("name", "tag", "category", "phase")
+_KEYWORDS = ("and", "or", "not")
+_COMPARISONS = (("<=", operator.le), (">=", operator.ge), ("<", operator.lt), (">", operator.gt),
+                ("=", operator.eq))
+_TOKEN = re.compile(r'''\s*(?:
+    (?P<paren>[()])
+  | (?:(?P<field>[A-Za-z_]+):)?(?:"(?P<quoted>(?:[^"\\]|\\.)*)"|(?P<word>[^\s()"]+))
+)''', re.X)
+
+
+class QueryError(ValueError):
+    """查询语法错误或使用了未知的字段"""
+    pass
+
+
+# 语法树节点: ('or', 左, 右) / ('and', 左, 右) / ('not', 子节点) / ('term', 字段, 值)
+QueryNode = Tuple
+
+
+def _tokenize(text: str) -> List[Tuple[str, Optional[str], str, int]]:
+    """拆分为 (类型, 字段, 值, 位置)，类型为 '(' ')' 'keyword' 'term'"""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise QueryError(f"第 {position + 1} 个字符处无法解析: {text[position:]!r}")
+        start = match.end() - len(match.group(0).lstrip())
+        if match.group("paren"):
+            tokens.append((match.group("paren"), None, match.group("paren"), start))
+        else:
+            field = match.group("field")
+            quoted = match.group("quoted")
+            value = re.sub(r'\\(.)', r'\1', quoted) if quoted is not None else match.group("word")
+            if field is None and quoted is None and value.endswith(":"):
+                raise QueryError(f"第 {start + 1} 个字符处的条件 {value!r} 缺少值")
+            if field is None and quoted is None and value.lower() in _KEYWORDS:
+                tokens.append(("keyword", None, value.lower(), start))
+            else:
+                field = (field or "name").lower()
+                if field not in QUERY_FIELDS:
+                    raise QueryError(f"未知的字段 {field!r}，可用的字段: {', '.join(QUERY_FIELDS)}")
+                tokens.append(("term", field, value, start))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """递归下降解析: or < and < not < 括号/条件"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.index = 0
+
+    def _peek(self, kind: str, value: Optional[str] = None) -> bool:
+        if self.index >= len(self.tokens):
+            return False
+        token = self.tokens[self.index]
+        return token[0] == kind and (value is None or token[2] == value)
+
+    def _error(self, message: str) -> QueryError:
+        if self.index < len(self.tokens):
+            return QueryError(f"{message} (第 {self.tokens[self.index][3] + 1} 个字符处)")
+        return QueryError(f"{message} (查询意外结束)")
+
+    def parse(self) -> QueryNode:
+        if not self.tokens:
+            raise QueryError("查询为空")
+        node = self._or()
+        if self.index < len(self.tokens):
+            raise self._error("多余的内容，条件之间需要用 and / or 连接")
+        return node
+
+    def _or(self) -> QueryNode:
+        node = self._and()
+        while self._peek("keyword", "or"):
+            self.index += 1
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self) -> QueryNode:
+        node = self._not()
+        while self._peek("keyword", "and"):
+            self.index += 1
+            node = ("and", node, self._not())
+        return node
+
+    def _not(self) -> QueryNode:
+        if self._peek("keyword", "not"):
+            self.index += 1
+            return ("not", self._not())
+        return self._atom()
+
+    def _atom(self) -> QueryNode:
+        if self._peek("("):
+            self.index += 1
+            node = self._or()
+            if not self._peek(")"):
+                raise self._error("缺少右括号")
+            self.index += 1
+            return node
+        if self._peek("term"):
+            _, field, value, _ = self.tokens[self.index]
+            self.index += 1
+            return ("term", field, value)
+        raise self._error("此处应为条件或左括号")
+
+
+@functools.lru_cache(maxsize=128)
+def parse_query(text: str) -> QueryNode:
+    """解析查询为语法树 (结果被缓存)，语法错误时抛出 QueryError"""
+    return _Parser(text).parse()
+
+
+def _is_pattern(value: str) -> bool:
+    return any(char in value for char in "*?[")
+
+
+class PluginRegistry:
+    """
+    插件列表的索引：按名称、标签、分类与阶段建立，在每次发现或刷新后构建一次。
+    每个索引项是一个位图 (int，第 i 位表示第 i 个插件)，查询中的 and / or / not 直接对位图做位运算，
+    结果按插件列表的原有顺序返回；插件数量达到数千个时查询仍只需微秒到毫秒级。
+    """
+
+    def __init__(self, plugins: Iterable[BasePlugin] = ()):
+        self.plugins: List[BasePlugin] = list(plugins)
+        self._all = (1 << len(self.plugins)) - 1
+        self._first_by_name: Dict[str, BasePlugin] = {}
+        self._names: Dict[str, int] = {}
+        self._tags: Dict[str, int] = {}
+        self._categories: Dict[str, int] = {}
+        self._phases: Dict[int, int] = {}
+        for index, plugin in enumerate(self.plugins):
+            bit = 1 << index
+            name = plugin.get_name()
+            self._first_by_name.setdefault(name, plugin)
+            self._names[name] = self._names.get(name, 0) | bit
+            for tag in {str(tag).casefold() for tag in list(plugin.tags or []) + list(plugin.resources or [])}:
+                self._tags[tag] = self._tags.get(tag, 0) | bit
+            if plugin.category:
+                category = str(plugin.category).casefold()
+                self._categories[category] = self._categories.get(category, 0) | bit
+            if plugin.phase is not None:
+                try:
+                    phase = int(plugin.phase)
+                except (TypeError, ValueError):
+                    print(f"[WARNING] 插件 {name} 的 phase 不是整数: {plugin.phase!r}")
+                    continue
+                self._phases[phase] = self._phases.get(phase, 0) | bit
+
+    def __len__(self) -> int:
+        return len(self.plugins)
+
+    def __iter__(self):
+        return iter(self.plugins)
+
+    # --- 按名称查找 ---
+
+    def get(self, name: str) -> Optional[BasePlugin]:
+        """名称对应的插件 (重名时为列表中的第一个)，不存在时返回 None"""
+        return self._first_by_name.get(name)
+
+    def get_many(self, names: Iterable[str]) -> List[BasePlugin]:
+        """名称在 names 中的所有插件，按插件列表的顺序返回"""
+        mask = 0
+        for name in names:
+            mask |= self._names.get(name, 0)
+        return self._plugins_in(mask)
+
+    # --- 查询 ---
+
+    def select(self, query: str) -> List[BasePlugin]:
+        """返回匹配查询的插件 (按插件列表的顺序)，查询无效时抛出 QueryError"""
+        return self._plugins_in(self._evaluate(parse_query(query.strip())))
+
+    def tags(self) -> List[str]:
+        return sorted(self._tags)
+
+    def categories(self) -> List[str]:
+        return sorted(self._categories)
+
+    def phases(self) -> List[int]:
+        return sorted(self._phases)
+
+    def _evaluate(self, node: QueryNode) -> int:
+        kind = node[0]
+        if kind == "or":
+            return self._evaluate(node[1]) | self._evaluate(node[2])
+        if kind == "and":
+            return self._evaluate(node[1]) & self._evaluate(node[2])
+        if kind == "not":
+            return self._all & ~self._evaluate(node[1])
+        return self._match(node[1], node[2])
+
+    def _match(self, field: str, value: str) -> int:
+        if field == "phase":
+            return self._match_phase(value)
+        if field == "name":
+            index, key = self._names, value
+        else:
+            index, key = (self._tags if field == "tag" else self._categories), value.casefold()
+        if not _is_pattern(key):
+            return index.get(key, 0)
+        mask = 0
+        for candidate, bits in index.items():
+            if fnmatch.fnmatchcase(candidate, key):
+                mask |= bits
+        return mask
+
+    def _match_phase(self, value: str) -> int:
+        compare: Callable[[int, int], bool] = operator.eq
+        for prefix, function in _COMPARISONS:
+            if value.startswith(prefix):
+                compare, value = function, value[len(prefix):]
+                break
+        try:
+            target = int(value)
+        except ValueError:
+            raise QueryError(f"phase 的值必须是整数: {value!r}")
+        mask = 0
+        for phase, bits in self._phases.items():
+            if compare(phase, target):
+                mask |= bits
+        return mask
+
+    def _plugins_in(self, mask: int) -> List[BasePlugin]:
+        # 逐位扫描二进制字符串比反复对大整数取最低位快得多
+        return [self.plugins[index] for index, bit in enumerate(reversed(bin(mask)[2:])) if bit == "1"]
@@ -0,0 +1,187 @@
+import os
+import sys
+import time
+import select
+import struct
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from plugin_bundle import BUNDLE_SUFFIX
+
+try:
+    import ctypes
+    import ctypes.util
+except ImportError:
+    ctypes = None
+
+
+# inotify 常量 (见 <sys/inotify.h>)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _is_plugin_file(filename: str) -> bool:
+    return filename.endswith((".py", BUNDLE_SUFFIX)) and not filename.startswith("__")
+
+
+def _is_watched_dir(name: str) -> bool:
+    return not name.startswith(("__", "."))
+
+
+def _load_inotify():
+    """Linux 上通过 ctypes 取得 inotify 函数，不可用时返回 None"""
+    if ctypes is None or not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        return libc.inotify_init1, libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+
+
+class PluginWatcher:
+    """
+    监视插件目录 (包括其中的包) 中 .py 文件与 .stpkg 插件包的新增、修改与删除。
+    Linux 上使用 inotify，其他系统 (或 inotify 不可用时) 每隔 interval 秒比较一次文件的修改时间与大小。
+    编辑器保存文件时往往会连续产生多个事件，变化平静 debounce 秒后才调用一次 on_change()；
+    on_change 在监视线程中调用，只表示“可能有文件变化”，由调用方自行比较具体变化了哪些文件。
+    """
+
+    def __init__(self, directory: str, on_change: Callable[[], None], interval: float = 1.0,
+                 debounce: float = 0.3):
+        self.directory = directory
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self._inotify = _load_inotify()
+        self.backend = "inotify" if self._inotify else "polling"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        target = self._run_inotify if self._inotify else self._run_polling
+        self._thread = threading.Thread(target=target, name="PluginWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _notify(self):
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"[WARNING] 处理插件文件变化失败: {e}")
+
+    # --- 轮询 ---
+
+    def _snapshot(self, directory: Optional[str] = None, prefix: str = "",
+                  snapshot: Optional[Dict[str, Tuple[int, int]]] = None) -> Dict[str, Tuple[int, int]]:
+        """插件文件 (相对路径) -> (修改时间, 大小)；递归进入含 __init__.py 的子目录"""
+        snapshot = {} if snapshot is None else snapshot
+        try:
+            with os.scandir(directory or self.directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if (_is_watched_dir(entry.name) and
+                                os.path.isfile(os.path.join(entry.path, "__init__.py"))):
+                            self._snapshot(entry.path, f"{prefix}{entry.name}/", snapshot)
+                    elif _is_plugin_file(entry.name):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        snapshot[prefix + entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+        return snapshot
+
+    def _run_polling(self):
+        known = self._snapshot()
+        pending = None
+        while not self._stop.wait(self.interval if pending is None else self.debounce):
+            current = self._snapshot()
+            if current != known:
+                # 还在变化：等到连续两次快照相同再通知
+                known = current
+                pending = True
+            elif pending:
+                pending = None
+                self._notify()
+
+    # --- inotify ---
+
+    def _run_inotify(self):
+        inotify_init1, _ = self._inotify
+        fd = inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0 or not self._add_watches(fd):
+            if fd >= 0:
+                os.close(fd)
+            print(f"[WARNING] 无法使用 inotify 监视插件目录 (errno {ctypes.get_errno()})，改为轮询")
+            self.backend = "polling"
+            self._run_polling()
+            return
+
+        deadline = None
+        try:
+            while not self._stop.is_set():
+                # 定期醒来检查停止标志；有待通知的变化时等到平静期结束
+                timeout = 0.5 if deadline is None else max(0.0, deadline - time.monotonic())
+                readable, _, _ = select.select([fd], [], [], timeout)
+                if readable and self._read_events(fd):
+                    deadline = time.monotonic() + self.debounce
+                elif deadline is not None and time.monotonic() >= deadline:
+                    deadline = None
+                    self._notify()
+        finally:
+            os.close(fd)
+
+    def _add_watches(self, fd: int) -> bool:
+        """
+        监视插件目录及其所有子目录 (已监视的目录重复添加不会产生新的监视)。
+        子目录不论是否已是包都会监视，这样之后才在其中创建的 __init__.py 也能被发现。
+        """
+        _, inotify_add_watch = self._inotify
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+        if inotify_add_watch(fd, os.fsencode(self.directory), mask) < 0:
+            return False
+        for root, dirnames, _ in os.walk(self.directory):
+            dirnames[:] = [d for d in dirnames if _is_watched_dir(d)]
+            for dirname in dirnames:
+                inotify_add_watch(fd, os.fsencode(os.path.join(root, dirname)), mask)
+        return True
+
+    def _read_events(self, fd: int) -> bool:
+        """读取所有待处理的 inotify 事件，返回其中是否有插件文件 (或子目录) 的变化"""
+        relevant = False
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, event_mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + _EVENT_HEADER.size:
+                                        offset + _EVENT_HEADER.size + length].rstrip(b"\0"))
+                offset += _EVENT_HEADER.size + length
+                if event_mask & _IN_ISDIR:
+                    if _is_watched_dir(name):
+                        # 新建或移入的子目录需要加入监视；其中可能已经有插件文件
+                        self._add_watches(fd)
+                        relevant = True
+                elif _is_plugin_file(name) or name == "__init__.py":
+                    relevant = True
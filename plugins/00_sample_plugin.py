@@ -2,9 +2,11 @@ import os
 import sys
 import importlib
 import traceback
-from plugin_base import BasePlugin
+from plugin_base import BasePlugin, plugin_metadata
 
 
+@plugin_metadata(name="功能演示插件",
+                 description="演示如何创建文件、获取用户信息，并展示一个独立的Tkinter动画窗口。")
 class SamplePlugin(BasePlugin):
     """一个示例插件，用于演示插件的创建和功能。"""
 
@@ -19,12 +21,6 @@ class SamplePlugin(BasePlugin):
         self.tools_dir = os.path.join(base_dir, "plugins", "tools")
         self.logic_script_path = os.path.join(self.tools_dir, "sample_logic.py")
 
-    def get_name(self) -> str:
-        return "功能演示插件"
-
-    def get_description(self) -> str:
-        return "演示如何创建文件、获取用户信息，并展示一个独立的Tkinter动画窗口。"
-
     def is_available(self) -> bool:
         # 检查其逻辑脚本是否存在
         return os.path.exists(self.logic_script_path)
@@ -1,28 +1,38 @@
 import os
-import subprocess
-from plugin_base import BasePlugin
-
-
+from typing import Optional
+from plugin_base import BasePlugin, ExecutionContext, PluginCancelled, plugin_metadata
+from plugin_bundle import get_resources
+from shell_pool import get_default_pool
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+# 与 reg.ps1 相同的搜索范围与搜索上限
+_REGISTRY_ROOTS = [
+    ("HKEY_CURRENT_USER", ""),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE"),
+    ("HKEY_LOCAL_MACHINE", r"SYSTEM\CurrentControlSet\Control"),
+    ("HKEY_LOCAL_MACHINE", r"SYSTEM\CurrentControlSet\Services"),
+    ("HKEY_LOCAL_MACHINE", r"SYSTEM\CurrentControlSet\Enum"),
+    ("HKEY_CLASSES_ROOT", ""),
+    ("HKEY_USERS", ""),
+]
+_MAX_SEARCH_COUNT = 50000
+_ADMINISTRATOR_PATH = "c:\\users\\administrator"
+
+
+@plugin_metadata(name="注册表修复", description="修复包含Administrator路径的注册表项，替换为当前用户名")
 class RegistryRepairPlugin(BasePlugin):
     """注册表修复插件"""
 
-    def get_name(self) -> str:
-        return "注册表修复"
-
-    def get_description(self) -> str:
-        return "修复包含Administrator路径的注册表项，替换为当前用户名"
-
     def is_available(self) -> bool:
         """检查PowerShell和脚本文件是否可用"""
         try:
-            # 检查PowerShell是否可用
-            result = subprocess.run(
-                ["powershell", "-Command", "echo 'PowerShell可用'"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                shell=True
-            )
+            # 检查PowerShell是否可用 (借用常驻会话，不再为一次检查单独启动 PowerShell)
+            with get_default_pool().session("powershell") as shell:
+                result = shell.run("echo 'PowerShell可用'", timeout=10)
 
             # 检查脚本文件是否存在
             script_path = self._get_script_path()
@@ -34,8 +44,9 @@ class RegistryRepairPlugin(BasePlugin):
             print(f"可用性检查失败: {str(e)}")
             return False
 
-    def execute(self):
-        """执行注册表修复"""
+    def execute(self, context=None):
+        """执行注册表修复 (脚本输出实时写入日志)"""
+        context = context or ExecutionContext(self.get_name())
         try:
             script_path = self._get_script_path()
 
@@ -58,51 +69,100 @@ class RegistryRepairPlugin(BasePlugin):
                 "-File", script_path
             ]
 
-            # 执行命令并捕获输出
-            result = subprocess.run(
+            # 执行命令，输出逐行实时写入日志，结果中只保留最后部分
+            result = context.run_command(
                 command,
-                capture_output=True,
-                text=True,
                 timeout=600,  # 10分钟超时
                 encoding='gbk',  # 使用GBK编码处理中文输出
                 cwd=os.path.dirname(script_path)  # 在脚本目录执行
             )
 
             # 处理执行结果
+            if result.timed_out:
+                return {
+                    'success': False,
+                    'error': '注册表修复操作超时（超过10分钟）'
+                }
             if result.returncode == 0:
-                output = result.stdout.strip() if result.stdout else "注册表修复完成"
+                output = result.summary('stdout').strip() or "注册表修复完成"
                 return {
                     'success': True,
                     'message': output
                 }
             else:
-                error_msg = result.stderr.strip() if result.stderr else f"PowerShell执行失败，返回码: {result.returncode}"
+                error_msg = result.output('stderr').strip() or f"PowerShell执行失败，返回码: {result.returncode}"
                 # 添加标准输出到错误信息，便于调试
-                if result.stdout:
-                    error_msg += f"\n输出: {result.stdout}"
+                if result.output('stdout'):
+                    error_msg += f"\n输出: {result.summary('stdout')}"
                 return {
                     'success': False,
                     'error': error_msg
                 }
 
-        except subprocess.TimeoutExpired:
-            return {
-                'success': False,
-                'error': '注册表修复操作超时（超过10分钟）'
-            }
+        except PluginCancelled:
+            raise
         except Exception as e:
             return {
                 'success': False,
                 'error': f'执行注册表修复时发生错误: {str(e)}'
             }
 
+    def check_applied(self) -> bool:
+        """只读扫描脚本会修改的注册表范围，没有残留的 Administrator 路径时无需修复"""
+        if winreg is None:
+            return False
+        if os.environ.get("USERNAME", "").lower() == "administrator":
+            # 当前用户就是 Administrator，替换不会改变任何值
+            return True
+        stale = self._find_administrator_value()
+        if stale:
+            print(f"[INFO] 注册表中仍有 Administrator 路径: {stale}")
+        return stale is None
+
+    def _find_administrator_value(self) -> Optional[str]:
+        """返回第一个包含 Administrator 路径的字符串值的位置，没有时返回 None"""
+        searched = 0
+        for root_name, root_path in _REGISTRY_ROOTS:
+            root = getattr(winreg, root_name)
+            pending = [root_path]
+            while pending:
+                path = pending.pop()
+                try:
+                    key = winreg.OpenKey(root, path, 0, winreg.KEY_READ)
+                except OSError:
+                    continue
+                with key:
+                    try:
+                        subkey_count, value_count, _ = winreg.QueryInfoKey(key)
+                    except OSError:
+                        continue
+                    for index in range(value_count):
+                        searched += 1
+                        if searched > _MAX_SEARCH_COUNT:
+                            # 脚本在同样的上限处停止搜索，超出部分不会被修复
+                            return None
+                        try:
+                            name, data, kind = winreg.EnumValue(key, index)
+                        except OSError:
+                            continue
+                        if kind in (winreg.REG_SZ, winreg.REG_EXPAND_SZ) and isinstance(data, str) \
+                                and _ADMINISTRATOR_PATH in data.lower():
+                            return f"{root_name}\\{path}\\{name}" if path else f"{root_name}\\{name}"
+                    for index in range(subkey_count):
+                        try:
+                            subkey = winreg.EnumKey(key, index)
+                        except OSError:
+                            continue
+                        pending.append(f"{path}\\{subkey}" if path else subkey)
+        return None
+
     def get_progress_message(self) -> str:
         return "正在搜索和替换注册表中的Administrator路径..."
 
     def _get_script_path(self) -> str:
-        """获取PowerShell脚本路径"""
-        # 获取当前插件目录
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # 构建脚本完整路径
-        script_path = os.path.join(current_dir, "tools", "reg.ps1")
-        return script_path
+        """获取PowerShell脚本路径 (从插件包加载时为解出到缓存目录的只读副本)"""
+        resources = get_resources(__name__)
+        if not resources.exists("reg.ps1"):
+            # 返回预期的位置，由调用方报告找不到脚本
+            return os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools", "reg.ps1")
+        return resources.as_file("reg.ps1")
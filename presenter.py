@@ -1,5 +1,6 @@
 import textwrap
 from typing import TYPE_CHECKING
+from events import ASYNC, LogEvent, ProgressEvent, PluginStateEvent, RunCompletedEvent, PluginsChangedEvent
 
 # 使用 TYPE_CHECKING 避免循环导入
 if TYPE_CHECKING:
@@ -35,14 +36,12 @@ class Presenter:
         self.view.bind_command("clear_log", self.handle_clear_log)
         self.view.bind_command("show_about", self.handle_show_about)
         self.view.bind_command("show_help", self.handle_show_help)
+        self.view.bind_command("show_log_viewer", self.handle_show_log_viewer)
         self.view.bind_command("stop_execution", self.handle_stop_request)
         self.view.bind_command("stop_execution", self.handle_stop_request)
 
-        # --- 2. 将 Core 的回调绑定到 Presenter ---
-        self.core.on_log_message = self.handle_log_message
-        self.core.on_progress_update = self.handle_progress_update
-        self.core.on_execution_complete = self.handle_execution_complete
-        self.core.on_plugin_state_change = self.handle_plugin_state_change
+        # --- 2. 订阅 Core 的事件总线 (异步投递，界面刷新再慢也不会拖慢插件执行) ---
+        self.core.events.subscribe(self.handle_core_event, mode=ASYNC, name="Presenter")
 
         # --- 3. 为异步GUI（如Flet）注册“就绪”回调 ---
         if hasattr(self.view, 'bind_on_ready'):
@@ -63,6 +62,7 @@ class Presenter:
     def on_view_ready(self):
         """当View通知UI已就绪时（或对于同步UI立即执行），此方法被调用。"""
         self.handle_refresh_plugins()
+        self.core.start_plugin_watcher()
 
     # ======================================================
     # 其余所有 handle_... 方法与您之前的版本完全相同，无需修改
@@ -89,8 +89,28 @@ class Presenter:
             self.core.execute_plugins(self.core.plugins)
 
     def handle_refresh_plugins(self):
+        if self.core.plugins:
+            # 已加载过插件：只重新加载变化的文件，列表的更新由 PluginsChangedEvent 推送
+            diff = self.core.reload_changed_plugins()
+            if diff is not None and not diff:
+                self.view.safe_add_log_message("插件文件没有变化", "info")
+            return
         self.core.load_plugins()
-        self.view.display_plugins(self.core.plugins)
+        plugins = self.core.plugins
+        # 先显示列表 (已有结果的插件直接显示，其余显示“检查中”)，可用性检查的结果到达后逐行填入
+        self.view.display_plugins(plugins, [self.core.availability.get_cached(p) for p in plugins])
+        self._fill_availability(plugins)
+
+    def _fill_availability(self, plugins: list, to_probe: list = None):
+        """在后台检查插件列表 (或其中的 to_probe) 的可用性，结果到达后更新对应的行"""
+        rows = {plugin.get_name(): index for index, plugin in enumerate(plugins)}
+
+        def on_result(plugin, available):
+            # 检查期间列表可能已被再次刷新，此时的结果属于旧列表
+            if self.core.plugins is plugins:
+                self.view.safe_update_plugin_status(rows[plugin.get_name()], available)
+
+        self.core.availability.probe(plugins if to_probe is None else to_probe, on_result)
 
     def handle_select_all(self):
         self.view.select_all()
@@ -107,11 +127,35 @@ class Presenter:
     def handle_show_help(self):
         self.view.show_help_dialog()
 
+    def handle_show_log_viewer(self):
+        self.view.show_log_viewer()
+
+    def handle_core_event(self, event):
+        """把引擎事件分发给对应的处理方法 (在引擎线程中调用，由 View 的 safe_ 方法转交给GUI线程)"""
+        if isinstance(event, LogEvent):
+            self.handle_log_message(event.message, event.level)
+        elif isinstance(event, ProgressEvent):
+            self.handle_progress_update(event.progress, event.completed, event.total, event.eta)
+        elif isinstance(event, PluginStateEvent):
+            self.handle_plugin_state_change(event.plugin_name, event.state)
+        elif isinstance(event, RunCompletedEvent):
+            self.handle_execution_complete(event.failed_plugins)
+        elif isinstance(event, PluginsChangedEvent):
+            self.handle_plugins_changed(event)
+
+    def handle_plugins_changed(self, event: PluginsChangedEvent):
+        """只更新变化的行 (保留其余行及其勾选状态)，并检查新增和更新插件的可用性"""
+        plugins = event.plugins
+        changed = set(event.added) | set(event.updated)
+        statuses = [self.core.availability.get_cached(p) for p in plugins]
+        self.view.safe_apply_plugin_diff(plugins, statuses, event.removed, sorted(changed))
+        self._fill_availability(plugins, [p for p in plugins if p.get_name() in changed])
+
     def handle_log_message(self, message: str, level: str):
         self.view.safe_add_log_message(message, level)
 
-    def handle_progress_update(self, progress: float, current: int, total: int):
-        self.view.safe_update_progress(progress, current, total)
+    def handle_progress_update(self, progress: float, current: int, total: int, eta: float = None):
+        self.view.safe_update_progress(progress, current, total, eta)
 
     def handle_plugin_state_change(self, plugin_name: str, state: str):
         if state == 'starting':
@@ -0,0 +1,451 @@
+import os
+import sys
+import time
+import threading
+import importlib.util
+import multiprocessing
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from plugin_base import BasePlugin, CancellationToken, ExecutionContext, call_execute
+from plugin_bundle import BUNDLE_SUFFIX, open_bundle
+from bytecode_cache import PYCACHE_PREFIX_ENV
+
+try:
+    import psutil  # 可选依赖：用于终止插件进程派生出的整个子进程树，以及读取内存占用
+except ImportError:
+    psutil = None
+
+
+# ======================================================
+# 子进程侧逻辑
+# ======================================================
+class _PipeWriter:
+    """将子进程中的 print 输出转发给父进程，由父进程统一写入日志"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def write(self, message):
+        if message:
+            try:
+                self.conn.send(('log', message))
+            except Exception:
+                pass
+        return len(message) if message else 0
+
+    def flush(self):
+        pass
+
+
+# 子进程中已导入的插件模块文件及其修改时间，用于在插件文件变化后重新导入
+_loaded_module_mtimes: Dict[str, float] = {}
+
+
+def _load_plugin_module(module_name: str, module_file: str):
+    """在子进程中按文件路径导入插件模块；已导入且文件未变化时直接复用"""
+    if module_file.endswith(BUNDLE_SUFFIX):
+        # 插件包中的模块通过 zipimport 导入 (父进程已校验过包的内容)，包文件变化时 open_bundle 会重新打开
+        return open_bundle(module_file).import_module(module_name)
+    try:
+        mtime = os.path.getmtime(module_file)
+    except OSError:
+        mtime = None
+    module = sys.modules.get(module_name)
+    if (module is not None and getattr(module, '__file__', None) == module_file and
+            _loaded_module_mtimes.get(module_file) == mtime):
+        return module
+
+    parent_name = module_name.rpartition('.')[0]
+    if parent_name and parent_name not in sys.modules:
+        # 包中的插件模块 (包括入口点注册的模块) 可能使用相对导入，需要先导入其所在的包
+        importlib.import_module(parent_name)
+    spec = importlib.util.spec_from_file_location(module_name, module_file)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    _loaded_module_mtimes[module_file] = mtime
+    return module
+
+
+def _sanitize_result(result: Any) -> Dict[str, Any]:
+    """确保结果可以被 pickle 传回父进程"""
+    if not isinstance(result, dict):
+        return {'success': False, 'error': f'插件返回了无效的结果: {result!r}'}
+    import pickle
+    clean = {}
+    for key, value in result.items():
+        try:
+            pickle.dumps(value)
+            clean[key] = value
+        except Exception:
+            clean[key] = repr(value)
+    return clean
+
+
+def _current_rss() -> Optional[int]:
+    """返回当前进程的常驻内存 (字节)，无法获取时返回 None"""
+    if psutil is not None:
+        try:
+            return psutil.Process().memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _worker_main(conn, cancel_event, preload: List[Tuple[str, str]], extra_paths: List[str]):
+    """
+    插件工作进程入口。
+    启动时预先导入 plugin_base 和已发现的插件模块，然后循环接收任务，
+    直到收到 exit 消息或父进程关闭管道。
+    插件的子进度和上下文日志通过管道发回父进程，取消请求通过共享的 cancel_event 传入。
+    """
+    for path in extra_paths:
+        if path and path not in sys.path:
+            sys.path.insert(0, path)
+    # 打包后的程序启动时不读取 PYTHONPYCACHEPREFIX，在这里沿用父进程的字节码缓存 (见 bytecode_cache)
+    if sys.pycache_prefix is None and os.environ.get(PYCACHE_PREFIX_ENV):
+        sys.pycache_prefix = os.environ[PYCACHE_PREFIX_ENV]
+    sys.stdout = _PipeWriter(conn)
+    sys.stderr = _PipeWriter(conn)
+
+    import plugin_base  # noqa: F401  预热基础模块
+    for module_name, module_file in preload:
+        try:
+            _load_plugin_module(module_name, module_file)
+        except Exception:
+            # 预导入失败不影响工作进程，执行该插件时会再次尝试并报告真实错误
+            pass
+
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except (EOFError, OSError):
+            break
+        if kind == 'exit':
+            break
+
+        module_name, module_file, class_name, plugin_name = payload
+        context = ExecutionContext(
+            plugin_name,
+            cancel_token=CancellationToken(cancel_event),
+            progress_callback=lambda fraction, message: conn.send(('progress', fraction, message)),
+            log_callback=lambda message, level: conn.send(('ctx_log', message, level))
+        )
+        try:
+            plugin_class = getattr(_load_plugin_module(module_name, module_file), class_name)
+            result = _sanitize_result(call_execute(plugin_class(), context))
+        except Exception as e:
+            result = {'success': False, 'error': str(e), 'exception': True, 'traceback': traceback.format_exc()}
+        try:
+            conn.send(('result', result, _current_rss()))
+        except (EOFError, OSError):
+            break
+    conn.close()
+
+
+# ======================================================
+# 父进程侧监督逻辑
+# ======================================================
+def get_plugin_location(plugin: BasePlugin):
+    """返回 (模块名, 模块文件, 类名)，插件不是从文件加载时返回 None"""
+    if hasattr(type(plugin), 'plugin_location'):
+        # 按需加载的插件 (LazyPlugin) 直接由清单给出位置，父进程无需导入模块
+        return plugin.plugin_location()
+    plugin_class = type(plugin)
+    module = sys.modules.get(plugin_class.__module__)
+    module_file = getattr(module, '__file__', None)
+    if not module_file or not os.path.exists(module_file):
+        return None
+    return plugin_class.__module__, os.path.abspath(module_file), plugin_class.__name__
+
+
+def kill_process_tree(pid: int):
+    """终止进程及其所有子进程 (没有 psutil 时只终止进程本身)"""
+    if psutil is not None:
+        try:
+            parent = psutil.Process(pid)
+            children = parent.children(recursive=True)
+            for child in children:
+                try:
+                    child.kill()
+                except psutil.Error:
+                    pass
+            parent.kill()
+            return
+        except psutil.Error:
+            pass
+    try:
+        if sys.platform.startswith('win'):
+            import subprocess
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)], capture_output=True,
+                           creationflags=subprocess.CREATE_NO_WINDOW)
+        else:
+            import signal
+            os.kill(pid, signal.SIGKILL)
+    except Exception:
+        pass
+
+
+class _Worker:
+    """对一个插件工作进程及其通信管道的封装"""
+
+    def __init__(self, mp_context, preload: List[Tuple[str, str]], extra_paths: List[str]):
+        self.conn, child_conn = mp_context.Pipe(duplex=True)
+        self.cancel_event = mp_context.Event()
+        self.process = mp_context.Process(
+            target=_worker_main,
+            args=(child_conn, self.cancel_event, preload, extra_paths),
+            name="SysToolsPluginWorker",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.tasks_done = 0
+        self.rss: Optional[int] = None
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def submit(self, location: Tuple[str, str, str], plugin_name: str):
+        self.cancel_event.clear()
+        self.conn.send(('run', tuple(location) + (plugin_name,)))
+
+    def stop(self):
+        """通知工作进程正常退出，超时未退出则强制终止"""
+        try:
+            self.conn.send(('exit', None))
+        except (EOFError, OSError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.kill()
+        self._close()
+
+    def kill(self):
+        kill_process_tree(self.process.pid)
+        self.process.join(timeout=5)
+        self._close()
+
+    def _close(self):
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+
+def _default_mp_context():
+    """
+    选择创建工作进程的方式：
+    POSIX 上使用 forkserver 并预导入 plugin_base，Windows 与打包环境只能使用 spawn。
+    """
+    if not sys.platform.startswith('win') and not getattr(sys, 'frozen', False):
+        try:
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['plugin_base', 'process_executor'])
+            return context
+        except ValueError:
+            pass
+    return multiprocessing.get_context('spawn')
+
+
+class PluginWorkerPool:
+    """
+    常驻插件工作进程池。
+    工作进程启动时预先导入 plugin_base 和已发现的插件模块，并在多次 execute_plugins 之间复用，
+    使每个插件的派发开销降到毫秒级。
+    工作进程在执行 max_tasks 个任务后，或常驻内存超过 max_rss_mb 时被回收并替换。
+    """
+
+    def __init__(self, size: int = 1, max_tasks: int = 50, max_rss_mb: Optional[float] = 512,
+                 extra_paths=None, log: Optional[Callable[[str, str], None]] = None):
+        self.size = max(1, int(size))
+        self.max_tasks = max(1, int(max_tasks))
+        self.max_rss_bytes = int(max_rss_mb * 1024 * 1024) if max_rss_mb else None
+        self.extra_paths = list(extra_paths or [])
+        self._log = log or (lambda message, level="info": print(f"[{level.upper()}] {message}"))
+        self.mp_context = _default_mp_context()
+
+        self._preload: List[Tuple[str, str]] = []
+        self._idle: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def set_preload_plugins(self, plugins: List[BasePlugin]):
+        """记录需要在新工作进程中预导入的插件模块"""
+        preload = []
+        for plugin in plugins:
+            location = get_plugin_location(plugin)
+            if location and location[:2] not in preload:
+                preload.append(location[:2])
+        with self._lock:
+            self._preload = preload
+
+    def warm_up(self):
+        """在后台补足空闲工作进程，不阻塞调用线程"""
+        def fill():
+            while True:
+                with self._lock:
+                    if self._closed or len(self._idle) >= self.size:
+                        return
+                    preload = list(self._preload)
+                worker = _Worker(self.mp_context, preload, self.extra_paths)
+                with self._lock:
+                    if self._closed:
+                        worker.stop()
+                        return
+                    self._idle.append(worker)
+
+        threading.Thread(target=fill, name="PluginPoolWarmUp", daemon=True).start()
+
+    def acquire(self) -> _Worker:
+        """取出一个空闲的工作进程，没有时立即新建一个"""
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    return worker
+                worker.kill()
+            preload = list(self._preload)
+        return _Worker(self.mp_context, preload, self.extra_paths)
+
+    def release(self, worker: _Worker, reusable: bool):
+        """归还工作进程；不可复用、达到任务上限或内存超限的进程会被回收"""
+        if not reusable or not worker.is_alive():
+            worker.kill()
+            self.warm_up()
+            return
+
+        worker.tasks_done += 1
+        recycle_reason = None
+        if worker.tasks_done >= self.max_tasks:
+            recycle_reason = f"已执行 {worker.tasks_done} 个任务"
+        elif self.max_rss_bytes and worker.rss and worker.rss > self.max_rss_bytes:
+            recycle_reason = f"内存占用 {worker.rss / 1024 / 1024:.0f}MB 超过上限"
+
+        if recycle_reason:
+            self._log(f"回收插件工作进程 (PID {worker.process.pid}): {recycle_reason}", "info")
+            worker.stop()
+            self.warm_up()
+            return
+
+        with self._lock:
+            if not self._closed and len(self._idle) < self.size:
+                self._idle.append(worker)
+                return
+        worker.stop()
+
+    def shutdown(self):
+        """停止所有空闲的工作进程"""
+        with self._lock:
+            self._closed = True
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.stop()
+
+
+class ProcessPluginRunner:
+    """
+    进程隔离的插件执行后端。
+    每个插件在独立的子进程中执行，由引擎线程监督：
+    超过插件的 timeout 或收到停止请求时，直接终止子进程（及其子进程树）。
+    子进程中的输出会被转发回父进程，执行结果以原有的结果字典形式返回。
+    指定 pool 时复用常驻工作进程，否则每个插件使用一个一次性的子进程。
+    """
+
+    POLL_INTERVAL = 0.1
+    # 停止请求发出后，给插件多少秒时间自行响应取消，超时才强制终止进程
+    CANCEL_GRACE_PERIOD = 2.0
+
+    def __init__(self, should_stop: Callable[[], bool],
+                 log: Optional[Callable[[str, str], None]] = None,
+                 default_timeout: Optional[float] = None,
+                 extra_paths=None,
+                 pool: Optional[PluginWorkerPool] = None):
+        self.should_stop = should_stop
+        self._log = log or (lambda message, level="info": print(f"[{level.upper()}] {message}"))
+        self.default_timeout = default_timeout
+        self.extra_paths = list(extra_paths or [])
+        self.pool = pool
+        # spawn 在所有平台上行为一致，也是 Windows 与 PyInstaller 打包环境唯一可用的方式
+        self.mp_context = multiprocessing.get_context('spawn')
+
+    def get_timeout(self, plugin: BasePlugin) -> Optional[float]:
+        timeout = getattr(plugin, 'timeout', None)
+        return timeout if timeout else self.default_timeout
+
+    def run(self, plugin: BasePlugin, context: Optional[ExecutionContext] = None) -> Dict[str, Any]:
+        """在子进程中执行插件，阻塞直到完成、超时或被停止"""
+        location = get_plugin_location(plugin)
+        if location is None:
+            self._log(f"{plugin.get_name()} 不是从插件文件加载的，回退到进程内执行", "warning")
+            return call_execute(plugin, context)
+
+        if self.pool is not None:
+            worker = self.pool.acquire()
+        else:
+            worker = _Worker(self.mp_context, [], self.extra_paths)
+
+        completed = False
+        try:
+            worker.submit(location, plugin.get_name())
+            result, completed = self._supervise(plugin, worker, context)
+            return result
+        finally:
+            if self.pool is not None:
+                self.pool.release(worker, reusable=completed)
+            elif completed:
+                worker.stop()
+            else:
+                worker.kill()
+
+    def _supervise(self, plugin: BasePlugin, worker: _Worker,
+                   context: Optional[ExecutionContext]) -> Tuple[Dict[str, Any], bool]:
+        """等待工作进程返回结果，返回 (结果字典, 工作进程是否正常完成任务)"""
+        timeout = self.get_timeout(plugin)
+        deadline = time.monotonic() + timeout if timeout else None
+        cancel_deadline = None
+        conn, process = worker.conn, worker.process
+
+        while True:
+            try:
+                if conn.poll(self.POLL_INTERVAL):
+                    message = conn.recv()
+                    if message[0] == 'log':
+                        print(message[1], end='')
+                    elif message[0] == 'progress':
+                        if context is not None:
+                            context.report_progress(message[1], message[2])
+                    elif message[0] == 'ctx_log':
+                        if context is not None:
+                            context.emit_log(message[1], message[2])
+                        else:
+                            self._log(message[1], message[2])
+                    elif message[0] == 'result':
+                        worker.rss = message[2]
+                        return message[1], True
+                    # 不回到 poll()：插件持续输出时仍要检查下面的取消与超时
+            except (EOFError, OSError):
+                # 管道已关闭：子进程在发送结果前就退出了
+                process.join(timeout=1)
+                return {'success': False, 'error': f'插件进程意外退出 (退出码: {process.exitcode})'}, False
+
+            if not process.is_alive() and not conn.poll(0):
+                return {'success': False, 'error': f'插件进程意外退出 (退出码: {process.exitcode})'}, False
+
+            if self.should_stop():
+                if cancel_deadline is None:
+                    # 先请求插件协作式取消，给它一个短暂的宽限期
+                    worker.cancel_event.set()
+                    cancel_deadline = time.monotonic() + self.CANCEL_GRACE_PERIOD
+                elif time.monotonic() > cancel_deadline:
+                    self._log(f"正在终止插件进程: {plugin.get_name()}", "warning")
+                    return {'success': False, 'error': '用户取消，插件进程已被终止', 'cancelled': True}, False
+
+            if deadline is not None and time.monotonic() > deadline:
+                self._log(f"{plugin.get_name()} 执行超时 ({timeout:g}秒)，正在终止插件进程", "error")
+                return {'success': False, 'error': f'执行超时 (超过{timeout:g}秒)，插件进程已被终止'}, False
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from plugin_base import BasePlugin
+
+
+def get_default_cache_dir() -> str:
+    """结果缓存的默认保存目录"""
+    return os.path.join(tempfile.gettempdir(), "SysTools_Cache")
+
+
+def hash_file(path: str) -> Optional[str]:
+    """计算文件内容的 SHA-256，文件不存在时返回 None"""
+    try:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+class ResultCache:
+    """
+    插件执行结果缓存 (类似 make 的“已是最新”判断)。
+    以 插件名称 + 插件代码哈希 + 插件指纹 作为键，记录上一次成功执行的结果；
+    插件文件被修改后代码哈希随之变化，旧的缓存项自动失效。
+    缓存保存为 JSON 文件，跨多次运行持久有效。
+    """
+
+    FILE_NAME = "result_cache.json"
+
+    def __init__(self, cache_dir: str):
+        self.path = os.path.join(cache_dir, self.FILE_NAME)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._code_hashes: Dict[str, Optional[str]] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._entries = data
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def _save(self):
+        """原子地写回缓存文件 (先写临时文件再替换)"""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=1, default=repr)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[WARNING] 保存结果缓存失败: {e}")
+
+    def get_code_hash(self, plugin: BasePlugin) -> Optional[str]:
+        """返回插件所在模块文件的内容哈希 (同一进程内只计算一次)"""
+        # 按需加载的插件 (LazyPlugin) 记录了源文件，不必为计算哈希而导入模块
+        module_file = getattr(plugin, 'source_file', None)
+        if not module_file:
+            module = sys.modules.get(type(plugin).__module__)
+            module_file = getattr(module, '__file__', None)
+        if not module_file:
+            return None
+        if module_file not in self._code_hashes:
+            self._code_hashes[module_file] = hash_file(module_file)
+        return self._code_hashes[module_file]
+
+    def forget_code_hashes(self):
+        """插件重新加载后调用，使代码哈希重新计算"""
+        self._code_hashes.clear()
+
+    def lookup(self, plugin: BasePlugin, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """返回匹配的缓存结果；未命中或插件代码已变化时返回 None"""
+        code_hash = self.get_code_hash(plugin)
+        if code_hash is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(plugin.get_name())
+        if not entry:
+            return None
+        if entry.get('code_hash') != code_hash or entry.get('fingerprint') != fingerprint:
+            return None
+        return entry
+
+    def store(self, plugin: BasePlugin, fingerprint: str, result: Dict[str, Any]):
+        """记录一次成功执行；同名插件的旧缓存项被覆盖"""
+        code_hash = self.get_code_hash(plugin)
+        if code_hash is None:
+            return
+        with self._lock:
+            self._entries[plugin.get_name()] = {
+                'code_hash': code_hash,
+                'fingerprint': fingerprint,
+                'ts': time.time(),
+                'result': result,
+            }
+            self._save()
+
+    def invalidate(self, plugin_name: str):
+        with self._lock:
+            if self._entries.pop(plugin_name, None) is not None:
+                self._save()
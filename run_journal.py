@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+
+def get_default_journal_dir() -> str:
+    """执行日志的默认保存目录 (与自动模式日志一样位于系统临时目录，重启后仍然保留)"""
+    return os.path.join(tempfile.gettempdir(), "SysTools_Journal")
+
+
+class RunJournal:
+    """
+    崩溃安全的插件执行日志 (Run Journal)。
+    每次执行对应一个 run ID 和一个只追加写入的 JSONL 文件，
+    每条记录写入后立即 fsync，因此即使机器在执行过程中崩溃或重启，
+    已完成插件的状态也不会丢失。--resume 模式通过重放该文件跳过已成功的插件。
+    """
+
+    FILE_PREFIX = "run_"
+    FILE_SUFFIX = ".jsonl"
+    # 保留的执行日志数量，更早的在开始新的执行时删除
+    MAX_JOURNALS = 20
+
+    # 运行方式：只有自动模式的运行可以被 -resume 继续 (GUI 中只执行选中插件的运行不算)
+    MODE_AUTO = "auto"
+    MODE_GUI = "gui"
+
+    # 插件状态
+    STARTED = "started"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+    def __init__(self, journal_dir: str, run_id: Optional[str] = None):
+        self.journal_dir = journal_dir
+        self.run_id = run_id or f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        self.path = os.path.join(journal_dir, f"{self.FILE_PREFIX}{self.run_id}{self.FILE_SUFFIX}")
+        self._lock = threading.Lock()
+        self._file = None
+
+    # --- 写入 ---
+
+    def _append(self, record: Dict[str, Any]):
+        record.setdefault('ts', time.time())
+        record['run_id'] = self.run_id
+        line = json.dumps(record, ensure_ascii=False, default=repr) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(self.journal_dir, exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception as e:
+                print(f"[WARNING] 写入执行日志失败: {e}")
+
+    def start_run(self, plugin_names: List[str], resumed: bool = False, mode: str = MODE_AUTO):
+        self._append({'event': 'run_resumed' if resumed else 'run_started', 'plugins': plugin_names, 'mode': mode})
+
+    def record(self, plugin_name: str, state: str, result: Optional[Dict[str, Any]] = None):
+        entry = {'event': 'plugin', 'plugin': plugin_name, 'state': state}
+        if result is not None:
+            entry['result'] = result
+        self._append(entry)
+
+    def finish_run(self, failed_count: int):
+        self._append({'event': 'run_finished', 'failed': failed_count})
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except Exception:
+                    pass
+                self._file = None
+
+    # --- 重放 ---
+
+    def replay(self) -> List[Dict[str, Any]]:
+        """读取全部记录；崩溃时可能写了一半的最后一行会被忽略"""
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    def plugin_states(self) -> Dict[str, Dict[str, Any]]:
+        """返回每个插件最后一条状态记录"""
+        states = {}
+        for record in self.replay():
+            if record.get('event') == 'plugin':
+                states[record.get('plugin')] = record
+        return states
+
+    def completed_plugins(self) -> Set[str]:
+        """返回已经成功完成的插件名称集合"""
+        return {name for name, record in self.plugin_states().items() if record.get('state') == self.SUCCEEDED}
+
+    def run_mode(self) -> Optional[str]:
+        """首次开始运行时记录的运行方式 (MODE_AUTO / MODE_GUI)，没有记录时返回 None"""
+        for record in self.replay():
+            if record.get('event') == 'run_started':
+                return record.get('mode')
+        return None
+
+    def is_fully_successful(self) -> bool:
+        """本次运行是否已结束且没有失败项"""
+        finished = [r for r in self.replay() if r.get('event') == 'run_finished']
+        return bool(finished) and finished[-1].get('failed', 0) == 0
+
+    @classmethod
+    def find_resumable(cls, journal_dir: str, run_id: Optional[str] = None) -> Optional['RunJournal']:
+        """
+        查找可以继续执行的运行记录。
+        指定 run_id 时直接打开它；否则返回最近一次自动模式的运行，即使它已全部成功
+        (例如插件要求重启、重启后以 -resume 继续时)，由调用方跳过其中已成功的插件。没有任何自动模式的运行时返回 None。
+        """
+        if run_id:
+            journal = cls(journal_dir, run_id)
+            return journal if os.path.exists(journal.path) else None
+
+        if not os.path.isdir(journal_dir):
+            return None
+        for filename in cls._list_journals(journal_dir):
+            journal = cls(journal_dir, filename[len(cls.FILE_PREFIX):-len(cls.FILE_SUFFIX)])
+            if journal.run_mode() == cls.MODE_AUTO:
+                return journal
+        return None
+
+    @classmethod
+    def _list_journals(cls, journal_dir: str) -> List[str]:
+        """目录中的执行日志文件名，最近修改的在前"""
+        candidates = []
+        try:
+            filenames = os.listdir(journal_dir)
+        except OSError:
+            return []
+        for filename in filenames:
+            if filename.startswith(cls.FILE_PREFIX) and filename.endswith(cls.FILE_SUFFIX):
+                try:
+                    candidates.append((os.path.getmtime(os.path.join(journal_dir, filename)), filename))
+                except OSError:
+                    continue
+        return [filename for _, filename in sorted(candidates, reverse=True)]
+
+    @classmethod
+    def prune(cls, journal_dir: str, keep: int = MAX_JOURNALS):
+        """只保留最近的 keep 个执行日志"""
+        for filename in cls._list_journals(journal_dir)[max(0, keep):]:
+            try:
+                os.remove(os.path.join(journal_dir, filename))
+            except OSError as e:
+                print(f"[WARNING] 无法删除旧的执行日志 {filename}: {e}")
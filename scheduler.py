@@ -0,0 +1,286 @@
+import time
+import heapq
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from plugin_base import BasePlugin
+
+
+# 资源标签 exclusive：插件运行期间不允许任何其他插件同时运行
+EXCLUSIVE_RESOURCE = "exclusive"
+
+# 引擎默认的资源并发上限；未列出的资源标签同样按 1 处理 (默认同一资源不能共享)
+DEFAULT_RESOURCE_LIMITS: Dict[str, int] = {
+    "registry": 1,
+    "disk": 1,
+    "network-stack": 1,
+}
+
+
+class PluginScheduler:
+    """
+    基于依赖关系(DAG)的插件并行调度器。
+    根据插件声明的 depends_on / conflicts_with 构建依赖图，
+    在有界线程池中并发执行所有“就绪”的插件。
+    多个插件同时就绪时，按传入列表中的顺序（即文件名顺序）优先启动。
+    插件还可以通过 resources 声明所使用的资源标签，同一资源上同时运行的插件数不超过 resource_limits 中的上限。
+    """
+
+    def __init__(self, plugins: List[BasePlugin], max_workers: int = 4,
+                 log: Optional[Callable[[str, str], None]] = None,
+                 resource_limits: Optional[Dict[str, int]] = None):
+        self.plugins = list(plugins)
+        self.max_workers = max(1, int(max_workers))
+        self._log = log or (lambda message, level="info": print(f"[{level.upper()}] {message}"))
+        self.resource_limits = dict(DEFAULT_RESOURCE_LIMITS)
+        self.resource_limits.update(resource_limits or {})
+
+        self.names = [p.get_name() for p in self.plugins]
+        self.dependencies: List[Set[int]] = [set() for _ in self.plugins]
+        self.dependents: List[Set[int]] = [set() for _ in self.plugins]
+        self.conflicts: List[Set[int]] = [set() for _ in self.plugins]
+        self.resources: List[Set[str]] = [set(getattr(p, 'resources', None) or []) for p in self.plugins]
+        # 每个插件因各资源被占用而等待的总秒数 {插件名称: {资源标签: 秒数}}，调度结束后可供查询
+        self.resource_waits: Dict[str, Dict[str, float]] = {}
+        self._build_graph()
+
+    def _build_graph(self):
+        """根据插件元数据建立依赖边和互斥关系"""
+        index_by_name = {}
+        for i, name in enumerate(self.names):
+            index_by_name.setdefault(name, i)
+
+        for i, plugin in enumerate(self.plugins):
+            for dep_name in getattr(plugin, 'depends_on', None) or []:
+                j = index_by_name.get(dep_name)
+                if j is None:
+                    # 依赖的插件不在本次执行列表中 (例如只执行了选中的部分插件)，忽略该依赖
+                    self._log(f"{self.names[i]} 依赖的插件 '{dep_name}' 不在本次执行列表中，已忽略该依赖", "warning")
+                    continue
+                if j == i:
+                    continue
+                self.dependencies[i].add(j)
+                self.dependents[j].add(i)
+
+            for other_name in getattr(plugin, 'conflicts_with', None) or []:
+                j = index_by_name.get(other_name)
+                if j is None or j == i:
+                    continue
+                # 互斥关系是对称的
+                self.conflicts[i].add(j)
+                self.conflicts[j].add(i)
+
+    def _find_cycle_members(self) -> Set[int]:
+        """使用 Kahn 算法找出处于循环依赖中（或依赖于循环）的插件"""
+        in_degree = [len(deps) for deps in self.dependencies]
+        queue = [i for i, d in enumerate(in_degree) if d == 0]
+        visited = set()
+        while queue:
+            i = queue.pop()
+            visited.add(i)
+            for child in self.dependents[i]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    queue.append(child)
+        return set(range(len(self.plugins))) - visited
+
+    def get_resource_limit(self, tag: str) -> int:
+        return max(1, int(self.resource_limits.get(tag, 1)))
+
+    def resource_wait_report(self) -> List[Tuple[str, str, float]]:
+        """返回资源等待报告 [(插件名称, 资源标签, 等待秒数)]，按等待时间从长到短排列"""
+        report = [(name, tag, seconds)
+                  for name, waits in self.resource_waits.items()
+                  for tag, seconds in waits.items() if seconds > 0]
+        report.sort(key=lambda item: item[2], reverse=True)
+        return report
+
+    def run(self,
+            run_plugin: Callable[[BasePlugin], Dict[str, Any]],
+            on_start: Optional[Callable[[int, BasePlugin], None]] = None,
+            on_finish: Optional[Callable[[int, BasePlugin, Dict[str, Any]], None]] = None,
+            on_skip: Optional[Callable[[int, BasePlugin, str], None]] = None,
+            should_stop: Optional[Callable[[], bool]] = None):
+        """
+        执行调度。run_plugin 在工作线程中调用，必须返回结果字典；
+        on_start / on_finish / on_skip 均在调用 run() 的线程中串行回调，
+        因此回调中维护的统计数据无需额外加锁。
+        """
+        state = _ScheduleState(self, on_skip)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="PluginWorker") as pool:
+            while not state.all_finished():
+                stopping = bool(should_stop and should_stop())
+
+                if not stopping:
+                    for i in state.take_ready():
+                        if on_start:
+                            on_start(i, self.plugins[i])
+                        state.running[pool.submit(run_plugin, self.plugins[i])] = i
+
+                if not state.running:
+                    state.skip_remaining(stopping)
+                    break
+
+                done, _ = wait(list(state.running.keys()), timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: state.running[f]):
+                    state.complete(future, on_finish)
+
+    async def run_async(self,
+                        run_plugin: Callable[[BasePlugin], Awaitable[Dict[str, Any]]],
+                        on_start: Optional[Callable[[int, BasePlugin], None]] = None,
+                        on_finish: Optional[Callable[[int, BasePlugin, Dict[str, Any]], None]] = None,
+                        on_skip: Optional[Callable[[int, BasePlugin, str], None]] = None,
+                        should_stop: Optional[Callable[[], bool]] = None):
+        """
+        run() 的 asyncio 版本。run_plugin 是协程函数，每个就绪插件作为一个任务在当前事件循环中运行，
+        同时运行的任务数不超过 max_workers；回调均在事件循环线程中串行触发。
+        """
+        state = _ScheduleState(self, on_skip)
+        while not state.all_finished():
+            stopping = bool(should_stop and should_stop())
+
+            if not stopping:
+                for i in state.take_ready():
+                    if on_start:
+                        on_start(i, self.plugins[i])
+                    state.running[asyncio.ensure_future(run_plugin(self.plugins[i]))] = i
+
+            if not state.running:
+                state.skip_remaining(stopping)
+                break
+
+            done, _ = await asyncio.wait(list(state.running.keys()), timeout=0.2,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda t: state.running[t]):
+                state.complete(task, on_finish)
+
+
+class _ScheduleState:
+    """一次调度执行的状态 (同步与 asyncio 调度共用)"""
+
+    def __init__(self, scheduler: PluginScheduler, on_skip: Optional[Callable[[int, BasePlugin, str], None]]):
+        self.scheduler = scheduler
+        self.total = len(scheduler.plugins)
+        self.remaining_deps = [len(deps) for deps in scheduler.dependencies]
+        self.finished: Set[int] = set()
+        self.running: Dict[Any, int] = {}
+        self.ready: List[int] = []
+        self._on_skip = on_skip
+        # 资源占用计数，以及就绪插件当前被哪些资源阻塞 {插件序号: (开始计时的时刻, 阻塞的资源标签)}
+        self.resource_usage: Dict[str, int] = {}
+        self._blocked: Dict[int, Tuple[float, Set[str]]] = {}
+        scheduler.resource_waits = {}
+
+        for i in sorted(scheduler._find_cycle_members()):
+            scheduler._log(f"检测到循环依赖: {scheduler.names[i]}", "error")
+            self.skip(i, '存在循环依赖，未执行')
+
+        for i in range(self.total):
+            if i not in self.finished and self.remaining_deps[i] == 0:
+                heapq.heappush(self.ready, i)
+
+    def all_finished(self) -> bool:
+        return len(self.finished) >= self.total
+
+    def skip(self, index: int, reason: str):
+        if index in self.finished:
+            return
+        self.finished.add(index)
+        self._account_wait(index, time.monotonic(), set())
+        if self._on_skip:
+            self._on_skip(index, self.scheduler.plugins[index], reason)
+
+    def cascade_skip(self, index: int, reason: str):
+        """失败/跳过的插件，其所有下游依赖者都被级联跳过"""
+        stack = list(self.scheduler.dependents[index])
+        while stack:
+            child = stack.pop()
+            if child in self.finished:
+                continue
+            self.skip(child, reason)
+            stack.extend(self.scheduler.dependents[child])
+
+    def skip_remaining(self, stopping: bool):
+        """没有正在运行的任务：要么用户取消，要么剩余插件都已无法满足条件"""
+        reason = '未执行 (用户取消)' if stopping else '依赖条件无法满足，未执行'
+        for i in range(self.total):
+            self.skip(i, reason)
+
+    def _blocking_resources(self, i: int, active: Set[int], draining: bool) -> Set[str]:
+        """返回阻止插件 i 立即启动的资源标签；空集合表示资源条件已满足"""
+        tags = self.scheduler.resources[i]
+        if draining:
+            return {EXCLUSIVE_RESOURCE}
+        if EXCLUSIVE_RESOURCE in tags:
+            return {EXCLUSIVE_RESOURCE} if active else set()
+        if any(EXCLUSIVE_RESOURCE in self.scheduler.resources[j] for j in active):
+            return {EXCLUSIVE_RESOURCE}
+        return {tag for tag in tags
+                if self.resource_usage.get(tag, 0) >= self.scheduler.get_resource_limit(tag)}
+
+    def _account_wait(self, i: int, now: float, blocking: Set[str]):
+        """把上一次检查以来的等待时间计入当时阻塞插件 i 的资源，并开始新一段计时"""
+        previous = self._blocked.pop(i, None)
+        if previous is not None:
+            since, tags = previous
+            waits = self.scheduler.resource_waits.setdefault(self.scheduler.names[i], {})
+            for tag in tags:
+                waits[tag] = waits.get(tag, 0.0) + (now - since)
+        if blocking:
+            self._blocked[i] = (now, blocking)
+
+    def take_ready(self) -> List[int]:
+        """按文件名顺序挑选可以立即启动、不与正在运行的插件互斥且资源未超限的就绪插件"""
+        active = set(self.running.values())
+        selected, deferred = [], []
+        now = time.monotonic()
+        # 有 exclusive 插件在等待时不再启动新的插件，让正在运行的插件逐渐退出，避免其被一直推迟
+        draining = False
+        while self.ready and len(active) < self.scheduler.max_workers:
+            i = heapq.heappop(self.ready)
+            if i in self.finished:
+                continue
+            if self.scheduler.conflicts[i] & active:
+                deferred.append(i)
+                continue
+            blocking = self._blocking_resources(i, active, draining)
+            self._account_wait(i, now, blocking)
+            if blocking:
+                if EXCLUSIVE_RESOURCE in self.scheduler.resources[i]:
+                    draining = True
+                deferred.append(i)
+                continue
+            for tag in self.scheduler.resources[i]:
+                self.resource_usage[tag] = self.resource_usage.get(tag, 0) + 1
+            active.add(i)
+            selected.append(i)
+        for i in deferred:
+            heapq.heappush(self.ready, i)
+        return selected
+
+    def complete(self, future, on_finish: Optional[Callable[[int, BasePlugin, Dict[str, Any]], None]]):
+        """处理一个已结束的任务：回调结果，并释放其下游插件或将其级联跳过"""
+        i = self.running.pop(future)
+        for tag in self.scheduler.resources[i]:
+            self.resource_usage[tag] -= 1
+        try:
+            result = future.result()
+        except asyncio.CancelledError:
+            result = {'success': False, 'error': '用户取消', 'cancelled': True}
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        if not isinstance(result, dict):
+            result = {'success': False, 'error': f'插件返回了无效的结果: {result!r}'}
+
+        self.finished.add(i)
+        if on_finish:
+            on_finish(i, self.scheduler.plugins[i], result)
+
+        if result.get('success', False):
+            for child in self.scheduler.dependents[i]:
+                self.remaining_deps[child] -= 1
+                if self.remaining_deps[child] == 0 and child not in self.finished:
+                    heapq.heappush(self.ready, child)
+        else:
+            self.cascade_skip(i, f"依赖的插件 '{self.scheduler.names[i]}' 执行失败，已跳过")
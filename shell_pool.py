@@ -0,0 +1,353 @@
+import os
+import sys
+import time
+import signal
+import queue
+import atexit
+import base64
+import shutil
+import itertools
+import threading
+import contextlib
+import subprocess
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from plugin_base import CancellationToken, PluginCancelled
+from process_executor import kill_process_tree
+
+
+# ======================================================
+# 常驻 shell 会话
+# 启动 PowerShell 之类的解释器往往比执行一条短命令本身还慢。会话在后台保持一个解释器进程，
+# 命令通过 stdin 写入，执行完后解释器在 stdout 和 stderr 上各输出一行带随机标记的分隔行，
+# 读到两个分隔行即表示命令结束 (stdout 的分隔行同时带回退出码)。
+# ======================================================
+
+class ShellFlavor:
+    """一种 shell 的启动参数与命令包装方式"""
+
+    name = ""
+    encoding = "utf-8"
+
+    def argv(self) -> List[str]:
+        raise NotImplementedError
+
+    def setup(self) -> str:
+        """会话启动后先执行一次的初始化命令"""
+        return ""
+
+    def wrap(self, command: str, token: str) -> str:
+        """把一条命令包装为：执行命令，然后在 stdout 输出 "<token> <退出码>"、在 stderr 输出 "<token>" """
+        raise NotImplementedError
+
+
+class PosixShellFlavor(ShellFlavor):
+    """bash / sh。命令在 { } 中执行，cd 和变量会保留到同一会话的后续命令；命令的 stdin 指向 /dev/null，不会读走后续命令"""
+
+    def __init__(self, name: str, argv: List[str]):
+        self.name = name
+        self._argv = argv
+
+    def argv(self) -> List[str]:
+        return list(self._argv)
+
+    def wrap(self, command: str, token: str) -> str:
+        return (f"{{ {command}\n}} </dev/null\n"
+                f"printf '%s %d\\n' '{token}' \"$?\"\n"
+                f"printf '%s\\n' '{token}' >&2\n")
+
+
+class PowerShellFlavor(ShellFlavor):
+    """
+    Windows PowerShell (非 Windows 上为 pwsh)，以 -Command - 从 stdin 逐行读取命令。
+    命令经 base64 编码后放在一行内交给 Invoke-Expression，多行脚本和引号都不需要转义。
+    """
+
+    name = "powershell"
+
+    def argv(self) -> List[str]:
+        if sys.platform.startswith('win'):
+            executable = r"C:\Windows\System32\WindowsPowerShell\v1.0\powershell.exe"
+        else:
+            executable = shutil.which("pwsh") or "pwsh"
+        return [executable, "-NoLogo", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass",
+                "-Command", "-"]
+
+    def setup(self) -> str:
+        return "[Console]::OutputEncoding = [Text.Encoding]::UTF8; $OutputEncoding = [Text.Encoding]::UTF8\n"
+
+    def wrap(self, command: str, token: str) -> str:
+        encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+        return ("$global:LASTEXITCODE = 0; "
+                f"try {{ Invoke-Expression ([Text.Encoding]::UTF8.GetString([Convert]::FromBase64String('{encoded}'))); "
+                "$__ok = $? } catch { [Console]::Error.WriteLine($_.ToString()); $__ok = $false }; "
+                "$__rc = if ($LASTEXITCODE) { $LASTEXITCODE } elseif ($__ok) { 0 } else { 1 }; "
+                f"[Console]::Out.WriteLine('{token} ' + $__rc); [Console]::Error.WriteLine('{token}')\n")
+
+
+SHELL_FLAVORS: Dict[str, ShellFlavor] = {
+    flavor.name: flavor for flavor in (
+        PowerShellFlavor(),
+        PosixShellFlavor("bash", ["bash", "--noprofile", "--norc"]),
+        PosixShellFlavor("sh", ["sh"]),
+    )
+}
+
+
+def default_flavor() -> str:
+    return "powershell" if sys.platform.startswith('win') else "bash"
+
+
+@dataclass
+class ShellResult:
+    """会话中一条命令的执行结果"""
+    returncode: Optional[int]
+    stdout: str = ""
+    stderr: str = ""
+    timed_out: bool = False
+    # 解释器在执行命令期间退出 (命令中调用了 exit 或解释器崩溃)；会话会在下一条命令前自动重启
+    crashed: bool = False
+    duration: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.crashed
+
+
+class ShellSession:
+    """
+    一个常驻的 shell 解释器进程。同一时间只执行一条命令 (run() 内部加锁)。
+    命令超时或被取消时整个解释器进程树被结束，下一条命令会自动启动新的解释器；restarts 记录重启次数。
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, flavor: str = None):
+        flavor = flavor or default_flavor()
+        if flavor not in SHELL_FLAVORS:
+            raise ValueError(f"未知的 shell 类型: {flavor}")
+        self.flavor = SHELL_FLAVORS[flavor]
+        self.restarts = 0
+        self.commands = 0
+        self._id = f"{next(self._ids)}_{time.monotonic_ns()}"
+        self._process: Optional[subprocess.Popen] = None
+        self._lines: Optional[queue.Queue] = None
+        self._lock = threading.Lock()
+        self._started_once = False
+        # 借出期间的默认日志与取消令牌 (由 ShellPool.session() 设置)
+        self.log: Optional[Callable[[str, str], None]] = None
+        self.cancel_token: Optional[CancellationToken] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self):
+        if self._started_once:
+            self.restarts += 1
+        self._started_once = True
+        if sys.platform.startswith('win'):
+            platform_kwargs = {'creationflags': subprocess.CREATE_NO_WINDOW}
+        else:
+            # 独立的进程组，结束会话时连同命令启动的子进程一起结束
+            platform_kwargs = {'start_new_session': True}
+        self._process = subprocess.Popen(self.flavor.argv(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.PIPE, **platform_kwargs)
+        # 每个解释器进程使用独立的队列，被结束的旧进程残留的输出不会混入新命令
+        self._lines = queue.Queue()
+        for pipe, stream in ((self._process.stdout, 'stdout'), (self._process.stderr, 'stderr')):
+            threading.Thread(target=self._read_pipe, args=(pipe, stream, self._lines),
+                             name=f"ShellReader-{stream}", daemon=True).start()
+        setup = self.flavor.setup()
+        if setup:
+            self._write(setup)
+
+    def _read_pipe(self, pipe, stream: str, lines: queue.Queue):
+        try:
+            for raw in iter(pipe.readline, b""):
+                lines.put((stream, raw.decode(self.flavor.encoding, errors="replace").rstrip("\r\n")))
+        except (OSError, ValueError):
+            pass
+        finally:
+            # 管道由读取线程自己关闭：在其他线程中关闭正被 readline() 阻塞的管道会一直等到读取返回
+            pipe.close()
+            lines.put((stream, None))
+
+    def _write(self, text: str):
+        self._process.stdin.write(text.encode(self.flavor.encoding))
+        self._process.stdin.flush()
+
+    def run(self, command: str, timeout: Optional[float] = None,
+            log: Optional[Callable[[str, str], None]] = None,
+            cancel_token: Optional[CancellationToken] = None) -> ShellResult:
+        """
+        在会话中执行一条命令，输出逐行转发给 log(line, level)。
+        超过 timeout 秒时结束解释器并返回 timed_out=True 的结果；cancel_token 被触发时结束解释器并抛出 PluginCancelled。
+        """
+        log = log or self.log
+        cancel_token = cancel_token or self.cancel_token
+        with self._lock:
+            if not self.alive:
+                self._start()
+            self.commands += 1
+            token = f"__SYSTOOLS_END_{self._id}_{self.commands}__"
+            started = time.monotonic()
+            deadline = started + timeout if timeout is not None else None
+            output = {'stdout': [], 'stderr': []}
+            pending = {'stdout', 'stderr'}
+            returncode = None
+            try:
+                self._write(self.flavor.wrap(command, token))
+            except OSError:
+                # 解释器已退出，按崩溃处理
+                self._lines.put(('stdin', None))
+
+            while pending:
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    self._kill()
+                    raise PluginCancelled("用户取消")
+                if deadline is not None and time.monotonic() >= deadline:
+                    self._kill()
+                    return ShellResult(None, "\n".join(output['stdout']), "\n".join(output['stderr']),
+                                       timed_out=True, duration=time.monotonic() - started)
+                try:
+                    stream, line = self._lines.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    break
+                position = line.find(token)
+                if position != -1:
+                    line, marker = line[:position], line[position + len(token):]
+                    pending.discard(stream)
+                    if stream == 'stdout':
+                        returncode = int(marker.strip() or 0)
+                    if not line:
+                        continue
+                output[stream].append(line)
+                if log is not None:
+                    log(line, "warning" if stream == 'stderr' else "info")
+
+            crashed = bool(pending)
+            if crashed:
+                # 解释器在命令结束前退出：退出码即为结果，下一条命令会启动新的解释器
+                try:
+                    returncode = self._process.wait(1)
+                except subprocess.TimeoutExpired:
+                    self._kill()
+                self._process = None
+            return ShellResult(returncode, "\n".join(output['stdout']), "\n".join(output['stderr']),
+                               crashed=crashed, duration=time.monotonic() - started)
+
+    def _kill(self):
+        if self._process is not None:
+            if sys.platform.startswith('win'):
+                kill_process_tree(self._process.pid)
+            else:
+                try:
+                    os.killpg(self._process.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            try:
+                self._process.wait(2)
+            except subprocess.TimeoutExpired:
+                pass
+            self._close_stdin()
+            self._process = None
+
+    def _close_stdin(self):
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+
+    def close(self, timeout: float = 2.0):
+        """关闭 stdin 让解释器自行退出，超时后强制结束"""
+        with self._lock:
+            if self._process is None:
+                return
+            try:
+                self._close_stdin()
+                self._process.wait(timeout)
+                self._process = None
+            except (OSError, subprocess.TimeoutExpired):
+                self._kill()
+
+
+class ShellPool:
+    """
+    引擎持有的 shell 会话池。插件通过 session() 借用一个会话，用完后归还，空闲会话留给后续命令和插件复用。
+    shutdown() 结束所有会话 (引擎在每次执行结束时调用)；之后再借用时会重新启动解释器。
+    """
+
+    def __init__(self, max_idle: int = 4):
+        self.max_idle = max_idle
+        self._idle: Dict[str, List[ShellSession]] = {}
+        self._sessions: List[ShellSession] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def session(self, flavor: Optional[str] = None, log: Optional[Callable[[str, str], None]] = None,
+                cancel_token: Optional[CancellationToken] = None) -> Iterator[ShellSession]:
+        flavor = flavor or default_flavor()
+        session = self._acquire(flavor)
+        session.log, session.cancel_token = log, cancel_token
+        try:
+            yield session
+        finally:
+            session.log = session.cancel_token = None
+            self._release(flavor, session)
+
+    def _acquire(self, flavor: str) -> ShellSession:
+        with self._lock:
+            idle = self._idle.get(flavor, [])
+            if idle:
+                return idle.pop()
+            session = ShellSession(flavor)
+            self._sessions.append(session)
+            return session
+
+    def _release(self, flavor: str, session: ShellSession):
+        with self._lock:
+            idle = self._idle.setdefault(flavor, [])
+            if session in self._sessions and len(idle) < self.max_idle:
+                idle.append(session)
+                return
+            if session in self._sessions:
+                self._sessions.remove(session)
+        session.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'sessions': len(self._sessions), 'idle': sum(len(v) for v in self._idle.values()),
+                    'restarts': sum(s.restarts for s in self._sessions)}
+
+    def shutdown(self):
+        """结束池中所有会话 (借出中的会话在归还时关闭)"""
+        with self._lock:
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle.clear()
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+_default_pool: Optional[ShellPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> ShellPool:
+    """当前进程的会话池：引擎进程中为 CoreEngine 的会话池，其他进程 (如进程隔离模式的工作进程) 中按需创建"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ShellPool()
+            atexit.register(_default_pool.shutdown)
+        return _default_pool
+
+
+def set_default_pool(pool: ShellPool):
+    global _default_pool
+    with _default_pool_lock:
+        _default_pool = pool
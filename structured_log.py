@@ -0,0 +1,202 @@
+import os
+import io
+import re
+import glob
+import gzip
+import json
+import time
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from events import (ASYNC, BLOCK, EventBus, LogEvent, RunStartedEvent, PluginStartedEvent, PluginFinishedEvent,
+                    PluginSkippedEvent, RunCompletedEvent)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIONS = ("gzip", "zstd", "none")
+
+
+def get_default_log_dir() -> str:
+    """结构化日志的默认保存目录 (与自动模式的文本日志相同，位于系统临时目录)"""
+    return tempfile.gettempdir()
+
+
+class StructuredRunLog:
+    """
+    结构化 JSONL 执行日志。
+    以异步订阅者的身份挂在引擎事件总线上，每个事件写成一行 JSON 对象
+    (run_id、插件、级别、墙上时间与单调时钟时间、耗时、结果等)，便于 grep 和跨机器汇总分析。
+    当前文件超过 max_bytes 后轮转：旧文件被压缩为 <名称>.<序号>.jsonl.gz / .jsonl.zst，之后的事件写入新的当前文件。
+    """
+
+    FILE_PREFIX = "SysTools_RunLog_"
+    EVENT_TYPES = (RunStartedEvent, LogEvent, PluginStartedEvent, PluginFinishedEvent, PluginSkippedEvent,
+                   RunCompletedEvent)
+
+    def __init__(self, log_dir: str, max_bytes: int = 10 * 1024 * 1024, compression: str = "gzip",
+                 name: Optional[str] = None):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"不支持的压缩方式: {compression}")
+        if compression == "zstd" and zstandard is None:
+            print("[WARNING] 未安装 zstandard，结构化日志的轮转文件改用 gzip 压缩")
+            compression = "gzip"
+        self.compression = compression
+        self.max_bytes = max(1024, int(max_bytes))
+        self.base_path = os.path.join(log_dir, name or f"{self.FILE_PREFIX}{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+        self.path = self.base_path + ".jsonl"
+        self.run_id: Optional[str] = None
+
+        self._segment = len(_rotated_segments(self.base_path))
+        self._file = None
+        self._lock = threading.Lock()
+        self._subscription = None
+        # 事件携带的是单调时钟时间，用启动时的差值换算为墙上时间
+        self._wall_offset = time.time() - time.monotonic()
+
+    def attach(self, bus: EventBus):
+        """
+        订阅事件总线 (异步、批量投递，不拖慢插件执行)。
+        日志文件必须完整，队列已满时让发布方等待而不是丢弃事件
+        """
+        self._subscription = bus.subscribe(self.handle_events, event_types=self.EVENT_TYPES, mode=ASYNC,
+                                           max_queue=10000, batch=True, name="StructuredRunLog", overflow=BLOCK)
+
+    def handle_events(self, events: List[Any]):
+        lines = []
+        for event in events:
+            record = self._to_record(event)
+            lines.append(json.dumps(record, ensure_ascii=False, default=repr) + "\n")
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write("".join(lines))
+                self._file.flush()
+                if self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            except OSError as e:
+                print(f"[WARNING] 写入结构化日志失败: {e}")
+
+    def _to_record(self, event: Any) -> Dict[str, Any]:
+        if isinstance(event, RunStartedEvent):
+            self.run_id = event.run_id
+        record = {
+            'ts': round(event.timestamp + self._wall_offset, 6),
+            'mono': round(event.timestamp, 6),
+            'run_id': self.run_id,
+        }
+        if isinstance(event, LogEvent):
+            record.update(event='log', level=event.level, plugin=event.plugin, message=event.message)
+        elif isinstance(event, PluginStartedEvent):
+            record.update(event='plugin_started', plugin=event.plugin_name, index=event.index, total=event.total)
+        elif isinstance(event, PluginFinishedEvent):
+            result = event.result if isinstance(event.result, dict) else {}
+            level = 'success' if result.get('success', False) else 'error'
+            record.update(event='plugin_finished', plugin=event.plugin_name, level=level,
+                          duration=round(event.duration, 3), result=result)
+        elif isinstance(event, PluginSkippedEvent):
+            record.update(event='plugin_skipped', plugin=event.plugin_name, level='warning', reason=event.reason)
+        elif isinstance(event, RunStartedEvent):
+            record.update(event='run_started', plugins=event.plugins, executor=event.executor)
+        elif isinstance(event, RunCompletedEvent):
+            record.update(event='run_completed', executed=event.executed, total=event.total,
+                          failed=event.failed_plugins)
+        return record
+
+    def _rotate(self):
+        """关闭并压缩当前文件 (调用方持有 self._lock)"""
+        self._file.close()
+        self._file = None
+        self._segment += 1
+        rotated = f"{self.base_path}.{self._segment}.jsonl"
+        os.replace(self.path, rotated)
+        if self.compression == "none":
+            return
+        suffix = ".gz" if self.compression == "gzip" else ".zst"
+        with open(rotated, "rb") as src, open(rotated + suffix + ".tmp", "wb") as raw:
+            if self.compression == "gzip":
+                with gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            else:
+                with zstandard.ZstdCompressor().stream_writer(raw, closefd=False) as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(rotated + suffix + ".tmp", rotated + suffix)
+        os.remove(rotated)
+
+    def close(self):
+        """投递完排队中的事件后关闭文件"""
+        if self._subscription is not None:
+            self._subscription.unsubscribe()
+            self._subscription = None
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# ======================================================
+# 流式读取 API
+# ======================================================
+
+def _rotated_segments(base_path: str) -> List[str]:
+    """返回已轮转的分段文件，按写入先后排序"""
+    pattern = re.compile(re.escape(os.path.basename(base_path)) + r"\.(\d+)\.jsonl(\.gz|\.zst)?$")
+    segments = []
+    for path in glob.glob(glob.escape(base_path) + ".*.jsonl*"):
+        match = pattern.match(os.path.basename(path))
+        if match:
+            segments.append((int(match.group(1)), path))
+    return [path for _, path in sorted(segments)]
+
+
+def _open_segment(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"读取 {path} 需要安装 zstandard")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True),
+                                encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def list_run_logs(log_dir: Optional[str] = None) -> List[str]:
+    """列出目录中的结构化日志 (返回当前文件路径，按时间排序)"""
+    log_dir = log_dir or get_default_log_dir()
+    bases = set()
+    for path in glob.glob(os.path.join(glob.escape(log_dir), StructuredRunLog.FILE_PREFIX + "*.jsonl*")):
+        bases.add(re.sub(r"(\.\d+)?\.jsonl(\.gz|\.zst)?$", "", path))
+    return sorted(base + ".jsonl" for base in bases)
+
+
+def iter_run_log(path: str, event: Optional[str] = None, plugin: Optional[str] = None,
+                 run_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    按写入顺序流式读取一份结构化日志 (依次读取已压缩的分段和当前文件)，逐条产出记录字典。
+    可按事件类型、插件名称和 run_id 过滤；写了一半的行会被跳过。
+    """
+    base_path = path[:-len(".jsonl")] if path.endswith(".jsonl") else path
+    segments = _rotated_segments(base_path)
+    if os.path.exists(base_path + ".jsonl"):
+        segments.append(base_path + ".jsonl")
+    for segment in segments:
+        with _open_segment(segment) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if event is not None and record.get('event') != event:
+                    continue
+                if plugin is not None and record.get('plugin') != plugin:
+                    continue
+                if run_id is not None and record.get('run_id') != run_id:
+                    continue
+                yield record
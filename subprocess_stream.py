@@ -0,0 +1,227 @@
+import os
+import time
+import signal
+import codecs
+import locale
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, List, Optional, Sequence, Tuple, Union
+
+from plugin_base import CancellationToken, PluginCancelled
+
+
+# 没有换行符的超长输出 (如进度条) 累积到这个长度时按一行输出，避免缓冲区无限增长
+MAX_PARTIAL_LINE = 64 * 1024
+
+
+@dataclass
+class StreamedProcessResult:
+    """
+    run_streaming() 的执行结果。
+    tail 只保留最后 tail_lines 行 (stdout/stderr 按到达顺序交错)；输出超过这个行数且调用方要求保留完整输出时，
+    完整输出会被写入 spill_path 指向的文件，由调用方负责删除。
+    子进程退出后其后代进程仍占用输出管道时不再等待，output_truncated 为 True，之后的输出不会被收集。
+    """
+    returncode: Optional[int]
+    tail: List[Tuple[str, str]] = field(default_factory=list)
+    line_count: int = 0
+    spill_path: Optional[str] = None
+    timed_out: bool = False
+    duration: float = 0.0
+    output_truncated: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def output(self, stream: Optional[str] = None) -> str:
+        """tail 中的文本；stream 为 'stdout' 或 'stderr' 时只取该输出流"""
+        return "\n".join(line for name, line in self.tail if stream is None or name == stream)
+
+    def summary(self, stream: Optional[str] = None) -> str:
+        """适合放进结果字典的说明：tail 文本，输出被截断时附带完整输出文件的位置"""
+        text = self.output(stream)
+        if self.spill_path:
+            shown = sum(1 for name, _ in self.tail if stream is None or name == stream)
+            text += f"\n(仅显示最后 {shown} 行，共 {self.line_count} 行，完整输出: {self.spill_path})"
+        if self.output_truncated:
+            text += "\n(子进程的后代进程仍占用输出管道，之后的输出未被收集)"
+        return text
+
+
+class _OutputCollector:
+    """汇总两个输出流的行：转发到日志，保留有界的尾部，超出后 (keep_spill 为 True 时) 把完整输出写入文件"""
+
+    def __init__(self, log: Optional[Callable[[str, str], None]], stderr_level: str, tail_lines: int,
+                 spill_dir: Optional[str], keep_spill: bool):
+        self._log = log
+        self._stderr_level = stderr_level
+        self._spill_dir = spill_dir
+        self._keep_spill = keep_spill
+        self._lock = threading.Lock()
+        self.tail: Deque[Tuple[str, str]] = deque(maxlen=max(1, tail_lines))
+        self.line_count = 0
+        self.spill_path: Optional[str] = None
+        self._spill_file = None
+        self._closed = False
+
+    def add(self, stream: str, line: str):
+        if self._closed:
+            # run_streaming() 已经返回：仍未结束的读取线程读到的输出直接丢弃
+            return
+        if self._log is not None:
+            self._log(line, self._stderr_level if stream == 'stderr' else "info")
+        with self._lock:
+            if self._closed:
+                return
+            self.line_count += 1
+            if self._spill_file is None and self._keep_spill and len(self.tail) == self.tail.maxlen:
+                self._start_spill()
+            if self._spill_file is not None:
+                self._spill_file.write(f"{line}\n" if stream == 'stdout' else f"[stderr] {line}\n")
+            self.tail.append((stream, line))
+
+    def _start_spill(self):
+        """尾部缓冲区第一次溢出时创建输出文件，先写入缓冲区中已有的行 (调用方持有 self._lock)"""
+        try:
+            fd, self.spill_path = tempfile.mkstemp(prefix="SysTools_Output_", suffix=".log",
+                                                  dir=self._spill_dir or tempfile.gettempdir())
+            self._spill_file = open(fd, "w", encoding="utf-8")
+        except OSError as e:
+            print(f"[WARNING] 无法创建子进程输出文件，超出部分将只保留在日志中: {e}")
+            self._spill_file = False
+            return
+        for stream, line in self.tail:
+            self._spill_file.write(f"{line}\n" if stream == 'stdout' else f"[stderr] {line}\n")
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._spill_file:
+                self._spill_file.close()
+
+
+def _pump(pipe, stream: str, encoding: str, collector: _OutputCollector):
+    """读取线程：按块读取原始字节，增量解码后逐行交给 collector"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    try:
+        while True:
+            chunk = pipe.read1(65536) if hasattr(pipe, 'read1') else pipe.read(65536)
+            final = not chunk
+            pending += decoder.decode(chunk, final=final)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                collector.add(stream, line.rstrip("\r"))
+            if len(pending) >= MAX_PARTIAL_LINE:
+                collector.add(stream, pending)
+                pending = ""
+            if final:
+                break
+    except (OSError, ValueError):
+        pass
+    finally:
+        if pending.rstrip("\r"):
+            collector.add(stream, pending.rstrip("\r"))
+        pipe.close()
+
+
+def _terminate(process: subprocess.Popen, grace: float, process_group: bool = False):
+    """
+    先请求进程退出，grace 秒后仍未结束则强制结束。
+    process_group 为 True 时 (POSIX，子进程以 start_new_session 启动) 向整个进程组发送信号，后代进程也会被结束
+    """
+    try:
+        if process_group:
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+        process.wait(grace)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    except OSError:
+        pass
+    if process_group:
+        # 进程组中剩余的后代进程 (包括忽略了 SIGTERM 的) 一并强制结束
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def run_streaming(command: Union[str, Sequence[str]],
+                  log: Optional[Callable[[str, str], None]] = None,
+                  cancel_token: Optional[CancellationToken] = None,
+                  encoding: Optional[str] = None,
+                  timeout: Optional[float] = None,
+                  cwd: Optional[str] = None,
+                  env: Optional[dict] = None,
+                  tail_lines: int = 200,
+                  spill_dir: Optional[str] = None,
+                  stderr_level: str = "warning",
+                  kill_grace: float = 2.0,
+                  keep_spill: bool = False,
+                  **popen_kwargs) -> StreamedProcessResult:
+    """
+    运行子进程，并在输出到达时逐行转发给 log(line, level)。
+    stdout/stderr 各由一个读取线程按块读取、用 encoding (默认为系统首选编码) 增量解码，内存中只保留最后 tail_lines 行。
+    超过 timeout 秒时结束子进程并返回 timed_out=True 的结果；cancel_token 被触发时结束子进程并抛出 PluginCancelled。
+    keep_spill 为 True 时，输出超过 tail_lines 行后完整输出写入 spill_dir (默认为临时目录) 中的文件并保留；
+    否则超出部分只出现在日志中，不在磁盘上留下文件。
+    POSIX 上子进程在新的会话 (进程组) 中启动，超时、取消时连同其后代进程一起结束。
+    子进程结束后最多再等待 kill_grace 秒读取剩余输出 (后代进程可能继承并一直占用管道)。
+    其余关键字参数原样传给 subprocess.Popen (如 creationflags)。
+    """
+    encoding = encoding or locale.getpreferredencoding(False)
+    collector = _OutputCollector(log, stderr_level, tail_lines, spill_dir, keep_spill)
+    if os.name == 'posix':
+        popen_kwargs.setdefault('start_new_session', True)
+    process_group = os.name == 'posix' and bool(popen_kwargs.get('start_new_session'))
+    started = time.monotonic()
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               cwd=cwd, env=env, **popen_kwargs)
+    readers = [threading.Thread(target=_pump, args=(pipe, name, encoding, collector),
+                                name=f"SubprocessReader-{name}", daemon=True)
+               for pipe, name in ((process.stdout, 'stdout'), (process.stderr, 'stderr'))]
+    for reader in readers:
+        reader.start()
+
+    timed_out = cancelled = output_truncated = False
+    deadline = started + timeout if timeout is not None else None
+    try:
+        while True:
+            try:
+                process.wait(0.1)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if cancel_token is not None and cancel_token.is_cancelled:
+                cancelled = True
+            elif deadline is not None and time.monotonic() >= deadline:
+                timed_out = True
+            if cancelled or timed_out:
+                _terminate(process, kill_grace, process_group)
+                break
+    finally:
+        if process.poll() is None:
+            # 等待期间出现异常 (如 KeyboardInterrupt)：不留下孤儿进程
+            _terminate(process, kill_grace, process_group)
+        # 子进程的后代进程可能仍持有管道 (正常退出时也是如此)，最多再等一小会儿
+        join_deadline = time.monotonic() + kill_grace
+        for reader in readers:
+            reader.join(max(0.0, join_deadline - time.monotonic()))
+        output_truncated = any(reader.is_alive() for reader in readers)
+        collector.close()
+    if output_truncated:
+        print(f"[WARNING] 子进程已退出，但其后代进程仍占用输出管道，之后的输出不再收集: {command}")
+
+    if cancelled:
+        raise PluginCancelled("用户取消")
+    return StreamedProcessResult(returncode=None if timed_out else process.returncode, tail=list(collector.tail),
+                                 line_count=collector.line_count, spill_path=collector.spill_path,
+                                 timed_out=timed_out, duration=time.monotonic() - started,
+                                 output_truncated=output_truncated)
@@ -0,0 +1,23 @@
+import os
+import sys
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def load_plugin(tmp_path):
+    """把插件源码写入临时目录并导入，返回其中指定的插件类的实例"""
+    def load(source: str, class_name: str, module_name: str = "tmp_plugin"):
+        module_file = tmp_path / f"{module_name}.py"
+        module_file.write_text(source, encoding="utf-8")
+        spec = importlib.util.spec_from_file_location(module_name, module_file)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        return getattr(module, class_name)()
+    yield load
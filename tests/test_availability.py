@@ -0,0 +1,131 @@
+import sys
+import time
+import threading
+
+from availability import AvailabilityProber
+from plugin_base import BasePlugin
+from plugin_manager import PluginManager
+from plugin_manifest import LazyPlugin
+
+
+class TogglePlugin(BasePlugin):
+    """可用性由 available 属性决定，并记录被检查的次数"""
+
+    def __init__(self, name="toggle", available=True):
+        self.name = name
+        self.available = available
+        self.calls = 0
+
+    def get_name(self):
+        return self.name
+
+    def get_description(self):
+        return "测试插件"
+
+    def is_available(self):
+        self.calls += 1
+        return self.available
+
+    def execute(self, context=None):
+        return {'success': True}
+
+
+class HangingPlugin(TogglePlugin):
+    def __init__(self, name, release: threading.Event):
+        super().__init__(name)
+        self.release = release
+
+    def is_available(self):
+        self.release.wait()
+        return True
+
+
+def _lazy(real: BasePlugin) -> LazyPlugin:
+    metadata = {'class': type(real).__name__, 'name': real.get_name(), 'description': real.get_description()}
+    return LazyPlugin(metadata, "tests.fake", __file__, loader=lambda: real)
+
+
+def test_ttl_rechecks_lazy_plugin():
+    real = TogglePlugin()
+    plugin = _lazy(real)
+    prober = AvailabilityProber(workers=2, timeout=5, ttl=0.1)
+    try:
+        assert prober.is_available(plugin) is True
+        real.available = False
+        # 有效期内复用缓存的结果
+        assert prober.is_available(plugin) is True
+        time.sleep(0.2)
+        assert prober.is_available(plugin) is False
+        assert real.calls == 2
+    finally:
+        prober.shutdown()
+
+
+def test_lazy_plugin_does_not_cache_availability():
+    real = TogglePlugin()
+    plugin = _lazy(real)
+    assert plugin.is_available() is True
+    real.available = False
+    assert plugin.is_available() is False
+
+
+def test_queued_probe_times_out_behind_hung_probes():
+    release = threading.Event()
+    prober = AvailabilityProber(workers=1, timeout=0.5, ttl=60)
+    try:
+        prober.probe([HangingPlugin("hung", release)])
+        queued = TogglePlugin("queued")
+        outcome = []
+        # 唯一的工作线程被卡住，排队的检查从提交起计时并按不可用处理
+        waiter = threading.Thread(target=lambda: outcome.append(prober.is_available(queued)), daemon=True)
+        waiter.start()
+        waiter.join(3)
+        assert outcome == [False]
+    finally:
+        release.set()
+        prober.shutdown()
+
+
+SLOW_LAZY_MODULE = '''
+import time
+from plugin_base import BasePlugin, plugin_metadata
+
+with open({counter!r}, "a") as f:
+    f.write("x")
+time.sleep(0.3)
+
+
+@plugin_metadata(name="first", description="测试插件")
+class FirstPlugin(BasePlugin):
+    def execute(self, context=None):
+        return {{'success': True}}
+
+
+@plugin_metadata(name="second", description="测试插件")
+class SecondPlugin(BasePlugin):
+    def execute(self, context=None):
+        return {{'success': True}}
+'''
+
+
+def test_lazy_plugins_of_one_module_import_it_once(tmp_path):
+    counter = tmp_path / "imports.txt"
+    plugins_dir = tmp_path / "plugins"
+    plugins_dir.mkdir()
+    (plugins_dir / "lazy_pair.py").write_text(SLOW_LAZY_MODULE.format(counter=str(counter)), encoding="utf-8")
+    try:
+        manager = PluginManager(str(plugins_dir))
+        plugins = manager.discover_plugins()
+        assert all(isinstance(plugin, LazyPlugin) for plugin in plugins)
+
+        # 同一模块中的两个插件在不同线程中同时按需加载
+        threads = [threading.Thread(target=plugin.load) for plugin in plugins]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert counter.read_text() == "x"
+        module = sys.modules["lazy_pair"]
+        assert {type(plugin.load()) for plugin in plugins} == {module.FirstPlugin, module.SecondPlugin}
+    finally:
+        sys.modules.pop("lazy_pair", None)
@@ -0,0 +1,22 @@
+import pytest
+
+from core import CoreEngine
+
+
+@pytest.mark.parametrize("result", [
+    {'success': True},
+    {'success': False, 'error': '执行失败'},
+    {'success': False, 'error': '执行超时 (超过5秒)，插件进程已被终止'},
+])
+def test_real_runs_count_toward_timing(result):
+    assert CoreEngine._counts_toward_timing(result)
+
+
+@pytest.mark.parametrize("result", [
+    {'success': True, 'up_to_date': True},
+    {'success': False, 'unavailable': True, 'error': '插件在当前系统上不可用'},
+    {'success': False, 'error': '用户取消', 'cancelled': True},
+    {'success': False, 'error': '用户取消，插件进程已被终止', 'cancelled': True},
+])
+def test_skipped_and_cancelled_runs_do_not_count(result):
+    assert not CoreEngine._counts_toward_timing(result)
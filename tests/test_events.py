@@ -0,0 +1,65 @@
+import threading
+
+from events import ASYNC, BLOCK, EventBus, LogEvent, RunCompletedEvent
+
+
+def _gated_subscriber(bus, **kwargs):
+    """投递线程在 gate 打开之前阻塞在第一个事件上的订阅者"""
+    gate = threading.Event()
+    received = []
+
+    def callback(event):
+        gate.wait(10)
+        received.append(event)
+
+    subscription = bus.subscribe(callback, mode=ASYNC, **kwargs)
+    return subscription, gate, received
+
+
+def test_drop_oldest_drops_log_events_and_keeps_critical():
+    bus = EventBus()
+    subscription, gate, received = _gated_subscriber(bus, max_queue=5)
+    for i in range(50):
+        bus.publish(LogEvent(f"line {i}"))
+        assert len(subscription._queue) <= 5
+    bus.publish(RunCompletedEvent())
+    gate.set()
+    assert subscription.flush(5)
+
+    assert subscription.dropped > 0
+    assert isinstance(received[-1], RunCompletedEvent)
+    bus.close()
+
+
+def test_queue_limit_enforced_when_nothing_can_be_dropped():
+    bus = EventBus()
+    subscription, gate, received = _gated_subscriber(bus, max_queue=3)
+    publisher = threading.Thread(target=lambda: [bus.publish(RunCompletedEvent(executed=i)) for i in range(10)],
+                                 daemon=True)
+    publisher.start()
+    publisher.join(0.5)
+
+    # 队列中都是 critical 事件，不能丢弃：发布方等待而不是让队列超出容量
+    assert publisher.is_alive()
+    assert len(subscription._queue) <= 3
+    gate.set()
+    publisher.join(5)
+    assert not publisher.is_alive()
+    assert subscription.flush(5)
+    assert [event.executed for event in received] == list(range(10))
+    bus.close()
+
+
+def test_block_policy_never_drops():
+    bus = EventBus()
+    received = []
+    subscription = bus.subscribe(lambda events: received.extend(events), mode=ASYNC, batch=True,
+                                 max_queue=10, overflow=BLOCK)
+    for i in range(2000):
+        bus.publish(LogEvent(f"line {i}"))
+        assert len(subscription._queue) <= 10
+    assert subscription.flush(5)
+
+    assert subscription.dropped == 0
+    assert [event.message for event in received] == [f"line {i}" for i in range(2000)]
+    bus.close()
@@ -0,0 +1,54 @@
+import pytest
+
+from plugin_base import BasePlugin, plugin_metadata
+
+
+def test_plugin_without_execute_rejected_at_class_creation():
+    with pytest.raises(TypeError, match="未实现"):
+        class NoExecute(BasePlugin):
+            def get_name(self):
+                return "none"
+
+            def get_description(self):
+                return "none"
+
+
+def test_plugin_with_both_execute_methods_rejected():
+    with pytest.raises(TypeError, match="同时实现了"):
+        class Both(BasePlugin):
+            def execute(self, context=None):
+                return {'success': True}
+
+            async def execute_async(self, context):
+                return {'success': True}
+
+
+def test_sync_execute_async_rejected():
+    with pytest.raises(TypeError, match="async def"):
+        class NotCoroutine(BasePlugin):
+            def execute_async(self, context):
+                return {'success': True}
+
+
+def test_async_and_decorated_plugins_accepted():
+    @plugin_metadata(name="异步插件", description="d")
+    class AsyncPlugin(BasePlugin):
+        async def execute_async(self, context=None):
+            return {'success': True}
+
+    assert AsyncPlugin().execute() == {'success': True}
+
+
+def test_abstract_intermediate_base_skips_check():
+    class CommonBase(BasePlugin, abstract=True):
+        def get_description(self):
+            return "共用的描述"
+
+    class Concrete(CommonBase):
+        def get_name(self):
+            return "concrete"
+
+        def execute(self, context=None):
+            return {'success': True}
+
+    assert Concrete().execute() == {'success': True}
@@ -0,0 +1,122 @@
+import os
+import zipfile
+import threading
+import time
+
+import pytest
+
+from plugin_bundle import BundleError, build_bundle, close_bundle, get_resources, open_bundle
+from plugin_manager import PluginManager
+
+PLUGIN_SOURCE = '''
+from plugin_base import BasePlugin, plugin_metadata
+from plugin_bundle import get_resources
+
+
+@plugin_metadata(name="包中插件", description="从插件包中加载", tags=["bundle"])
+class BundledPlugin(BasePlugin):
+    def execute(self, context=None):
+        return {'success': True, 'data': get_resources(__name__).read_text("data.txt")}
+'''
+
+
+@pytest.fixture
+def bundle_path(tmp_path):
+    source = tmp_path / "src" / "bundled_mod.py"
+    source.parent.mkdir()
+    source.write_text(PLUGIN_SOURCE, encoding="utf-8")
+    tools = tmp_path / "src" / "tools"
+    tools.mkdir()
+    (tools / "data.txt").write_text("资源内容", encoding="utf-8")
+    plugins_dir = tmp_path / "plugins"
+    plugins_dir.mkdir()
+    path = plugins_dir / "50_test.stpkg"
+    build_bundle(str(path), [str(source)], tools_dir=str(tools), version="1.2")
+    yield path
+    close_bundle(str(path))
+
+
+def _rewrite_member(path, member, data):
+    """替换 zip 中的一个成员 (模拟被篡改的插件包)"""
+    with zipfile.ZipFile(path) as archive:
+        items = [(info, archive.read(info)) for info in archive.infolist()]
+    with zipfile.ZipFile(path, "w") as archive:
+        for info, content in items:
+            archive.writestr(info, data if info.filename == member else content)
+
+
+def test_built_bundle_verifies_and_loads(bundle_path):
+    bundle = open_bundle(str(bundle_path))
+    bundle.verify()
+    entries = bundle.plugin_entries()
+    assert [(e["module"], e["class"], e["name"]) for e in entries] == [("bundled_mod", "BundledPlugin", "包中插件")]
+
+    module = bundle.import_module("bundled_mod")
+    assert module.BundledPlugin().execute() == {'success': True, 'data': "资源内容"}
+    assert get_resources("bundled_mod").exists("data.txt")
+
+
+def test_tampered_bundle_is_rejected(bundle_path):
+    _rewrite_member(bundle_path, "tools/data.txt", "被篡改".encode("utf-8"))
+    with pytest.raises(BundleError, match="已被修改"):
+        open_bundle(str(bundle_path)).verify()
+
+
+def test_unlisted_member_is_rejected(bundle_path):
+    with zipfile.ZipFile(bundle_path, "a") as archive:
+        archive.writestr("extra.py", "print('x')")
+    with pytest.raises(BundleError, match="清单之外"):
+        open_bundle(str(bundle_path)).verify()
+
+
+def test_plugin_manager_loads_bundle_lazily(bundle_path):
+    manager = PluginManager(str(bundle_path.parent))
+    plugins = manager.discover_plugins()
+    assert [plugin.get_name() for plugin in plugins] == ["包中插件"]
+    assert not plugins[0].is_loaded
+    assert plugins[0].execute()['data'] == "资源内容"
+
+
+def test_plugin_manager_skips_tampered_bundle(bundle_path):
+    _rewrite_member(bundle_path, "tools/data.txt", b"tampered")
+    manager = PluginManager(str(bundle_path.parent))
+    assert manager.discover_plugins() == []
+
+
+def test_concurrent_as_file_extracts_once(bundle_path, tmp_path, monkeypatch):
+    monkeypatch.setattr("plugin_bundle.get_default_cache_dir", lambda: str(tmp_path / "cache"))
+    bundle = open_bundle(str(bundle_path))
+    read_member = bundle.read_member
+
+    def slow_read_member(member):
+        # 模拟较大的资源，让多个线程同时处于解出过程中
+        time.sleep(0.02)
+        return read_member(member)
+
+    monkeypatch.setattr(bundle, "read_member", slow_read_member)
+    resources = bundle.resources
+    barrier = threading.Barrier(8)
+    paths, errors = [], []
+
+    def extract():
+        barrier.wait()
+        try:
+            paths.append(resources.as_file("data.txt"))
+        except Exception as e:
+            errors.append(e)
+
+    for _ in range(5):
+        for root, _, files in os.walk(tmp_path / "cache"):
+            for name in files:
+                os.chmod(os.path.join(root, name), 0o600)
+                os.remove(os.path.join(root, name))
+        threads = [threading.Thread(target=extract) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+    assert errors == []
+    assert len(set(paths)) == 1
+    with open(paths[0], encoding="utf-8") as f:
+        assert f.read() == "资源内容"
+    assert os.listdir(os.path.dirname(paths[0])) == ["data.txt"]
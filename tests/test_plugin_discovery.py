@@ -0,0 +1,179 @@
+import sys
+import time
+
+import pytest
+
+from discovery_cache import DiscoveryCache
+from plugin_manager import PluginManager
+
+SLOW_PLUGIN = '''
+import time
+from plugin_base import BasePlugin
+
+PLUGIN_IMPORT_THREAD_SAFE = True
+time.sleep(0.3)
+
+
+class SlowPlugin(BasePlugin):
+    def get_name(self):
+        return "{name}"
+
+    def get_description(self):
+        return "导入较慢"
+
+    def execute(self, context=None):
+        return {{'success': True}}
+'''
+
+PACKAGE_PLUGIN = '''
+from plugin_base import BasePlugin
+from .helper import VALUE
+
+
+class NestedPlugin(BasePlugin):
+    def get_name(self):
+        return "nested"
+
+    def get_description(self):
+        return "包中的插件"
+
+    def execute(self, context=None):
+        return {'success': VALUE == 42}
+'''
+
+
+@pytest.fixture
+def plugins_dir(tmp_path):
+    directory = tmp_path / "plugins"
+    directory.mkdir()
+    for i in range(4):
+        (directory / f"2{i}_slow.py").write_text(SLOW_PLUGIN.format(name=f"slow{i}"), encoding="utf-8")
+    package = directory / "10_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "helper.py").write_text("VALUE = 42\n")
+    (package / "nested.py").write_text(PACKAGE_PLUGIN, encoding="utf-8")
+    (directory / "tools").mkdir()
+    (directory / "tools" / "not_a_plugin.py").write_text("raise RuntimeError('不应被导入')\n")
+    yield directory
+    _unload_plugin_modules()
+
+
+def _unload_plugin_modules():
+    for name in list(sys.modules):
+        if name.startswith(("2", "10_pkg", "counted", "needs_dep", "broken", "late_dep")):
+            del sys.modules[name]
+
+
+def _discover(plugins_dir, import_workers):
+    manager = PluginManager(str(plugins_dir), import_workers=import_workers)
+    started = time.monotonic()
+    plugins = manager.discover_plugins()
+    return manager, [plugin.get_name() for plugin in plugins], time.monotonic() - started
+
+
+def test_nested_packages_are_discovered_in_path_order(plugins_dir):
+    manager, names, _ = _discover(plugins_dir, import_workers=1)
+    assert names == ["nested", "slow0", "slow1", "slow2", "slow3"]
+    assert manager.get_plugin_by_name("nested").execute() == {'success': True}
+    assert not manager.import_errors
+
+
+def test_parallel_import_keeps_order_and_is_faster(plugins_dir):
+    _, serial_names, serial_elapsed = _discover(plugins_dir, import_workers=1)
+    # 首次发现直接使用 sys.modules 中已导入的模块，卸载后第二次发现才会真正重新导入
+    _unload_plugin_modules()
+    manager, parallel_names, parallel_elapsed = _discover(plugins_dir, import_workers=8)
+    assert parallel_names == serial_names
+    assert serial_elapsed >= 1.2
+    assert parallel_elapsed < serial_elapsed / 2
+    assert set(manager.import_times) >= {f"2{i}_slow" for i in range(4)} | {"10_pkg.nested"}
+
+
+COUNTED_PLUGIN = '''
+from plugin_base import BasePlugin
+
+with open({counter!r}, "a") as f:
+    f.write("x")
+
+
+class CountedPlugin(BasePlugin):
+    def get_name(self):
+        return "{name}"
+
+    def get_description(self):
+        return "记录导入次数"
+
+    def execute(self, context=None):
+        return {{'success': True}}
+'''
+
+
+def test_modules_are_reimported_only_after_refresh(tmp_path):
+    counter = tmp_path / "imports.txt"
+    directory = tmp_path / "counted_plugins"
+    directory.mkdir()
+    plugin_file = directory / "counted.py"
+    plugin_file.write_text(COUNTED_PLUGIN.format(counter=str(counter), name="v1"), encoding="utf-8")
+    try:
+        first = PluginManager(str(directory))
+        assert [p.get_name() for p in first.discover_plugins()] == ["v1"]
+        # 另一个管理器首次发现时不会从 sys.modules 中移除并重复执行已导入的模块
+        second = PluginManager(str(directory))
+        assert [p.get_name() for p in second.discover_plugins()] == ["v1"]
+        assert counter.read_text() == "x"
+
+        plugin_file.write_text(COUNTED_PLUGIN.format(counter=str(counter), name="v2-changed"), encoding="utf-8")
+        diff = second.refresh()
+        assert [p.get_name() for p in diff.added] == ["v2-changed"]
+        assert counter.read_text() == "xx"
+    finally:
+        _unload_plugin_modules()
+
+
+NEEDS_DEPENDENCY = '''
+import late_dep
+from plugin_base import BasePlugin
+
+
+class NeedsDependency(BasePlugin):
+    def get_name(self):
+        return "needs_dep"
+
+    def get_description(self):
+        return "依赖尚未安装的模块"
+
+    def execute(self, context=None):
+        return {'success': True}
+'''
+
+
+def test_missing_dependency_errors_are_not_cached(tmp_path, monkeypatch):
+    directory = tmp_path / "dep_plugins"
+    directory.mkdir()
+    (directory / "needs_dep.py").write_text(NEEDS_DEPENDENCY, encoding="utf-8")
+    (directory / "broken.py").write_text("def broken(:\n", encoding="utf-8")
+    cache_dir = str(tmp_path / "cache")
+    try:
+        manager = PluginManager(str(directory), cache=DiscoveryCache(cache_dir))
+        assert manager.discover_plugins() == []
+        assert manager.import_errors["needs_dep"].startswith("ModuleNotFoundError")
+        assert manager.import_errors["broken"].startswith("SyntaxError")
+
+        # 安装依赖后，插件文件未变化也会重新导入；语法错误仍从缓存读取
+        deps = tmp_path / "deps"
+        deps.mkdir()
+        (deps / "late_dep.py").write_text("", encoding="utf-8")
+        monkeypatch.syspath_prepend(str(deps))
+        cache = DiscoveryCache(cache_dir)
+        manager = PluginManager(str(directory), cache=cache)
+        assert [p.get_name() for p in manager.discover_plugins()] == ["needs_dep"]
+        assert "broken" in manager.import_errors and cache.hits == 1
+
+        # 换用其他解释器后缓存的错误失效
+        monkeypatch.setattr("discovery_cache._interpreter", lambda: "other-python")
+        cache = DiscoveryCache(cache_dir)
+        PluginManager(str(directory), cache=cache).discover_plugins()
+        assert cache.hits == 1 and cache.misses == 1
+    finally:
+        _unload_plugin_modules()
@@ -0,0 +1,85 @@
+import pytest
+
+from plugin_base import BasePlugin
+from plugin_registry import PluginRegistry, QueryError, parse_query
+
+
+class TaggedPlugin(BasePlugin):
+    def __init__(self, name, tags=(), category=None, phase=None, resources=()):
+        self.name = name
+        self.tags = list(tags)
+        self.category = category
+        self.phase = phase
+        self.resources = list(resources)
+
+    def get_name(self):
+        return self.name
+
+    def get_description(self):
+        return self.name
+
+    def execute(self, context=None):
+        return {'success': True}
+
+
+@pytest.fixture
+def registry():
+    return PluginRegistry([
+        TaggedPlugin("注册表修复", tags=["Registry"], category="系统", phase=1, resources=["registry"]),
+        TaggedPlugin("网络重置", tags=["network", "slow"], category="网络", phase=2, resources=["network-stack"]),
+        TaggedPlugin("磁盘清理", tags=["disk", "slow"], category="系统", phase=3),
+        TaggedPlugin("注册表测试", tags=["registry", "测试"], phase=None),
+    ])
+
+
+def _names(plugins):
+    return [plugin.get_name() for plugin in plugins]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("tag:registry", ["注册表修复", "注册表测试"]),
+    ("tag:registry and not tag:测试", ["注册表修复"]),
+    ("tag:network-stack", ["网络重置"]),
+    ("category:网络 or phase:3", ["网络重置", "磁盘清理"]),
+    ("phase:<=2", ["注册表修复", "网络重置"]),
+    ("phase:>1 and tag:slow", ["网络重置", "磁盘清理"]),
+    ('name:"注册表修复"', ["注册表修复"]),
+    ("注册表*", ["注册表修复", "注册表测试"]),
+    ("(tag:disk or tag:registry) and not name:*测试*", ["注册表修复", "磁盘清理"]),
+    ("not not tag:SLOW", ["网络重置", "磁盘清理"]),
+    ("tag:nothing", []),
+])
+def test_select(registry, query, expected):
+    assert _names(registry.select(query)) == expected
+
+
+@pytest.mark.parametrize("query, message", [
+    ("", "为空"),
+    ("tag:", "缺少值"),
+    ("owner:me", "未知的字段"),
+    ("(tag:disk", "右括号"),
+    ("tag:disk tag:slow", "and / or"),
+    ("tag:disk and", "查询意外结束"),
+    ("phase:abc", "整数"),
+])
+def test_invalid_queries(registry, query, message):
+    with pytest.raises(QueryError, match=message):
+        registry.select(query)
+
+
+def test_lookup_by_name_keeps_list_order(registry):
+    assert registry.get("网络重置").get_name() == "网络重置"
+    assert registry.get("不存在") is None
+    assert _names(registry.get_many(["磁盘清理", "注册表修复"])) == ["注册表修复", "磁盘清理"]
+
+
+def test_parse_query_precedence():
+    assert parse_query("a or b and not c") == (
+        "or", ("term", "name", "a"), ("and", ("term", "name", "b"), ("not", ("term", "name", "c"))))
+
+
+def test_large_registry_select():
+    plugins = [TaggedPlugin(f"p{i}", tags=["even" if i % 2 == 0 else "odd"], phase=i % 5) for i in range(5000)]
+    registry = PluginRegistry(plugins)
+    selected = registry.select("tag:even and phase:0")
+    assert _names(selected) == [f"p{i}" for i in range(0, 5000, 10)]
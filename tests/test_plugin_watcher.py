@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+from plugin_manager import PluginManager
+from plugin_watcher import PluginWatcher
+
+PLUGIN_SOURCE = '''
+from plugin_base import BasePlugin
+
+class {cls}(BasePlugin):
+    def get_name(self):
+        return "{name}"
+
+    def get_description(self):
+        return "测试插件"
+
+    def execute(self, context=None):
+        return {{'success': True}}
+'''
+
+
+def _write_plugin(path, name, cls="TestPlugin"):
+    path.write_text(PLUGIN_SOURCE.format(cls=cls, name=name), encoding="utf-8")
+    # 保证修改时间与上一次写入不同
+    stamp = time.time() + len(name)
+    os.utime(path, (stamp, stamp))
+
+
+@pytest.fixture
+def plugins_dir(tmp_path):
+    directory = tmp_path / "plugins"
+    directory.mkdir()
+    yield directory
+    for name in list(sys.modules):
+        if name.startswith(("w_", "pkg")):
+            del sys.modules[name]
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher_factory(request, plugins_dir):
+    watchers = []
+
+    def create():
+        changed = threading.Event()
+        watcher = PluginWatcher(str(plugins_dir), changed.set, interval=0.1, debounce=0.1)
+        if request.param == "polling":
+            watcher._inotify = None
+            watcher.backend = "polling"
+        elif watcher.backend != "inotify":
+            pytest.skip("当前系统不支持 inotify")
+        watcher.start()
+        time.sleep(0.3)
+        watchers.append(watcher)
+        return watcher, changed
+
+    yield create
+    for watcher in watchers:
+        watcher.stop()
+
+
+def test_watcher_reports_new_and_modified_files(plugins_dir, watcher_factory):
+    watcher, changed = watcher_factory()
+    _write_plugin(plugins_dir / "w_a.py", "a")
+    assert changed.wait(5)
+
+    changed.clear()
+    (plugins_dir / "notes.txt").write_text("与插件无关的文件")
+    assert not changed.wait(0.8)
+
+    _write_plugin(plugins_dir / "w_a.py", "a2")
+    assert changed.wait(5)
+
+
+def test_watcher_follows_packages(plugins_dir, watcher_factory):
+    watcher, changed = watcher_factory()
+    package = plugins_dir / "pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    # 新目录本身还没有插件文件；等监视器处理完目录创建事件
+    time.sleep(0.5)
+    changed.clear()
+    _write_plugin(package / "mod.py", "nested")
+    assert changed.wait(5)
+
+
+def test_refresh_reloads_only_changed_files(plugins_dir):
+    _write_plugin(plugins_dir / "w_a.py", "a", "PluginA")
+    _write_plugin(plugins_dir / "w_b.py", "b", "PluginB")
+    manager = PluginManager(str(plugins_dir))
+    before = {plugin.get_name(): plugin for plugin in manager.discover_plugins()}
+
+    _write_plugin(plugins_dir / "w_b.py", "b2", "PluginB")
+    _write_plugin(plugins_dir / "w_c.py", "c", "PluginC")
+    diff = manager.refresh()
+
+    assert sorted(p.get_name() for p in diff.added) == ["b2", "c"]
+    assert [p.get_name() for p in diff.removed] == ["b"]
+    after = {plugin.get_name(): plugin for plugin in manager.plugins}
+    # 未变化的文件保留原有的插件实例
+    assert after["a"] is before["a"]
+    assert not manager.refresh().added
@@ -0,0 +1,64 @@
+import time
+import threading
+
+from conftest import ROOT
+from process_executor import ProcessPluginRunner
+
+
+# 持续向 stdout 输出、从不自行结束的插件
+CHATTY_PLUGIN = '''
+from plugin_base import BasePlugin
+
+class ChattyPlugin(BasePlugin):
+    def get_name(self):
+        return "chatty"
+
+    def get_description(self):
+        return "不停输出日志"
+
+    def execute(self, context=None):
+        while True:
+            print("x" * 200, flush=True)
+'''
+
+
+def _runner(tmp_path, should_stop, **kwargs):
+    return ProcessPluginRunner(should_stop, log=lambda message, level="info": None,
+                               extra_paths=[ROOT, str(tmp_path)], **kwargs)
+
+
+def _run_bounded(runner, plugin, limit=15.0):
+    """在线程中执行插件；监督循环失效时测试失败而不是一直挂起"""
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(result=runner.run(plugin)), daemon=True)
+    started = time.monotonic()
+    thread.start()
+    thread.join(limit)
+    assert not thread.is_alive(), f"插件进程在 {limit:g} 秒内没有被终止"
+    return outcome['result'], time.monotonic() - started
+
+
+def test_timeout_enforced_while_plugin_floods_output(tmp_path, load_plugin, capsys):
+    plugin = load_plugin(CHATTY_PLUGIN, "ChattyPlugin", "chatty_timeout")
+    runner = _runner(tmp_path, lambda: False, default_timeout=1)
+
+    result, elapsed = _run_bounded(runner, plugin)
+
+    assert result['success'] is False
+    assert '超时' in result['error']
+    # 1 秒超时 + 进程启动与终止的开销
+    assert elapsed < 10
+
+
+def test_cancel_enforced_while_plugin_floods_output(tmp_path, load_plugin, capsys):
+    plugin = load_plugin(CHATTY_PLUGIN, "ChattyPlugin", "chatty_cancel")
+    stop = threading.Event()
+    runner = _runner(tmp_path, stop.is_set)
+    runner.CANCEL_GRACE_PERIOD = 0.5
+    threading.Timer(1.0, stop.set).start()
+
+    result, elapsed = _run_bounded(runner, plugin)
+
+    assert result['success'] is False
+    assert '取消' in result['error']
+    assert elapsed < 10
@@ -0,0 +1,108 @@
+import os
+import time
+from types import SimpleNamespace
+
+from run_journal import RunJournal
+
+
+def _interrupted_run(journal_dir, run_id="20260101_000000_1"):
+    journal = RunJournal(str(journal_dir), run_id)
+    journal.start_run(["a", "b", "c"])
+    journal.record("a", RunJournal.STARTED)
+    journal.record("a", RunJournal.SUCCEEDED, {'success': True})
+    journal.record("b", RunJournal.STARTED)
+    journal.record("b", RunJournal.FAILED, {'success': False, 'error': '失败'})
+    journal.record("c", RunJournal.STARTED)
+    journal.close()
+    return journal
+
+
+def test_completed_plugins_uses_last_state(tmp_path):
+    journal = _interrupted_run(tmp_path)
+    assert journal.completed_plugins() == {"a"}
+    assert journal.plugin_states()["c"]["state"] == RunJournal.STARTED
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    journal = _interrupted_run(tmp_path)
+    # 模拟写入最后一条记录时机器断电
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"event": "plugin", "plugin": "c", "sta')
+    assert journal.completed_plugins() == {"a"}
+
+
+def test_find_resumable_returns_latest_unfinished_run(tmp_path):
+    _interrupted_run(tmp_path, "20260101_000000_1")
+    assert RunJournal.find_resumable(str(tmp_path)).run_id == "20260101_000000_1"
+    assert RunJournal.find_resumable(str(tmp_path), "20260101_000000_1") is not None
+    assert RunJournal.find_resumable(str(tmp_path), "missing") is None
+
+
+def _successful_run(journal_dir, run_id, names, mode=RunJournal.MODE_AUTO):
+    journal = RunJournal(str(journal_dir), run_id)
+    journal.start_run(names, mode=mode)
+    for name in names:
+        journal.record(name, RunJournal.SUCCEEDED, {'success': True})
+    journal.finish_run(0)
+    journal.close()
+    return journal
+
+
+def _age(journal, seconds):
+    past = time.time() - seconds
+    os.utime(journal.path, (past, past))
+
+
+def test_latest_successful_run_is_still_resumable(tmp_path):
+    _age(_interrupted_run(tmp_path, "20260101_000000_1"), 60)
+    _successful_run(tmp_path, "20260101_000100_2", ["a"])
+    journal = RunJournal.find_resumable(str(tmp_path))
+    assert journal.run_id == "20260101_000100_2"
+    assert journal.is_fully_successful()
+
+
+def test_gui_runs_are_not_resumed(tmp_path):
+    _age(_interrupted_run(tmp_path, "20260101_000000_1"), 60)
+    _successful_run(tmp_path, "20260101_000100_2", ["a"], mode=RunJournal.MODE_GUI)
+    assert RunJournal.find_resumable(str(tmp_path)).run_id == "20260101_000000_1"
+
+    os.remove(RunJournal(str(tmp_path), "20260101_000000_1").path)
+    assert RunJournal.find_resumable(str(tmp_path)) is None
+
+
+def test_resume_after_successful_run_executes_nothing(tmp_path):
+    from core import CoreEngine
+
+    _successful_run(tmp_path, "20260101_000100_2", ["a", "b"])
+    engine = object.__new__(CoreEngine)
+    engine.args = SimpleNamespace(resume='latest')
+    engine.journal_dir = str(tmp_path)
+    engine.journal = None
+    engine.plugins = [SimpleNamespace(get_name=lambda: "a"), SimpleNamespace(get_name=lambda: "b")]
+    engine._prepare_resume()
+    assert engine.plugins == []
+    assert engine.journal.run_id == "20260101_000100_2"
+
+    # 日志中没有的新插件仍会执行
+    new_plugin = SimpleNamespace(get_name=lambda: "c")
+    engine.plugins = [SimpleNamespace(get_name=lambda: "a"), new_plugin]
+    engine._prepare_resume()
+    assert engine.plugins == [new_plugin]
+
+
+def test_prune_keeps_newest_journals(tmp_path):
+    for i in range(5):
+        _age(_successful_run(tmp_path, f"run{i}", ["a"]), 100 - i)
+    RunJournal.prune(str(tmp_path), keep=2)
+    assert sorted(os.listdir(tmp_path)) == ["run_run3.jsonl", "run_run4.jsonl"]
+
+
+def test_resumed_run_appends_to_the_same_journal(tmp_path):
+    journal = _interrupted_run(tmp_path)
+    resumed = RunJournal.find_resumable(str(tmp_path))
+    resumed.start_run(["b", "c"], resumed=True)
+    resumed.record("b", RunJournal.SUCCEEDED, {'success': True})
+    resumed.record("c", RunJournal.SUCCEEDED, {'success': True})
+    resumed.finish_run(0)
+    assert journal.completed_plugins() == {"a", "b", "c"}
+    assert journal.is_fully_successful()
@@ -0,0 +1,160 @@
+import time
+import threading
+
+from plugin_base import BasePlugin
+from executors import ExecutionHooks, SerialExecutor
+from scheduler import PluginScheduler
+
+
+class FakePlugin(BasePlugin):
+    def __init__(self, name, depends_on=(), conflicts_with=(), resources=(), succeed=True, duration=0.05):
+        self.name = name
+        self.depends_on = list(depends_on)
+        self.conflicts_with = list(conflicts_with)
+        self.resources = list(resources)
+        self.succeed = succeed
+        self.duration = duration
+
+    def get_name(self):
+        return self.name
+
+    def get_description(self):
+        return self.name
+
+    def execute(self, context=None):
+        time.sleep(self.duration)
+        return {'success': self.succeed}
+
+
+class Recorder:
+    """记录启动/结束顺序与同时运行的插件"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.running = set()
+        self.overlaps = []
+        self.skipped = {}
+
+    def run(self, plugin):
+        with self.lock:
+            self.events.append(("start", plugin.name))
+            self.overlaps.append(frozenset(self.running | {plugin.name}))
+            self.running.add(plugin.name)
+        try:
+            return plugin.execute()
+        finally:
+            with self.lock:
+                self.running.discard(plugin.name)
+                self.events.append(("end", plugin.name))
+
+    def on_skip(self, index, plugin, reason):
+        self.skipped[plugin.name] = reason
+
+    def position(self, kind, name):
+        return self.events.index((kind, name))
+
+
+def _schedule(plugins, recorder=None, **kwargs):
+    recorder = recorder or Recorder()
+    scheduler = PluginScheduler(plugins, log=lambda message, level="info": None, **kwargs)
+    scheduler.run(recorder.run, on_skip=recorder.on_skip)
+    return recorder
+
+
+def test_dependencies_run_before_dependents():
+    plugins = [FakePlugin("c", depends_on=["b"]), FakePlugin("b", depends_on=["a"]), FakePlugin("a")]
+    recorder = _schedule(plugins, max_workers=4)
+    assert recorder.position("end", "a") < recorder.position("start", "b")
+    assert recorder.position("end", "b") < recorder.position("start", "c")
+
+
+def test_failed_dependency_skips_downstream():
+    plugins = [FakePlugin("a", succeed=False), FakePlugin("b", depends_on=["a"]), FakePlugin("c", depends_on=["b"]),
+               FakePlugin("d")]
+    recorder = _schedule(plugins, max_workers=4)
+    assert set(recorder.skipped) == {"b", "c"}
+    assert ("end", "d") in recorder.events
+
+
+def test_dependency_cycle_is_skipped():
+    plugins = [FakePlugin("a", depends_on=["b"]), FakePlugin("b", depends_on=["a"]), FakePlugin("c")]
+    recorder = _schedule(plugins, max_workers=4)
+    assert set(recorder.skipped) == {"a", "b"}
+    assert ("end", "c") in recorder.events
+
+
+def test_conflicting_plugins_never_overlap():
+    plugins = [FakePlugin("a", conflicts_with=["b"]), FakePlugin("b"), FakePlugin("c")]
+    recorder = _schedule(plugins, max_workers=4)
+    assert not any({"a", "b"} <= overlap for overlap in recorder.overlaps)
+
+
+def test_ready_plugins_start_in_list_order():
+    plugins = [FakePlugin(name) for name in "abcdef"]
+    recorder = _schedule(plugins, max_workers=1)
+    assert [name for kind, name in recorder.events if kind == "start"] == list("abcdef")
+
+
+def test_stop_skips_plugins_not_started():
+    stop = threading.Event()
+    plugins = [FakePlugin(name, duration=0.2) for name in "abcd"]
+    recorder = Recorder()
+    original_run = recorder.run
+
+    def run_and_stop(plugin):
+        stop.set()
+        return original_run(plugin)
+
+    scheduler = PluginScheduler(plugins, max_workers=1, log=lambda message, level="info": None)
+    scheduler.run(run_and_stop, on_skip=recorder.on_skip, should_stop=stop.is_set)
+    assert set(recorder.skipped) == {"b", "c", "d"}
+
+
+def test_resource_limit_caps_concurrency():
+    plugins = [FakePlugin(f"disk{i}", resources=["disk"], duration=0.1) for i in range(6)]
+    recorder = _schedule(plugins, max_workers=6, resource_limits={"disk": 2})
+    assert max(len(overlap) for overlap in recorder.overlaps) == 2
+
+
+def test_unlisted_resource_defaults_to_one():
+    plugins = [FakePlugin(f"p{i}", resources=["printer"]) for i in range(3)] + [FakePlugin("free")]
+    recorder = _schedule(plugins, max_workers=4)
+    assert all(len({name for name in overlap if name.startswith("p")}) <= 1 for overlap in recorder.overlaps)
+
+
+def test_exclusive_plugin_runs_alone():
+    plugins = [FakePlugin("a", duration=0.1), FakePlugin("x", resources=["exclusive"], duration=0.1),
+               FakePlugin("b", duration=0.1), FakePlugin("c", duration=0.1)]
+    recorder = _schedule(plugins, max_workers=4)
+    assert all(overlap == {"x"} for overlap in recorder.overlaps if "x" in overlap)
+
+
+def test_resource_waits_are_reported():
+    plugins = [FakePlugin("first", resources=["registry"], duration=0.2), FakePlugin("second", resources=["registry"])]
+    scheduler = PluginScheduler(plugins, max_workers=2, log=lambda message, level="info": None)
+    scheduler.run(Recorder().run)
+    (name, tag, seconds), = scheduler.resource_wait_report()
+    assert (name, tag) == ("second", "registry")
+    assert seconds > 0.1
+
+
+class RecordingHooks(ExecutionHooks):
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def run_plugin(self, plugin):
+        return self.recorder.run(plugin)
+
+    def on_skip(self, index, plugin, reason):
+        self.recorder.on_skip(index, plugin, reason)
+
+
+def test_serial_executor_honours_dependencies():
+    plugins = [FakePlugin("c", depends_on=["b"]), FakePlugin("b", depends_on=["a"]), FakePlugin("a"),
+               FakePlugin("x", depends_on=["y"]), FakePlugin("y", succeed=False), FakePlugin("z", conflicts_with=["a"])]
+    recorder = Recorder()
+    SerialExecutor(max_workers=8, log=lambda message, level="info": None).run(plugins, RecordingHooks(recorder))
+    assert [name for kind, name in recorder.events if kind == "start"] == ["a", "b", "c", "y", "z"]
+    assert all(len(running) == 1 for running in recorder.overlaps)
+    assert set(recorder.skipped) == {"x"}
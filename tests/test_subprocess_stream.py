@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+from subprocess_stream import run_streaming
+
+
+def _run_bounded(limit=10.0, **kwargs):
+    outcome = []
+    thread = threading.Thread(target=lambda: outcome.append(run_streaming(**kwargs)), daemon=True)
+    thread.start()
+    thread.join(limit)
+    assert not thread.is_alive(), f"run_streaming() 在 {limit:g} 秒内没有返回"
+    return outcome[0]
+
+
+def test_collects_all_output():
+    script = "import sys\nfor i in range(500): print(i)\nprint('err', file=sys.stderr)"
+    result = _run_bounded(command=[sys.executable, "-c", script], tail_lines=1000, encoding="utf-8")
+    assert result.success
+    assert result.line_count == 501
+    assert not result.output_truncated
+
+
+def test_returns_when_grandchild_keeps_pipe_open():
+    # 子进程启动一个继承了 stdout 的后代进程后立即退出
+    script = ("import subprocess, sys\n"
+              "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+              "print('done', flush=True)")
+    result = _run_bounded(command=[sys.executable, "-c", script], kill_grace=0.5, encoding="utf-8")
+    assert result.returncode == 0
+    assert "done" in result.output()
+    assert result.output_truncated
+    assert "未被收集" in result.summary()
+
+
+def test_spill_file_only_kept_on_request(tmp_path):
+    script = "for i in range(100): print(i)"
+    result = _run_bounded(command=[sys.executable, "-c", script], tail_lines=10, spill_dir=str(tmp_path),
+                          encoding="utf-8")
+    assert result.line_count == 100
+    assert result.spill_path is None
+    assert os.listdir(tmp_path) == []
+
+    result = _run_bounded(command=[sys.executable, "-c", script], tail_lines=10, spill_dir=str(tmp_path),
+                          encoding="utf-8", keep_spill=True)
+    with open(result.spill_path, encoding="utf-8") as f:
+        assert f.read().split() == [str(i) for i in range(100)]
+    assert "完整输出" in result.summary()
+
+
+def _is_running(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # 已退出但尚未被回收的僵尸进程不算在运行
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="需要 POSIX 进程组与 /proc")
+def test_timeout_kills_grandchildren():
+    script = ("import subprocess, sys, time\n"
+              "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'],\n"
+              "                         stdout=subprocess.DEVNULL)\n"
+              "print(child.pid, flush=True)\n"
+              "time.sleep(30)")
+    result = _run_bounded(command=[sys.executable, "-c", script], timeout=1.0, kill_grace=0.5, encoding="utf-8")
+    assert result.timed_out
+    grandchild = int(result.output().split()[0])
+    deadline = time.monotonic() + 3
+    while _is_running(grandchild) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _is_running(grandchild)
@@ -0,0 +1,190 @@
+import os
+import time
+import sqlite3
+import statistics
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """把秒数格式化为便于阅读的中文时长，例如 “3分20秒”"""
+    if seconds is None:
+        return "未知"
+    seconds = int(round(max(0.0, seconds)))
+    if seconds < 60:
+        return f"{seconds}秒"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}分{seconds:02d}秒"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}小时{minutes:02d}分"
+
+
+class TimingDatabase:
+    """
+    插件执行耗时的历史数据库 (本地 SQLite)。
+    每次执行记录每个插件的实际耗时，并以最近若干次执行的滚动中位数估计下一次的耗时。
+    """
+
+    FILE_NAME = "timings.sqlite3"
+
+    def __init__(self, db_dir: str, window: int = 10):
+        self.path = os.path.join(db_dir, self.FILE_NAME)
+        self.window = max(1, int(window))
+        self._lock = threading.Lock()
+        self._available = True
+        try:
+            os.makedirs(db_dir, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS plugin_timings ("
+                    " run_id TEXT NOT NULL,"
+                    " plugin TEXT NOT NULL,"
+                    " duration REAL NOT NULL,"
+                    " success INTEGER NOT NULL,"
+                    " ts REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_plugin_ts ON plugin_timings (plugin, ts)")
+        except sqlite3.Error as e:
+            print(f"[WARNING] 无法打开耗时数据库，将使用平均进度: {e}")
+            self._available = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每次操作使用独立连接，允许在任意工作线程中调用
+        return sqlite3.connect(self.path, timeout=5)
+
+    def record(self, run_id: str, plugin_name: str, duration: float, success: bool):
+        """记录一次插件执行的耗时"""
+        if not self._available:
+            return
+        with self._lock:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT INTO plugin_timings (run_id, plugin, duration, success, ts) VALUES (?, ?, ?, ?, ?)",
+                        (run_id, plugin_name, float(duration), 1 if success else 0, time.time())
+                    )
+            except sqlite3.Error as e:
+                print(f"[WARNING] 写入耗时数据库失败: {e}")
+
+    def _recent_durations(self, conn: sqlite3.Connection, plugin_name: str) -> List[float]:
+        rows = conn.execute(
+            "SELECT duration FROM plugin_timings WHERE plugin = ? ORDER BY ts DESC LIMIT ?",
+            (plugin_name, self.window)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def median_durations(self, plugin_names: List[str]) -> Dict[str, float]:
+        """返回各插件最近 window 次执行耗时的中位数；没有历史记录的插件不出现在结果中"""
+        medians = {}
+        if not self._available:
+            return medians
+        try:
+            with self._connect() as conn:
+                for name in plugin_names:
+                    durations = self._recent_durations(conn, name)
+                    if durations:
+                        medians[name] = statistics.median(durations)
+        except sqlite3.Error as e:
+            print(f"[WARNING] 读取耗时数据库失败: {e}")
+        return medians
+
+    def slowest_plugins(self, limit: int = 10) -> List[Tuple[str, float, int]]:
+        """跨所有历史运行，返回耗时中位数最高的插件列表 [(名称, 中位耗时秒数, 记录次数)]"""
+        if not self._available:
+            return []
+        try:
+            with self._connect() as conn:
+                rows = conn.execute("SELECT plugin, COUNT(*) FROM plugin_timings GROUP BY plugin").fetchall()
+                stats = [(name, statistics.median(self._recent_durations(conn, name)), count)
+                         for name, count in rows]
+        except sqlite3.Error as e:
+            print(f"[WARNING] 读取耗时数据库失败: {e}")
+            return []
+        stats.sort(key=lambda item: item[1], reverse=True)
+        return stats[:limit]
+
+
+class ProgressEstimator:
+    """
+    基于历史耗时的加权进度估算。
+    每个插件按其历史中位耗时计权，没有历史记录的插件使用已知插件耗时的中位数；
+    正在运行的插件优先按其自行报告的子进度计入，未报告时按已用时间估算 (最多计到其预计耗时的95%)。
+    """
+
+    def __init__(self, plugin_names: List[str], expected: Dict[str, float], workers: int = 1):
+        self.total = len(plugin_names)
+        self.workers = max(1, int(workers))
+        self.has_history = bool(expected)
+        fallback = statistics.median(expected.values()) if expected else 1.0
+        self.expected = {name: max(0.1, expected.get(name, fallback)) for name in plugin_names}
+        self.total_weight = sum(self.expected.values()) or 1.0
+
+        self.completed = 0
+        self.running: List[str] = []
+        self._started_at: Dict[str, float] = {}
+        self._fractions: Dict[str, float] = {}
+        self._messages: Dict[str, str] = {}
+        self._done_weight = 0.0
+        self._lock = threading.Lock()
+
+    def start(self, plugin_name: str):
+        with self._lock:
+            self.running.append(plugin_name)
+            self._started_at[plugin_name] = time.monotonic()
+
+    def finish(self, plugin_name: str):
+        """插件执行结束 (无论成功与否)，或被跳过"""
+        with self._lock:
+            if plugin_name in self.running:
+                self.running.remove(plugin_name)
+            self._started_at.pop(plugin_name, None)
+            self._fractions.pop(plugin_name, None)
+            self._messages.pop(plugin_name, None)
+            self.completed += 1
+            self._done_weight += self.expected.get(plugin_name, 0.0)
+
+    def update(self, plugin_name: str, fraction: float, message: Optional[str] = None):
+        """记录插件自行报告的子进度 (0.0 ~ 1.0)"""
+        with self._lock:
+            if plugin_name in self._started_at:
+                self._fractions[plugin_name] = fraction
+                if message:
+                    self._messages[plugin_name] = message
+
+    def describe_running(self) -> str:
+        """返回正在运行的插件及其当前步骤说明，例如 “注册表修复 (正在扫描 HKCU)”"""
+        with self._lock:
+            parts = []
+            for name in self.running:
+                message = self._messages.get(name)
+                parts.append(f"{name} ({message})" if message else name)
+            return ", ".join(parts)
+
+    def _running_weight(self, now: float) -> float:
+        weight = 0.0
+        for name, started in self._started_at.items():
+            if name in self._fractions:
+                weight += self.expected[name] * self._fractions[name]
+            else:
+                weight += min(now - started, self.expected[name] * 0.95)
+        return weight
+
+    def progress(self) -> float:
+        """返回 0~100 的加权进度百分比"""
+        with self._lock:
+            if self.total == 0:
+                return 100.0
+            done = self._done_weight + self._running_weight(time.monotonic())
+            return min(100.0, done / self.total_weight * 100)
+
+    def eta(self) -> Optional[float]:
+        """返回预计剩余秒数；完全没有历史数据时返回 None"""
+        if not self.has_history:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            remaining = self.total_weight - self._done_weight - self._running_weight(now)
+            # 并行执行时，剩余工作量大致被同时运行的插件数分摊
+            parallelism = min(self.workers, max(1, self.total - self.completed))
+            return max(0.0, remaining / parallelism)